@@ -2,9 +2,11 @@
 Endpoints de la API REST del Sistema RAG BPG
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from datetime import datetime
 from typing import Optional
+import asyncio
 import logging
 
 from api.models import (
@@ -12,15 +14,25 @@ from api.models import (
     QueryResponse, 
     HealthResponse, 
     ConfigResponse,
-    ValidationResult
+    TokenUsage,
+    ValidationResult,
+    ValidationStatus
 )
 from rag_bpg_ollama import RAGSystemBPG
 from config.settings import RAGConfig
+from utils.cancellation import CancelToken, GenerationCancelled, CLIENT_DISCONNECTED
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 rag_system: Optional[RAGSystemBPG] = None
 
+# Header opcional con el tiempo máximo (segundos) que el cliente está dispuesto a esperar
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+# Cada cuánto se revisa si el cliente sigue conectado
+DISCONNECT_POLL_SECONDS = 0.5
+# Status no estándar (nginx) para "el cliente cerró la conexión"
+CLIENT_CLOSED_REQUEST = 499
+
 
 def set_rag_system(rag: RAGSystemBPG):
     global rag_system
@@ -29,7 +41,7 @@ def set_rag_system(rag: RAGSystemBPG):
 
 @router.get("/health", response_model=HealthResponse, tags=["System"])
 async def health_check():
-    """Health check del sistema"""
+    """Health check del sistema (desde el estado cacheado por el monitor de salud)"""
     if rag_system is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -37,36 +49,33 @@ async def health_check():
         )
     
     try:
-        # Verificar Ollama - CORREGIDO (hacer llamada real)
-        import requests
-        ollama_available = False
-        models_available = []
-        try:
-            response = requests.get(f"{rag_system.ollama_base_url}/api/tags", timeout=2)
-            if response.status_code == 200:
-                ollama_available = True
-                models_available = [m['name'] for m in response.json().get('models', [])]
-        except:
-            ollama_available = False
+        snapshot = rag_system.health_monitor.snapshot()
         
-        # Verificar ChromaDB
-        chroma_available = rag_system.collection is not None
-        total_docs = 0
-        if chroma_available:
-            try:
-                total_docs = rag_system.collection.count()
-            except:
-                chroma_available = False
+        # Estado del circuit breaker (open/half_open = respuestas en modo degradado)
+        breaker = rag_system.circuit_breaker.snapshot()
+        healthy = (
+            snapshot.get('ollama_available', False)
+            and snapshot.get('chroma_available', False)
+            and breaker['state'] == "closed"
+            and not snapshot['stale']
+        )
+        
+        if snapshot.get('starting'):
+            status_name = "starting"  # el monitor todavía no terminó la primera verificación
+        else:
+            status_name = "healthy" if healthy else "degraded"
         
         return HealthResponse(
-            status="healthy" if (ollama_available and chroma_available) else "degraded",
+            status=status_name,
             version="2.1",
             rag_initialized=True,
-            ollama_available=ollama_available,
-            chroma_available=chroma_available,
-            total_documents=total_docs,
-            models_available=models_available,
-            timestamp=datetime.now().isoformat()
+            ollama_available=snapshot.get('ollama_available', False),
+            chroma_available=snapshot.get('chroma_available', False),
+            total_documents=snapshot.get('total_documents', 0),
+            models_available=snapshot.get('models_available', []),
+            circuit_breaker=breaker,
+            snapshot_age=snapshot['age_seconds'],
+            timestamp=snapshot['timestamp']
         )
     
     except Exception as e:
@@ -77,6 +86,32 @@ async def health_check():
         )
 
 
+@router.get("/health/live", tags=["System"])
+async def liveness():
+    """Liveness: el proceso responde (sin verificar dependencias)"""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready", tags=["System"])
+async def readiness(response: Response):
+    """Readiness: puede atender consultas según el último estado cacheado (503 si no)"""
+    if rag_system is None:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"ready": False, "reason": "Sistema RAG no inicializado"}
+    
+    snapshot = rag_system.health_monitor.snapshot()
+    if not snapshot['ready']:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "ready": snapshot['ready'],
+        "starting": snapshot.get('starting', False),
+        "ollama_available": snapshot.get('ollama_available', False),
+        "chroma_available": snapshot.get('chroma_available', False),
+        "stale": snapshot['stale'],
+        "snapshot_age": snapshot['age_seconds']
+    }
+
+
 @router.get("/config", response_model=ConfigResponse, tags=["System"])
 async def get_config():
     """Obtener configuración actual del sistema"""
@@ -111,9 +146,39 @@ async def get_config():
         )
 
 
+def _request_timeout(http_request: Request) -> float:
+    """Deadline de la consulta: ollama_timeout, acotado por el header del cliente"""
+    timeout = float(rag_system.config.ollama_timeout)
+    header = http_request.headers.get(REQUEST_TIMEOUT_HEADER)
+    if header:
+        try:
+            requested = float(header)
+        except ValueError:
+            requested = 0
+        if requested > 0:
+            timeout = min(timeout, requested)
+    return timeout
+
+
+async def _run_until_disconnect(http_request: Request, token: CancelToken, func, *args, **kwargs):
+    """
+    Ejecutar func en el threadpool y cancelar token si el cliente se desconecta
+
+    Al cancelar se corta el stream de Ollama y se libera el slot de generación.
+    """
+    task = asyncio.ensure_future(run_in_threadpool(func, *args, **kwargs))
+    while not task.done():
+        await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+        if not task.done() and await http_request.is_disconnected():
+            logger.info("Cliente desconectado: cancelando consulta")
+            token.cancel(CLIENT_DISCONNECTED)
+            break
+    return await task
+
+
 @router.post("/query", response_model=QueryResponse, tags=["RAG"])
-async def query_rag(request: QueryRequest):
-    """Realizar consulta al sistema RAG"""
+async def query_rag(request: QueryRequest, http_request: Request):
+    """Realizar consulta al sistema RAG (deadline opcional vía header X-Request-Timeout)"""
     if rag_system is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -140,7 +205,13 @@ async def query_rag(request: QueryRequest):
         
         # Ejecutar query - CORREGIDO: query_text como primer argumento
         start_time = datetime.now()
-        result = rag_system.query(request.query, **query_params)
+        # En un hilo: no bloquea el event loop, permite coalescer consultas idénticas
+        # y cancelar la generación si el cliente se desconecta
+        cancel = CancelToken()
+        result = await _run_until_disconnect(
+            http_request, cancel, rag_system.query, request.query,
+            timeout=_request_timeout(http_request), cancel=cancel, **query_params
+        )
         end_time = datetime.now()
         total_time = (end_time - start_time).total_seconds()
         
@@ -155,6 +226,18 @@ async def query_rag(request: QueryRequest):
                 recommendations=val['recommendations']
             )
         
+        # Tokens y throughput (solo si respondió Ollama)
+        token_usage = None
+        if result.get('eval_count') is not None:
+            token_usage = TokenUsage(
+                prompt_tokens=result['prompt_eval_count'],
+                generated_tokens=result['eval_count'],
+                prompt_seconds=result['prompt_eval_seconds'],
+                generated_seconds=result['eval_seconds'],
+                prompt_tokens_per_sec=result['prompt_tokens_per_sec'],
+                generated_tokens_per_sec=result['generated_tokens_per_sec']
+            )
+        
         # Construir respuesta
         return QueryResponse(
             success=result.get('success', True),
@@ -169,9 +252,21 @@ async def query_rag(request: QueryRequest):
             total_time=total_time,
             timestamp=result['timestamp'],
             validation=validation,
+            validation_id=result.get('validation_id'),
+            timings=result.get('timings'),
+            token_usage=token_usage,
             error=None
         )
     
+    except GenerationCancelled as e:
+        if e.reason == CLIENT_DISCONNECTED:
+            # Nadie espera la respuesta
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Tiempo límite de la consulta excedido"
+        )
+    
     except Exception as e:
         logger.error(f"Error en query: {e}")
         
@@ -191,3 +286,41 @@ async def query_rag(request: QueryRequest):
             validation=None,
             error=str(e)
         )
+
+
+@router.get("/validation/{validation_id}", response_model=ValidationStatus, tags=["RAG"])
+async def get_validation(validation_id: str):
+    """Resultado de una validación en segundo plano (validation_mode='async')"""
+    if rag_system is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Sistema RAG no inicializado"
+        )
+    
+    record = None
+    if rag_system.async_validator is not None:
+        record = rag_system.async_validator.get(validation_id)
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Validación no encontrada (id desconocido o ya descartado)"
+        )
+    
+    validation = None
+    if record['validation']:
+        val = record['validation']
+        validation = ValidationResult(
+            is_valid=val['is_valid'],
+            score=val['score'],
+            validations=val['validations'],
+            recommendations=val['recommendations']
+        )
+    return ValidationStatus(
+        validation_id=record['validation_id'],
+        status=record['status'],
+        validation=validation,
+        error=record['error'],
+        submitted_at=record['submitted_at'],
+        completed_at=record['completed_at'],
+        seconds=record['seconds']
+    )
@@ -2,14 +2,16 @@
 Aplicación FastAPI principal para Sistema RAG BPG
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import logging
 from contextlib import asynccontextmanager
 
 from api.endpoints import router, set_rag_system
 from rag_bpg_ollama import RAGSystemBPG
 from config.settings import DEFAULT_CONFIG
+from utils.metrics import CONTENT_TYPE
 
 # Configurar logging
 logging.basicConfig(
@@ -33,6 +35,7 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Inicializando Sistema RAG BPG...")
     try:
         rag_system = RAGSystemBPG(config=DEFAULT_CONFIG)
+        rag_system.health_monitor.start()
         set_rag_system(rag_system)
         logger.info("✅ Sistema RAG inicializado correctamente")
     except Exception as e:
@@ -43,6 +46,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown: Cleanup si es necesario
     logger.info("👋 Cerrando Sistema RAG BPG...")
+    if rag_system is not None:
+        rag_system.shutdown()
 
 
 # Crear aplicación FastAPI
@@ -78,11 +83,25 @@ async def root():
         "version": "2.1.0",
         "docs": "/docs",
         "health": "/api/v1/health",
+        "liveness": "/api/v1/health/live",
+        "readiness": "/api/v1/health/ready",
+        "metrics": "/metrics",
         "config": "/api/v1/config",
-        "query": "/api/v1/query"
+        "query": "/api/v1/query",
+        "validation": "/api/v1/validation/{validation_id}"
     }
 
 
+@app.get("/metrics", tags=["Root"], response_class=PlainTextResponse)
+async def metrics():
+    """
+    Métricas en formato Prometheus (latencia por etapa, cola, caché, tokens, errores)
+    """
+    if rag_system is None:
+        raise HTTPException(status_code=503, detail="Sistema RAG no inicializado")
+    return PlainTextResponse(rag_system.metrics.render(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
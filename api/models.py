@@ -12,7 +12,7 @@ class QueryRequest(BaseModel):
     k: Optional[int] = Field(None, description="Número de documentos a recuperar (1-20)", ge=1, le=20)
     temperature: Optional[float] = Field(None, description="Temperatura del LLM (0-1)", ge=0, le=1)
     max_tokens: Optional[int] = Field(None, description="Máximo de tokens en respuesta", ge=50, le=2000)
-    strategy: Optional[str] = Field(None, description="Estrategia de prompt: standard, concise, fewshot, technical")
+    strategy: Optional[str] = Field(None, description="Estrategia de prompt: standard, concise, fewshot, technical, extractive (sin LLM)")
     enable_validation: Optional[bool] = Field(None, description="Activar validación de respuesta")
     
     class Config:
@@ -34,6 +34,27 @@ class ValidationResult(BaseModel):
     recommendations: List[str]
 
 
+class ValidationStatus(BaseModel):
+    """Estado de una validación en segundo plano"""
+    validation_id: str
+    status: str = Field(..., description="pending, done o error")
+    validation: Optional[ValidationResult] = None
+    error: Optional[str] = None
+    submitted_at: str
+    completed_at: Optional[str] = None
+    seconds: Optional[float] = Field(None, description="Duración de la validación")
+
+
+class TokenUsage(BaseModel):
+    """Tokens y throughput de la generación en Ollama"""
+    prompt_tokens: int
+    generated_tokens: int
+    prompt_seconds: float
+    generated_seconds: float
+    prompt_tokens_per_sec: Optional[float] = None
+    generated_tokens_per_sec: Optional[float] = None
+
+
 class QueryResponse(BaseModel):
     """Response de consulta al RAG"""
     success: bool
@@ -48,6 +69,16 @@ class QueryResponse(BaseModel):
     total_time: float
     timestamp: str
     validation: Optional[ValidationResult] = None
+    validation_id: Optional[str] = Field(
+        None,
+        description="Id para consultar la validación en GET /api/v1/validation/{id} (validation_mode='async')"
+    )
+    timings: Optional[Dict[str, float]] = Field(
+        None,
+        description="Duración por etapa en segundos (embedding, vector_search, context_assembly, "
+                    "prompt_build, llm, llm_load, llm_prefill, llm_decode, validation)"
+    )
+    token_usage: Optional[TokenUsage] = None
     error: Optional[str] = None
     
     class Config:
@@ -65,6 +96,26 @@ class QueryResponse(BaseModel):
                 "total_time": 6.5,
                 "timestamp": "2025-11-01T17:30:00",
                 "validation": None,
+                "validation_id": "3f2b8c1e9a7d4e6f8b0c2d4e6f8a0b1c",
+                "timings": {
+                    "embedding": 0.021,
+                    "vector_search": 0.004,
+                    "context_assembly": 0.003,
+                    "prompt_build": 0.001,
+                    "llm": 6.3,
+                    "llm_load": 0.0,
+                    "llm_prefill": 1.2,
+                    "llm_decode": 5.0,
+                    "validation": 0.08
+                },
+                "token_usage": {
+                    "prompt_tokens": 1450,
+                    "generated_tokens": 180,
+                    "prompt_seconds": 1.2,
+                    "generated_seconds": 5.0,
+                    "prompt_tokens_per_sec": 1208.33,
+                    "generated_tokens_per_sec": 36.0
+                },
                 "error": None
             }
         }
@@ -79,6 +130,8 @@ class HealthResponse(BaseModel):
     chroma_available: bool
     total_documents: int
     models_available: List[str]
+    circuit_breaker: Optional[Dict[str, Any]] = None
+    snapshot_age: Optional[float] = None  # segundos desde la última verificación
     timestamp: str
 
 
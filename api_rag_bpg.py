@@ -5,7 +5,9 @@ Puerto: 8000 (configurable)
 """
 
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 import uvicorn
@@ -14,6 +16,7 @@ import logging
 
 # Importar sistema RAG
 from rag_bpg_ollama import RAGSystemBPG
+from utils.metrics import CONTENT_TYPE
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +45,7 @@ try:
         chroma_db_path="models/chroma_db",
         ollama_model="llama3.2"
     )
+    rag_system.health_monitor.start()
     logger.info("✅ Sistema RAG inicializado correctamente")
 except Exception as e:
     logger.error(f"❌ Error inicializando RAG: {str(e)}")
@@ -81,6 +85,10 @@ class QueryResponse(BaseModel):
     tiempo_generacion: float = Field(..., description="Tiempo en segundos")
     modelo: str = Field(..., description="Modelo LLM usado")
     documentos_recuperados: Optional[List[DocumentoRecuperado]] = None
+    tiempos_etapas: Optional[Dict[str, float]] = Field(None, description="Duración por etapa en segundos")
+    tokens_prompt: Optional[int] = Field(None, description="Tokens del prompt procesados por Ollama")
+    tokens_generados: Optional[int] = Field(None, description="Tokens generados")
+    tokens_por_segundo: Optional[float] = Field(None, description="Velocidad de generación (tokens/s)")
     timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
     success: bool = True
 
@@ -91,6 +99,7 @@ class HealthResponse(BaseModel):
     rag_disponible: bool
     ollama_conectado: bool
     num_documentos_indexados: int
+    antiguedad_estado: Optional[float] = None  # segundos desde la última verificación
     timestamp: str
 
 
@@ -102,7 +111,8 @@ async def root():
         "mensaje": "API RAG BPG - Sistema de Consultas sobre Buenas Prácticas Ganaderas",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "metrics": "/metrics"
     }
 
 
@@ -115,32 +125,50 @@ async def health_check():
     if rag_system is None:
         raise HTTPException(status_code=503, detail="Sistema RAG no inicializado")
     
-    try:
-        # Verificar ChromaDB
-        num_docs = rag_system.collection.count()
-        
-        # Verificar Ollama
-        import requests
-        ollama_response = requests.get(f"{rag_system.ollama_base_url}/api/tags", timeout=2)
-        ollama_ok = ollama_response.status_code == 200
-        
-        return HealthResponse(
-            status="healthy" if ollama_ok else "degraded",
-            rag_disponible=True,
-            ollama_conectado=ollama_ok,
-            num_documentos_indexados=num_docs,
-            timestamp=datetime.now().isoformat()
-        )
+    # Estado cacheado por el monitor de salud (sin llamadas de red por request)
+    snapshot = rag_system.health_monitor.snapshot()
+    ollama_ok = snapshot.get('ollama_available', False)
+    chroma_ok = snapshot.get('chroma_available', False)
     
-    except Exception as e:
-        logger.error(f"Error en health check: {str(e)}")
-        return HealthResponse(
-            status="unhealthy",
-            rag_disponible=False,
-            ollama_conectado=False,
-            num_documentos_indexados=0,
-            timestamp=datetime.now().isoformat()
-        )
+    if snapshot.get('starting'):
+        status = "starting"
+    elif not chroma_ok:
+        status = "unhealthy"
+    elif ollama_ok and not snapshot['stale']:
+        status = "healthy"
+    else:
+        status = "degraded"
+    
+    return HealthResponse(
+        status=status,
+        rag_disponible=chroma_ok,
+        ollama_conectado=ollama_ok,
+        num_documentos_indexados=snapshot.get('total_documents', 0),
+        antiguedad_estado=snapshot['age_seconds'],
+        timestamp=snapshot['timestamp']
+    )
+
+
+@app.get("/health/live", tags=["General"])
+async def liveness():
+    """Liveness: el proceso responde"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["General"])
+async def readiness():
+    """Readiness: puede atender consultas según el último estado cacheado"""
+    if rag_system is None or not rag_system.health_monitor.is_ready():
+        raise HTTPException(status_code=503, detail="Sistema RAG no listo")
+    return {"ready": True, "antiguedad_estado": rag_system.health_monitor.snapshot()['age_seconds']}
+
+
+@app.get("/metrics", tags=["General"], response_class=PlainTextResponse)
+async def metrics():
+    """Métricas en formato Prometheus"""
+    if rag_system is None:
+        raise HTTPException(status_code=503, detail="Sistema RAG no inicializado")
+    return PlainTextResponse(rag_system.metrics.render(), media_type=CONTENT_TYPE)
 
 
 @app.post("/query", response_model=QueryResponse, tags=["RAG"])
@@ -163,8 +191,9 @@ async def query_rag(request: QueryRequest):
     try:
         logger.info(f"Nueva consulta: {request.pregunta}")
         
-        # Ejecutar consulta RAG
-        resultado = rag_system.query(
+        # Ejecutar consulta RAG (en un hilo para no bloquear el event loop)
+        resultado = await run_in_threadpool(
+            rag_system.query,
             pregunta=request.pregunta,
             k=request.k,
             temperature=request.temperature,
@@ -195,7 +224,11 @@ async def query_rag(request: QueryRequest):
             num_docs_usados=resultado['num_docs_used'],
             tiempo_generacion=resultado['total_eval_duration'],
             modelo=resultado['model'],
-            documentos_recuperados=docs_recuperados
+            documentos_recuperados=docs_recuperados,
+            tiempos_etapas=resultado.get('timings'),
+            tokens_prompt=resultado.get('prompt_eval_count'),
+            tokens_generados=resultado.get('eval_count'),
+            tokens_por_segundo=resultado.get('generated_tokens_per_sec')
         )
         
         logger.info(f"Consulta exitosa - {resultado['total_eval_duration']:.2f}s")
@@ -260,6 +293,11 @@ async def get_stats():
             "ollama_url": rag_system.ollama_base_url,
             "modelo_llm_activo": rag_system.ollama_model,
             "modelos_disponibles": modelos_nombres,
+            "ollama_stats": rag_system.ollama_client.get_stats(),
+            "circuit_breaker": rag_system.circuit_breaker.snapshot(),
+            "answer_cache": rag_system.answer_cache.get_stats(),
+            "single_flight": rag_system.single_flight.get_stats(),
+            "tokens": rag_system.token_stats.get_stats(),
             "base_datos": "ChromaDB",
             "timestamp": datetime.now().isoformat()
         }
@@ -296,6 +334,7 @@ if __name__ == "__main__":
     print(f"📍 URL: http://localhost:8000")
     print(f"📚 Docs: http://localhost:8000/docs")
     print(f"🔍 Health: http://localhost:8000/health")
+    print(f"📈 Métricas: http://localhost:8000/metrics")
     print("="*60 + "\n")
     
     start_server(
@@ -0,0 +1,3 @@
+"""
+Benchmarks reproducibles del Sistema RAG BPG (Ollama simulado, sin GPU)
+"""
@@ -0,0 +1,375 @@
+"""
+Barrido de parámetros del chunker (TARGET_WORDS x OVERLAP_WORDS)
+
+Para cada combinación de la grilla re-chunkea los documentos de
+data/processed/*.txt, construye un índice temporal y lo evalúa contra el
+set dorado de benchmarks/retrieval_eval.py. Las combinaciones corren en
+procesos separados (--workers).
+
+Reporta por combinación:
+- tiempo de construcción del índice (embeddings + inserción) y su tamaño
+- tokens promedio del prompt armado con los primeros k chunks
+  (ContextBuilder + estrategia de prompt, igual que RAGSystemBPG)
+- recall@k por evidencias y MRR
+
+y recomienda la combinación con menos tokens de prompt entre las que
+quedan a menos de --max-recall-drop del mejor recall.
+
+El barrido chunkea con su propia función (sweep_chunks): misma división
+que src/preprocessing/chunker.py pero con overlap de overlap_words
+palabras. El chunker de producción no cambia; adoptar una combinación
+implica ajustarlo y regenerar chunks.json y el índice.
+
+Backends:
+- chroma: embeddings + colección ChromaDB temporal (requiere
+  sentence-transformers y chromadb, como src/rag/embeddings.py)
+- lexical: BM25 en memoria, sin modelos (tamaño = objeto serializado)
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.chunking_sweep
+    python -m benchmarks.chunking_sweep --target-words 200 300 500 --overlap-words 0 50 --workers 4
+    python -m benchmarks.chunking_sweep --backend lexical
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+# Agregar la raíz del proyecto al path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.retrieval_eval import (
+    GOLDEN_FILE, LexicalIndex, chroma_search, chunk_texts, evaluate, load_chunks, load_golden
+)
+from benchmarks.run_benchmarks import OUTPUT_DIR, git_commit
+from prompts.strategies import PromptFactory
+from src.preprocessing.chunker import TARGET_WORDS, count_words, split_into_sentences
+from utils.context_builder import ContextBuilder, format_context_doc, join_context
+from utils.context_window import estimate_tokens
+
+
+DOCUMENTS_DIR = PROJECT_ROOT / "data" / "processed"
+DEFAULT_TARGET_WORDS = [200, 300, 500, 800]
+DEFAULT_OVERLAP_WORDS = [0, 25, 50, 100]
+
+# Modelo de embeddings cargado una vez por proceso
+_model = None
+
+
+def load_documents(directory: Path = DOCUMENTS_DIR) -> Dict[str, str]:
+    """Nombre (stem) -> texto de cada documento procesado"""
+    documents = {}
+    for path in sorted(directory.glob("*.txt")):
+        with open(path, 'r', encoding='utf-8') as f:
+            documents[path.stem] = f.read()
+    if not documents:
+        raise FileNotFoundError(f"No hay archivos .txt en {directory}")
+    return documents
+
+
+# ==================== CHUNKING DEL BARRIDO ====================
+
+def overlap_tail(segments: List[str], overlap_words: int) -> str:
+    """Últimas overlap_words palabras de un chunk (vacío si overlap_words es 0)"""
+    if overlap_words <= 0:
+        return ''
+    # Recorrer desde el final solo los segmentos necesarios; rsplit corta
+    # únicamente las últimas palabras de cada segmento
+    tail = []
+    missing = overlap_words
+    for segment in reversed(segments):
+        words = segment.rsplit(None, missing)
+        if len(words) > missing:
+            words = words[1:]
+        tail.append(' '.join(words))
+        missing -= len(words)
+        if missing <= 0:
+            break
+    return ' '.join(reversed(tail))
+
+
+def sweep_chunks(text: str, target_words: int, overlap_words: int) -> List[str]:
+    """
+    Chunks como create_chunks_recursive (párrafos y, si no entran, oraciones)
+    pero con overlap de overlap_words palabras
+
+    El chunker de producción repite los últimos 3 segmentos del chunk
+    anterior sin importar su largo, así que no sirve para barrer el overlap.
+    """
+    chunks = []
+    current_chunk: List[str] = []
+    current_word_count = 0
+
+    def start_chunk(segment: str, words: int):
+        nonlocal current_chunk, current_word_count
+        if current_chunk:
+            chunks.append(' '.join(current_chunk))
+        overlap_text = overlap_tail(current_chunk, overlap_words)
+        current_chunk = [overlap_text, segment] if overlap_text else [segment]
+        current_word_count = count_words(overlap_text) + words
+
+    for para in text.split('\n\n'):
+        para = para.strip()
+        if not para:
+            continue
+        para_words = count_words(para)
+
+        if para_words > target_words:
+            for sent in split_into_sentences(para):
+                sent_words = count_words(sent)
+                if current_word_count + sent_words <= target_words:
+                    current_chunk.append(sent)
+                    current_word_count += sent_words
+                else:
+                    start_chunk(sent, sent_words)
+        elif current_word_count + para_words <= target_words:
+            current_chunk.append(para)
+            current_word_count += para_words
+        else:
+            start_chunk(para, para_words)
+
+    if current_chunk:
+        chunks.append(' '.join(current_chunk))
+    return chunks
+
+
+def build_chunks(documents: Dict[str, str], target_words: int, overlap_words: int) -> List[Dict]:
+    """Chunks de todos los documentos con la metadata de chunks.json"""
+    chunks = []
+    for name, text in documents.items():
+        texts = sweep_chunks(text, target_words, overlap_words)
+        chunks.extend(
+            {
+                "chunk_id": f"{name}_{i}",
+                "source": name,
+                "text": chunk_text,
+                "word_count": count_words(chunk_text),
+                "chunk_number": i,
+                "total_chunks": len(texts)
+            }
+            for i, chunk_text in enumerate(texts, 1)
+        )
+    return chunks
+
+
+def directory_size(path: Path) -> int:
+    """Bytes ocupados por los archivos de un directorio"""
+    return sum(f.stat().st_size for f in Path(path).rglob('*') if f.is_file())
+
+
+def _embedding_model(name: str):
+    global _model
+    if _model is None:
+        from sentence_transformers import SentenceTransformer
+        _model = SentenceTransformer(name)
+    return _model
+
+
+# ==================== EVALUACIÓN DE UNA COMBINACIÓN ====================
+
+def prompt_tokens(search, golden: List[Dict], chunks: List[Dict], embeddings, k: int,
+                  strategy_name: str, token_budget: int) -> float:
+    """Tokens promedio del prompt armado con los primeros k chunks de cada pregunta"""
+    by_id = {c['chunk_id']: c for c in chunks}
+    builder = ContextBuilder(token_budget=token_budget, format_doc=format_context_doc)
+    strategy = PromptFactory.get_strategy_by_name(strategy_name)
+    totals = []
+    for index, item in enumerate(golden):
+        embedding = embeddings[index] if embeddings is not None else None
+        docs = []
+        for rank, chunk_id in enumerate(search(item['query'], embedding, k), 1):
+            chunk = by_id[chunk_id]
+            docs.append({
+                'rank': rank,
+                'chunk_id': chunk_id,
+                'text': chunk['text'],
+                'similarity': 0.0,
+                'metadata': {'source': chunk['source'], 'chunk_number': chunk['chunk_number']}
+            })
+        passages, _ = builder.build(docs)
+        totals.append(estimate_tokens(strategy.build(join_context(passages), item['query'])))
+    return sum(totals) / len(totals)
+
+
+def run_config(params: Dict) -> Dict:
+    """
+    Chunkear, indexar y evaluar una combinación (corre en un proceso del pool)
+
+    Args:
+        params: target_words, overlap_words, backend, documents, golden, ks,
+            k, strategy, token_budget, embedding_model
+    """
+    chunks = build_chunks(params['documents'], params['target_words'], params['overlap_words'])
+    golden = params['golden']
+    embeddings = None
+    index_dir = None
+
+    try:
+        start = time.perf_counter()
+        if params['backend'] == 'chroma':
+            import chromadb
+            from chromadb.config import Settings
+
+            model = _embedding_model(params['embedding_model'])
+            vectors = model.encode([c['text'] for c in chunks], batch_size=32, convert_to_numpy=True)
+            index_dir = tempfile.mkdtemp(prefix="bpg_sweep_")
+            client = chromadb.PersistentClient(path=index_dir, settings=Settings(anonymized_telemetry=False))
+            collection = client.create_collection(name="sweep", metadata={"hnsw:space": "cosine"})
+            collection.add(
+                ids=[c['chunk_id'] for c in chunks],
+                embeddings=vectors.tolist(),
+                documents=[c['text'] for c in chunks]
+            )
+            build_seconds = time.perf_counter() - start
+            index_bytes = directory_size(index_dir)
+            search = chroma_search(collection)
+            embeddings = list(model.encode([item['query'] for item in golden], convert_to_numpy=True))
+        else:
+            index = LexicalIndex(chunks)
+            build_seconds = time.perf_counter() - start
+            index_bytes = len(pickle.dumps(index))
+            search = index.search
+
+        result = evaluate(search, golden, params['ks'], embeddings, texts=chunk_texts(chunks))
+        tokens = prompt_tokens(
+            search, golden, chunks, embeddings, params['k'],
+            params['strategy'], params['token_budget']
+        )
+    finally:
+        if index_dir:
+            shutil.rmtree(index_dir, ignore_errors=True)
+
+    return {
+        'target_words': params['target_words'],
+        'overlap_words': params['overlap_words'],
+        'chunks': len(chunks),
+        'avg_chunk_words': round(sum(c['word_count'] for c in chunks) / len(chunks), 1),
+        'build_seconds': round(build_seconds, 4),
+        'index_bytes': index_bytes,
+        'prompt_tokens': round(tokens, 1),
+        **result
+    }
+
+
+def run_sweep(grid: List[Dict], workers: int) -> List[Dict]:
+    """
+    Evaluar todas las combinaciones en procesos separados
+
+    Se usa 'spawn' para no heredar estado de torch ni de ChromaDB por fork.
+    """
+    if workers <= 1:
+        return [run_config(params) for params in grid]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        return list(pool.map(run_config, grid))
+
+
+def recommend(results: List[Dict], k: int, max_recall_drop: float) -> Optional[Dict]:
+    """Menos tokens de prompt entre las combinaciones cerca del mejor recall@k"""
+    if not results:
+        return None
+    best = max(r['recall'][k] for r in results)
+    candidates = [r for r in results if r['recall'][k] >= best - max_recall_drop]
+    return min(candidates, key=lambda r: (r['prompt_tokens'], -r['recall'][k]))
+
+
+def print_sweep(results: List[Dict], k: int):
+    print(f"\n📊 Barrido de chunking (recall@{k} por evidencias)")
+    print(f"   {'target':>6} {'overlap':>7} {'chunks':>6} {'build':>8} {'índice':>9} "
+          f"{'tokens':>7} {'R@' + str(k):>6} {'MRR':>6}")
+    for r in results:
+        print(f"   {r['target_words']:>6} {r['overlap_words']:>7} {r['chunks']:>6} "
+              f"{r['build_seconds']:>7.2f}s {r['index_bytes'] / 1024:>7.0f}KB "
+              f"{r['prompt_tokens']:>7.0f} {r['recall'][k]:>6.3f} {r['mrr']:>6.3f}")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Barrido de TARGET_WORDS y OVERLAP_WORDS del chunker")
+    parser.add_argument("--target-words", type=int, nargs="+", default=DEFAULT_TARGET_WORDS, help="Tamaños de chunk (palabras)")
+    parser.add_argument("--overlap-words", type=int, nargs="+", default=DEFAULT_OVERLAP_WORDS, help="Overlaps (palabras)")
+    parser.add_argument("--backend", choices=("chroma", "lexical"), default="chroma", help="Índice a construir")
+    parser.add_argument("--workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)),
+                        help="Procesos en paralelo")
+    parser.add_argument("--k", type=int, default=None, help="Chunks por pregunta (por defecto default_k de config)")
+    parser.add_argument("--max-recall-drop", type=float, default=0.02, help="Pérdida de recall aceptada para ahorrar tokens")
+    parser.add_argument("--golden", type=Path, default=GOLDEN_FILE, help="JSON del set dorado")
+    parser.add_argument("--output", type=Path, default=None, help="Archivo del reporte JSON")
+    args = parser.parse_args(argv)
+
+    from config.settings import RAGConfig
+
+    config = RAGConfig()
+    k = args.k or config.default_k
+    golden = load_golden(args.golden, load_chunks())
+    if any('evidence' not in item for item in golden):
+        parser.error("el set dorado necesita 'evidence' en cada pregunta para comparar chunkings")
+    documents = load_documents()
+    ks = sorted({1, k, 2 * k})
+
+    grid = [
+        {
+            'target_words': target,
+            'overlap_words': overlap,
+            'backend': args.backend,
+            'documents': documents,
+            'golden': golden,
+            'ks': ks,
+            'k': k,
+            'strategy': config.prompt_strategy if config.prompt_strategy != "extractive" else "standard",
+            'token_budget': config.context_token_budget,
+            'embedding_model': config.embedding_model
+        }
+        for target, overlap in itertools.product(sorted(set(args.target_words)), sorted(set(args.overlap_words)))
+        if overlap < target
+    ]
+    print(f"🧪 {len(grid)} combinaciones | backend {args.backend} | {args.workers} procesos | "
+          f"actual: TARGET_WORDS={TARGET_WORDS}")
+
+    start = time.perf_counter()
+    results = run_sweep(grid, args.workers)
+    print(f"⏱️  Barrido completo en {time.perf_counter() - start:.1f}s")
+    print_sweep(results, k)
+
+    choice = recommend(results, k, args.max_recall_drop)
+    if choice:
+        print(f"\n🎯 Recomendado: TARGET_WORDS={choice['target_words']}, OVERLAP_WORDS={choice['overlap_words']} "
+              f"({choice['prompt_tokens']:.0f} tokens de prompt, recall@{k} {choice['recall'][k]:.3f})")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(),
+            'backend': args.backend,
+            'embedding_model': config.embedding_model if args.backend == 'chroma' else None,
+            'queries': len(golden),
+            'k': k,
+            'ks': ks,
+            'current': {'target_words': TARGET_WORDS},
+            'max_recall_drop': args.max_recall_drop
+        },
+        'results': results,
+        'recommended': {'target_words': choice['target_words'], 'overlap_words': choice['overlap_words']} if choice else None
+    }
+    output = args.output or OUTPUT_DIR / f"chunking_sweep_{datetime.now():%Y%m%d_%H%M%S}_{report['meta']['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Reporte guardado en {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
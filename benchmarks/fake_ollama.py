@@ -0,0 +1,248 @@
+"""
+Servidor Ollama simulado para benchmarks
+Implementa /api/tags, /api/ps, /api/generate y /api/chat (con y sin streaming)
+reproduciendo respuestas grabadas a velocidades de prefill y decode
+configurables, con los mismos campos de conteo y duración que Ollama
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import itertools
+import json
+import threading
+import time
+
+from utils.context_window import estimate_tokens
+
+
+RESPONSES_FILE = Path(__file__).parent / "fixtures" / "ollama_responses.json"
+
+
+def load_responses(path: Union[str, Path] = RESPONSES_FILE) -> List[str]:
+    """
+    Cargar respuestas grabadas
+
+    Acepta una lista JSON de strings o de objetos con 'response' (o
+    'message.content'), como los que devuelve Ollama.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    responses = []
+    for record in records:
+        if isinstance(record, str):
+            responses.append(record)
+        else:
+            responses.append(record.get('response') or record.get('message', {}).get('content', ''))
+    if not responses:
+        raise ValueError(f"{path} no tiene respuestas")
+    return responses
+
+
+def _prompt_text(payload: Dict) -> str:
+    if 'messages' in payload:
+        return "\n".join(m.get('content', '') for m in payload['messages'])
+    return (payload.get('system') or '') + (payload.get('prompt') or '')
+
+
+class FakeOllama:
+    """
+    Ollama simulado en un hilo de fondo
+
+    Prefill: tokens del prompt (estimados) / prefill_rate segundos.
+    Decode: un token cada 1 / decode_rate segundos (palabras de la respuesta).
+    Con parallel, las generaciones que exceden los slots esperan en cola
+    (como OLLAMA_NUM_PARALLEL).
+    """
+
+    def __init__(
+        self,
+        responses: Optional[List[str]] = None,
+        model: str = "llama3.1:8b",
+        prefill_rate: float = 1500.0,
+        decode_rate: float = 30.0,
+        load_seconds: float = 0.0,
+        parallel: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        Args:
+            responses: Respuestas a reproducir en orden circular (None = fixture)
+            model: Nombre de modelo que se anuncia en /api/tags
+            prefill_rate: Tokens de prompt por segundo
+            decode_rate: Tokens generados por segundo
+            load_seconds: Carga en frío simulada en la primera generación
+            parallel: Generaciones simultáneas (None = sin límite)
+            host: Interfaz de escucha
+            port: Puerto (0 = libre)
+        """
+        if prefill_rate <= 0 or decode_rate <= 0:
+            raise ValueError("prefill_rate y decode_rate deben ser positivos")
+        self.responses = responses or load_responses()
+        self.model = model
+        self.prefill_rate = prefill_rate
+        self.decode_rate = decode_rate
+        self.load_seconds = load_seconds
+        self.parallel = parallel
+        self._slots = threading.Semaphore(parallel) if parallel else None
+
+        self._cycle = itertools.cycle(self.responses)
+        self._lock = threading.Lock()
+        self._loaded = load_seconds <= 0
+        self.stats = {'requests': 0, 'streamed': 0, 'aborted': 0, 'prompt_tokens': 0, 'generated_tokens': 0}
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeOllama':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeOllama':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def config(self) -> Dict:
+        """Parámetros de la simulación (para el reporte)"""
+        return {
+            'model': self.model,
+            'prefill_rate': self.prefill_rate,
+            'decode_rate': self.decode_rate,
+            'load_seconds': self.load_seconds,
+            'parallel': self.parallel,
+            'responses': len(self.responses)
+        }
+
+    # ==================== GENERACIÓN SIMULADA ====================
+
+    def _next_generation(self, payload: Dict):
+        """Elegir respuesta y calcular tiempos de carga, prefill y decode"""
+        prompt = _prompt_text(payload)
+        with self._lock:
+            self.stats['requests'] += 1
+            load = 0.0 if self._loaded else self.load_seconds
+            self._loaded = True
+            text = next(self._cycle) if prompt else ""
+
+        tokens = text.split(" ") if text else []
+        limit = (payload.get('options') or {}).get('num_predict')
+        if limit and limit > 0:
+            tokens = tokens[:limit]
+        tokens = [token if i == 0 else " " + token for i, token in enumerate(tokens)]
+
+        prompt_tokens = estimate_tokens(prompt)
+        with self._lock:
+            self.stats['prompt_tokens'] += prompt_tokens
+            self.stats['generated_tokens'] += len(tokens)
+        return load, prompt_tokens, tokens
+
+    def _chunk(self, payload: Dict, text: str, chat: bool, done: bool) -> Dict:
+        chunk = {
+            'model': payload.get('model', self.model),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'done': done
+        }
+        if chat:
+            chunk['message'] = {'role': 'assistant', 'content': text}
+        else:
+            chunk['response'] = text
+        return chunk
+
+    @staticmethod
+    def _durations(start: float, load: float, prefill: float, prompt_tokens: int, tokens: List[str]) -> Dict:
+        decode_end = time.perf_counter()
+        return {
+            'done_reason': 'stop',
+            'total_duration': int((decode_end - start) * 1e9),
+            'load_duration': int(load * 1e9),
+            'prompt_eval_count': prompt_tokens,
+            'prompt_eval_duration': int(prefill * 1e9),
+            'eval_count': len(tokens),
+            'eval_duration': int(max(decode_end - start - load - prefill, 0) * 1e9)
+        }
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, body: Dict, status: int = 200):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path in ('/api/tags', '/api/ps'):
+                    self._send_json({'models': [{'name': fake.model, 'model': fake.model}]})
+                else:
+                    self._send_json({'error': 'not found'}, status=404)
+
+            def do_POST(self):
+                if self.path not in ('/api/generate', '/api/chat'):
+                    self._send_json({'error': 'not found'}, status=404)
+                    return
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                chat = self.path == '/api/chat'
+                if fake._slots is None:
+                    self._generate(payload, chat)
+                    return
+                with fake._slots:
+                    self._generate(payload, chat)
+
+            def _generate(self, payload: Dict, chat: bool):
+                # Las duraciones no incluyen la espera en cola (igual que Ollama)
+                start = time.perf_counter()
+                load, prompt_tokens, tokens = fake._next_generation(payload)
+                prefill = prompt_tokens / fake.prefill_rate
+                time.sleep(load + prefill)
+
+                if not payload.get('stream', True):
+                    time.sleep(len(tokens) / fake.decode_rate)
+                    body = fake._chunk(payload, ''.join(tokens), chat, done=True)
+                    body.update(fake._durations(start, load, prefill, prompt_tokens, tokens))
+                    self._send_json(body)
+                    return
+
+                # Streaming NDJSON: la conexión se cierra al terminar (HTTP/1.0)
+                with fake._lock:
+                    fake.stats['streamed'] += 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.end_headers()
+                try:
+                    for token in tokens:
+                        time.sleep(1 / fake.decode_rate)
+                        self._write_line(fake._chunk(payload, token, chat, done=False))
+                    final = fake._chunk(payload, '', chat, done=True)
+                    final.update(fake._durations(start, load, prefill, prompt_tokens, tokens))
+                    self._write_line(final)
+                except (BrokenPipeError, ConnectionResetError):
+                    # El cliente canceló la generación
+                    with fake._lock:
+                        fake.stats['aborted'] += 1
+
+            def _write_line(self, chunk: Dict):
+                self.wfile.write(json.dumps(chunk).encode('utf-8') + b"\n")
+                self.wfile.flush()
+
+        return Handler
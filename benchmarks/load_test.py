@@ -0,0 +1,313 @@
+"""
+Generador de carga concurrente para la API REST
+
+Reproduce un corpus de consultas (lista JSON, texto plano o export del
+historial de la PWA) contra /api/v1/query (api/main.py) o /query y
+/search (api_rag_bpg.py).
+
+Modos:
+- Lazo abierto (--rates): llegadas Poisson a R consultas/s, independientes
+  de lo que tarde el servidor. La latencia se mide desde la llegada
+  programada, así que incluye la espera cuando todos los clientes están
+  ocupados (sin "coordinated omission").
+- Lazo cerrado (sin --rates): --concurrency clientes que envían la
+  siguiente consulta apenas reciben respuesta.
+
+Con varias tasas se imprime la curva de saturación: throughput logrado,
+percentiles y errores por tasa ofrecida.
+
+Uso (desde la raíz del proyecto, con la API corriendo):
+    python -m benchmarks.load_test --url http://localhost:8000 --rates 0.5 1 2 4
+    python -m benchmarks.load_test --corpus bpg-history-2025-11-01.json --concurrency 8
+    python -m benchmarks.load_test --target search --rates 10 50 100 --duration 20
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+
+# Agregar la raíz del proyecto al path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import requests
+
+from benchmarks.run_benchmarks import QUERIES_FILE
+from benchmarks.stats import summarize
+
+
+# Endpoint -> (método, ruta)
+TARGETS = {
+    'query': ("POST", "/api/v1/query"),        # api/main.py
+    'legacy-query': ("POST", "/query"),        # api_rag_bpg.py
+    'search': ("GET", "/search"),              # api_rag_bpg.py
+}
+
+
+def load_corpus(path: Path) -> List[str]:
+    """
+    Cargar consultas
+
+    Formatos aceptados:
+    - Export del historial de la PWA: lista de objetos con 'query'
+    - Lista JSON de strings
+    - Texto plano: una consulta por línea
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix != '.json':
+            queries = [line.strip() for line in f]
+        else:
+            records = json.load(f)
+            queries = [r.get('query', '') if isinstance(r, dict) else r for r in records]
+    queries = [q for q in queries if q and q.strip()]
+    if not queries:
+        raise ValueError(f"{path} no tiene consultas")
+    return queries
+
+
+def arrival_times(rate: float, duration: float, rng: random.Random) -> List[float]:
+    """Llegadas Poisson (intervalos exponenciales) en [0, duration)"""
+    times = []
+    t = rng.expovariate(rate)
+    while t < duration:
+        times.append(t)
+        t += rng.expovariate(rate)
+    return times
+
+
+def make_sender(base_url: str, target: str, k: int, strategy: Optional[str], timeout: float) -> Callable[[str], Optional[str]]:
+    """
+    Función consulta -> None si salió bien, o la clase de error
+    (una sesión HTTP por hilo)
+    """
+    method, route = TARGETS[target]
+    url = base_url.rstrip('/') + route
+    local = threading.local()
+
+    def send(query: str) -> Optional[str]:
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        try:
+            if target == 'search':
+                response = local.session.get(url, params={'query': query, 'k': k}, timeout=timeout)
+            elif target == 'legacy-query':
+                response = local.session.post(url, json={'pregunta': query, 'k': k}, timeout=timeout)
+            else:
+                payload = {'query': query, 'k': k}
+                if strategy:
+                    payload['strategy'] = strategy
+                response = local.session.post(url, json=payload, timeout=timeout)
+        except requests.Timeout:
+            return "timeout"
+        except requests.ConnectionError:
+            return "connection"
+        if response.status_code != 200:
+            return f"http_{response.status_code}"
+        if method == "POST" and response.json().get('success') is False:
+            return "success_false"
+        return None
+
+    return send
+
+
+# ==================== EJECUCIÓN ====================
+
+def _summarize_step(samples: List[Tuple[float, float, Optional[str]]], warmup: float) -> Dict:
+    """
+    samples: (inicio, latencia, error) de las consultas medidas
+
+    El throughput se calcula hasta la última respuesta: con el servidor
+    saturado las respuestas terminan después de la última llegada.
+    """
+    measured_seconds = max((start + latency for start, latency, _ in samples), default=warmup) - warmup
+    errors: Dict[str, int] = {}
+    latencies = []
+    for _, latency, error in samples:
+        if error:
+            errors[error] = errors.get(error, 0) + 1
+        else:
+            latencies.append(latency)
+    total = len(samples)
+    return {
+        'requests': total,
+        'throughput_qps': round(len(latencies) / measured_seconds, 3) if measured_seconds > 0 else None,
+        'error_rate': round((total - len(latencies)) / total, 4) if total else 0.0,
+        'errors': errors,
+        'latency': summarize(latencies)
+    }
+
+
+def run_open_loop(
+    send: Callable[[str], Optional[str]],
+    corpus: List[str],
+    rate: float,
+    duration: float,
+    concurrency: int,
+    warmup: float = 0.0,
+    seed: int = 0
+) -> Dict:
+    """
+    Lazo abierto: llegadas Poisson a `rate` consultas/s durante `duration` segundos
+
+    Las consultas que llegan en los primeros `warmup` segundos se envían
+    pero no se miden.
+    """
+    rng = random.Random(seed)
+    schedule = arrival_times(rate, duration, rng)
+    samples = []
+    lock = threading.Lock()
+    origin = time.perf_counter()
+
+    def fire(index: int, offset: float):
+        try:
+            error = send(corpus[index % len(corpus)])
+        except Exception as e:
+            error = type(e).__name__
+        # Latencia desde la llegada programada (incluye la espera por un cliente libre)
+        latency = time.perf_counter() - (origin + offset)
+        if offset >= warmup:
+            with lock:
+                samples.append((offset, latency, error))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index, offset in enumerate(schedule):
+            delay = origin + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, index, offset)
+
+    result = _summarize_step(samples, warmup)
+    result.update({'mode': 'open', 'offered_rate': rate, 'concurrency': concurrency})
+    return result
+
+
+def run_closed_loop(
+    send: Callable[[str], Optional[str]],
+    corpus: List[str],
+    concurrency: int,
+    duration: float,
+    warmup: float = 0.0
+) -> Dict:
+    """Lazo cerrado: `concurrency` clientes consultando sin pausa durante `duration` segundos"""
+    samples = []
+    lock = threading.Lock()
+    counter = iter(range(10 ** 9))
+    origin = time.perf_counter()
+    end = origin + duration
+
+    def client():
+        while True:
+            start = time.perf_counter()
+            if start >= end:
+                return
+            with lock:
+                index = next(counter)
+            try:
+                error = send(corpus[index % len(corpus)])
+            except Exception as e:
+                error = type(e).__name__
+            offset = start - origin
+            if offset >= warmup:
+                with lock:
+                    samples.append((offset, time.perf_counter() - start, error))
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    result = _summarize_step(samples, warmup)
+    result.update({'mode': 'closed', 'offered_rate': None, 'concurrency': concurrency})
+    return result
+
+
+def print_saturation_curve(steps: List[Dict]):
+    """Tabla tasa ofrecida vs throughput, percentiles y errores"""
+    print("\n📈 Curva de saturación")
+    print(f"   {'ofrecido':>9} {'logrado':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'errores':>8}")
+    for step in steps:
+        latency = step['latency']
+        offered = f"{step['offered_rate']:.2f}" if step['offered_rate'] else f"c={step['concurrency']}"
+        cells = [f"{latency[p]:.3f}s" if latency[p] is not None else "-" for p in ('p50', 'p95', 'p99')]
+        print(f"   {offered:>9} {step['throughput_qps'] or 0:>9.2f} "
+              f"{cells[0]:>8} {cells[1]:>8} {cells[2]:>8} {step['error_rate']:>8.1%}")
+        if step['errors']:
+            print(f"   {'':>9} ⚠️  {step['errors']}")
+
+
+def main(argv: Optional[List[str]] = None) -> List[Dict]:
+    parser = argparse.ArgumentParser(description="Generador de carga para la API RAG BPG")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL base de la API")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="query", help="Endpoint a cargar")
+    parser.add_argument("--corpus", type=Path, default=QUERIES_FILE,
+                        help="Consultas: JSON (lista o export del historial de la PWA) o texto plano")
+    parser.add_argument("--rates", type=float, nargs="*", default=None,
+                        help="Tasas de llegada (consultas/s) en lazo abierto; sin tasas = lazo cerrado")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes simultáneos máximos")
+    parser.add_argument("--duration", type=float, default=60.0, help="Segundos por tasa")
+    parser.add_argument("--warmup", type=float, default=10.0, help="Segundos iniciales no medidos")
+    parser.add_argument("--k", type=int, default=5, help="Documentos a recuperar")
+    parser.add_argument("--strategy", default=None, help="Estrategia de prompt (solo --target query)")
+    parser.add_argument("--timeout", type=float, default=180.0, help="Timeout HTTP por consulta")
+    parser.add_argument("--shuffle", action="store_true", help="Mezclar el corpus")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de llegadas y mezcla")
+    parser.add_argument("--output", type=Path, default=None, help="Guardar resultados en JSON")
+    args = parser.parse_args(argv)
+
+    if args.warmup >= args.duration:
+        parser.error("--warmup debe ser menor que --duration")
+
+    corpus = load_corpus(args.corpus)
+    if args.shuffle:
+        random.Random(args.seed).shuffle(corpus)
+    send = make_sender(args.url, args.target, args.k, args.strategy, args.timeout)
+
+    print(f"🎯 {args.target} en {args.url} | {len(corpus)} consultas | "
+          f"{args.duration:.0f}s por paso ({args.warmup:.0f}s de calentamiento)")
+
+    steps = []
+    for rate in args.rates or [None]:
+        if rate is None:
+            print(f"\n🔁 Lazo cerrado con {args.concurrency} clientes...")
+            step = run_closed_loop(send, corpus, args.concurrency, args.duration, args.warmup)
+        else:
+            print(f"\n🚀 Lazo abierto a {rate} consultas/s...")
+            step = run_open_loop(send, corpus, rate, args.duration, args.concurrency, args.warmup, args.seed)
+        steps.append(step)
+        print(f"   ✅ {step['requests']} consultas medidas, {step['throughput_qps']} consultas/s, "
+              f"errores {step['error_rate']:.1%}")
+
+    print_saturation_curve(steps)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'meta': {
+                    'url': args.url,
+                    'target': args.target,
+                    'corpus': str(args.corpus),
+                    'concurrency': args.concurrency,
+                    'duration': args.duration,
+                    'warmup': args.warmup,
+                    'timestamp': datetime.now().isoformat()
+                },
+                'steps': steps
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultados guardados en {args.output}")
+
+    return steps
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Micro-benchmarks de caminos calientes en Python puro
+
+Mide las funciones que corren en cada consulta o en cada ingesta con
+fixtures fijos tomados de data/processed/chunks.json, y las compara con
+baselines guardados en benchmarks/baselines/micro.json.
+
+Los tiempos se guardan relativos a una carga de referencia medida en la
+misma corrida (calibración), así el baseline sirve en otra máquina.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.micro                     # medir y comparar
+    python -m benchmarks.micro --update-baseline   # regrabar el baseline
+    BPG_BENCH=1 python -m pytest tests/test_micro_benchmarks.py
+
+Sin BPG_BENCH el pytest por defecto omite la comparación contra el
+baseline (los tiempos dependen de la máquina y de la carga).
+
+La tolerancia por defecto (50%) se puede cambiar con --tolerance o con la
+variable de entorno BPG_BENCH_TOLERANCE.
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+# Agregar la raíz del proyecto al path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from prompts.strategies import PromptFactory, PromptType
+from src.preprocessing.chunker import create_chunks_recursive
+from utils.context_builder import ContextBuilder, format_context_doc, join_context
+from utils.validators import ResponseValidator
+from utils.vocabulary_index import VocabularyIndex
+
+
+CHUNKS_FILE = PROJECT_ROOT / "data" / "processed" / "chunks.json"
+BASELINE_FILE = Path(__file__).parent / "baselines" / "micro.json"
+DEFAULT_TOLERANCE = float(os.environ.get("BPG_BENCH_TOLERANCE", 0.5))
+
+# Fixtures fijos: chunks recuperados (incluye dos consecutivos para la fusión)
+FIXTURE_CHUNKS = [0, 1, 12, 40, 60]
+FIXTURE_QUERY = "¿Cuáles son las buenas prácticas para el manejo del agua en feedlot?"
+FIXTURE_ANSWER = (
+    "Según los manuales BPG, el agua de bebida debe ser limpia, fresca y estar disponible "
+    "en forma permanente.\n\n"
+    "• Los bebederos se ubican lejos de los comederos para evitar que se contaminen.\n"
+    "• Se recomienda controlar la calidad del agua al menos una vez al año mediante "
+    "análisis físico-químico y bacteriológico.\n"
+    "• Es importante llevar registro de los resultados y de la limpieza de los bebederos."
+)
+
+
+def load_chunks() -> List[Dict]:
+    with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def fixture_docs(chunks: List[Dict]) -> List[Dict]:
+    """Chunks fijos en el formato de retrieve_documents"""
+    docs = []
+    for rank, index in enumerate(FIXTURE_CHUNKS, 1):
+        chunk = chunks[index]
+        docs.append({
+            'rank': rank,
+            'chunk_id': chunk['chunk_id'],
+            'text': chunk['text'],
+            'similarity': round(0.9 - rank * 0.05, 4),
+            'metadata': {'source': chunk['source'], 'chunk_number': chunk['chunk_number']}
+        })
+    return docs
+
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    """Caso -> función sin argumentos a medir"""
+    chunks = load_chunks()
+    source = chunks[0]['source']
+    # Documento de ingesta: los chunks de un manual como párrafos
+    document = "\n\n".join(c['text'] for c in chunks if c['source'] == source)
+    docs = fixture_docs(chunks)
+    context = join_context(docs)
+    validator = ResponseValidator()
+    vocabulary = VocabularyIndex.build(chunks)
+    builder = ContextBuilder(token_budget=4000, format_doc=format_context_doc)
+    strategies = [PromptFactory.get_strategy(prompt_type) for prompt_type in PromptType]
+
+    return {
+        'chunker.create_chunks_recursive': lambda: create_chunks_recursive(document),
+        'validators.validate_response': lambda: validator.validate_response(FIXTURE_ANSWER, context, FIXTURE_QUERY),
+        'validators.validate_response_indexed': lambda: validator.validate_response(
+            FIXTURE_ANSWER, context, FIXTURE_QUERY, context_words=vocabulary.context_words(docs)
+        ),
+        'prompts.build_all_strategies': lambda: [s.build(context, FIXTURE_QUERY) for s in strategies],
+        'context.join_context': lambda: join_context(docs),
+        'context.ContextBuilder.build': lambda: builder.build(docs),
+    }
+
+
+def _reference_workload(text: str = FIXTURE_ANSWER * 20) -> int:
+    """Carga de referencia en Python puro (strings y dicts) para calibrar"""
+    counts: Dict[str, int] = {}
+    for word in text.lower().split():
+        key = word.strip('.,:;•')
+        counts[key] = counts.get(key, 0) + 1
+    return len(counts)
+
+
+def measure(function: Callable[[], object], min_time: float = 0.05, repeats: int = 5) -> float:
+    """
+    Segundos por llamada: mínimo entre `repeats` tandas de al menos `min_time` segundos
+
+    El mínimo descarta las interrupciones del sistema operativo; el GC se
+    desactiva durante la medición (igual que timeit).
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _measure(function, min_time, repeats)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _measure(function: Callable[[], object], min_time: float, repeats: int) -> float:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def run(names: Optional[List[str]] = None) -> Dict:
+    """Medir la calibración y los casos (todos o los pedidos)"""
+    cases = build_cases()
+    results = {}
+    # La referencia se vuelve a medir junto a cada caso: el mínimo sigue
+    # los cambios de frecuencia de la CPU durante la corrida
+    calibration = measure(_reference_workload)
+    for name, function in cases.items():
+        if names and name not in names:
+            continue
+        seconds = measure(function)
+        reference = min(calibration, measure(_reference_workload))
+        calibration = reference
+        results[name] = {'seconds': seconds, 'relative': round(seconds / reference, 5)}
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'calibration_seconds': calibration,
+            'timestamp': datetime.now().isoformat()
+        },
+        'cases': results
+    }
+
+
+def median_run(runs: int = 3) -> Dict:
+    """Mediana por caso de varias corridas (para grabar un baseline estable)"""
+    results = [run() for _ in range(runs)]
+    merged = results[-1]
+    for name in merged['cases']:
+        ordered = sorted(r['cases'][name]['relative'] for r in results)
+        merged['cases'][name]['relative'] = ordered[len(ordered) // 2]
+    merged['meta']['runs'] = runs
+    return merged
+
+
+def load_baseline(path: Path = BASELINE_FILE) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def check(results: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Casos más lentos que el baseline más la tolerancia
+
+    Returns:
+        Descripción de cada regresión (vacía si no hay)
+    """
+    regressions = []
+    for name, base in baseline['cases'].items():
+        current = results['cases'].get(name)
+        if current is None:
+            continue
+        limit = base['relative'] * (1 + tolerance)
+        if current['relative'] > limit:
+            change = (current['relative'] / base['relative'] - 1) * 100
+            regressions.append(
+                f"{name}: {current['relative']:.3f} vs baseline {base['relative']:.3f} "
+                f"({change:+.0f}%, tolerancia {tolerance:.0%})"
+            )
+    return regressions
+
+
+def gate(baseline: Dict, tolerance: float = DEFAULT_TOLERANCE, retries: int = 2,
+         names: Optional[List[str]] = None):
+    """
+    Medir y comparar; los casos marcados se vuelven a medir antes de fallar
+
+    Returns:
+        (resultados, regresiones confirmadas)
+    """
+    results = run(names)
+    regressions = check(results, baseline, tolerance)
+    for _ in range(retries):
+        if not regressions:
+            break
+        suspects = [regression.split(':')[0] for regression in regressions]
+        retry = run(suspects)
+        for name in suspects:
+            if retry['cases'][name]['relative'] < results['cases'][name]['relative']:
+                results['cases'][name] = retry['cases'][name]
+        regressions = check(results, baseline, tolerance)
+    return results, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks con baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Guardar esta corrida como baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Regresión tolerada (0.5 = 50%%)")
+    parser.add_argument("--case", action="append", help="Medir solo estos casos")
+    args = parser.parse_args(argv)
+
+    if args.update_baseline and args.case:
+        parser.error("--update-baseline mide todos los casos (sin --case)")
+    baseline = load_baseline() if BASELINE_FILE.exists() else None
+    if args.update_baseline or baseline is None:
+        results, regressions = (median_run() if args.update_baseline else run(args.case)), []
+    else:
+        results, regressions = gate(baseline, args.tolerance, names=args.case)
+
+    print(f"\n⏱️  Calibración: {results['meta']['calibration_seconds'] * 1e6:.1f}µs")
+    for name, current in results['cases'].items():
+        base = (baseline or {}).get('cases', {}).get(name)
+        versus = f" (baseline {base['relative']:.3f})" if base else ""
+        print(f"   • {name:<38} {current['seconds'] * 1e6:10.1f}µs  relativo {current['relative']:.3f}{versus}")
+
+    if args.update_baseline:
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Baseline guardado en {BASELINE_FILE}")
+        return 0
+
+    if baseline is None:
+        print("\n⚠️  No hay baseline: ejecutar con --update-baseline")
+        return 0
+
+    if regressions:
+        print("\n❌ Regresiones:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+    print("\n✅ Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,437 @@
+"""
+Benchmark de calidad vs latencia del retrieval con un set dorado
+
+El set dorado (benchmarks/fixtures/golden_queries.json) son preguntas de
+productores con los chunk_id de data/processed/chunks.json que las
+responden y las frases de los manuales que contienen la respuesta
+(evidence). Las frases permiten evaluar otros chunkings, donde los
+chunk_id cambian (benchmarks/chunking_sweep.py). Cada backend disponible devuelve un ranking de chunk_id por
+pregunta y se reporta, lado a lado, recall@k, MRR y la latencia de la
+búsqueda.
+
+Backends:
+- chroma: índice HNSW de ChromaDB (el que usa RAGSystemBPG)
+- exact: coseno por fuerza bruta (numpy) sobre los mismos embeddings;
+  es la cota superior del índice aproximado
+- sentences: mejor oración de cada chunk según el índice de oraciones
+  (models/sentence_index)
+- lexical: BM25 sobre el texto de los chunks (no requiere modelos)
+
+Los backends densos necesitan chromadb y sentence-transformers; si no
+están instalados (o el índice no existe) se omiten con un aviso. El
+embedding de la pregunta se calcula una sola vez y se reporta aparte,
+así la latencia de cada backend es solo la de la búsqueda.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.retrieval_eval
+    python -m benchmarks.retrieval_eval --backend exact --backend lexical --k 1 5 10
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import argparse
+import json
+import math
+import re
+import sys
+import time
+import unicodedata
+
+# Agregar la raíz del proyecto al path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+
+from benchmarks.run_benchmarks import OUTPUT_DIR, git_commit
+from benchmarks.stats import summarize
+
+
+GOLDEN_FILE = Path(__file__).parent / "fixtures" / "golden_queries.json"
+CHUNKS_FILE = PROJECT_ROOT / "data" / "processed" / "chunks.json"
+DEFAULT_KS = (1, 3, 5, 10)
+
+# Búsqueda: (pregunta, embedding o None, k) -> chunk_id ordenados
+SearchFunction = Callable[[str, Optional[np.ndarray], int], List[str]]
+
+
+def normalize_id(chunk_id: str) -> str:
+    """chunk_id en forma NFC (los nombres de archivo pueden venir descompuestos)"""
+    return unicodedata.normalize('NFC', chunk_id)
+
+
+def normalize_text(text: str) -> str:
+    """Texto en NFC, minúsculas y con espacios colapsados (para buscar evidencias)"""
+    return ' '.join(unicodedata.normalize('NFC', text).lower().split())
+
+
+def load_chunks(path: Path = CHUNKS_FILE) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_golden(path: Path = GOLDEN_FILE, chunks: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    Cargar el set dorado: lista de {'query', 'evidence': [frase, ...], 'relevant': [chunk_id, ...]}
+
+    Args:
+        path: JSON del set dorado
+        chunks: Si se pasan, se verifica que cada chunk_id exista y que
+            cada evidencia aparezca en algún chunk
+
+    Raises:
+        ValueError: Si una pregunta no tiene relevantes o cita un chunk o una frase inexistente
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+
+    known = {normalize_id(c['chunk_id']) for c in chunks} if chunks is not None else None
+    for item in golden:
+        if not item.get('relevant'):
+            raise ValueError(f"Pregunta sin chunks relevantes: {item.get('query')!r}")
+        if known is not None:
+            missing = [c for c in item['relevant'] if normalize_id(c) not in known]
+            if missing:
+                raise ValueError(f"chunk_id inexistentes en {item['query']!r}: {missing}")
+            texts = [normalize_text(c['text']) for c in chunks]
+            for phrase in item.get('evidence', []):
+                if not any(normalize_text(phrase) in text for text in texts):
+                    raise ValueError(f"Evidencia no encontrada en los chunks: {phrase!r}")
+    return golden
+
+
+def chunk_texts(chunks: List[Dict]) -> Dict[str, str]:
+    """chunk_id -> texto normalizado (para evaluar por evidencias)"""
+    return {normalize_id(c['chunk_id']): normalize_text(c['text']) for c in chunks}
+
+
+def relevant_chunks(evidence: Sequence[str], texts: Dict[str, str]) -> List[str]:
+    """chunk_id que contienen alguna de las frases de evidencia"""
+    phrases = [normalize_text(phrase) for phrase in evidence]
+    return [chunk_id for chunk_id, text in texts.items() if any(p in text for p in phrases)]
+
+
+# ==================== MÉTRICAS ====================
+
+def recall_at_k(retrieved: Sequence[str], relevant: Iterable[str], k: int) -> float:
+    """Fracción de los chunks relevantes que aparecen entre los primeros k"""
+    relevant = {normalize_id(c) for c in relevant}
+    if not relevant:
+        return 0.0
+    found = relevant.intersection(normalize_id(c) for c in retrieved[:k])
+    return len(found) / len(relevant)
+
+
+def evidence_recall_at_k(retrieved: Sequence[str], evidence: Sequence[str], texts: Dict[str, str], k: int) -> float:
+    """
+    Fracción de las frases de evidencia contenidas en los primeros k chunks
+
+    No depende de los chunk_id ni de cuántos chunks repiten la misma frase
+    por el overlap, así que compara chunkings distintos.
+    """
+    if not evidence:
+        return 0.0
+    window = [texts.get(normalize_id(c), '') for c in retrieved[:k]]
+    found = sum(1 for phrase in evidence if any(normalize_text(phrase) in text for text in window))
+    return found / len(evidence)
+
+
+def reciprocal_rank(retrieved: Sequence[str], relevant: Iterable[str]) -> float:
+    """1 / posición del primer chunk relevante (0 si no aparece)"""
+    relevant = {normalize_id(c) for c in relevant}
+    for position, chunk_id in enumerate(retrieved, 1):
+        if normalize_id(chunk_id) in relevant:
+            return 1 / position
+    return 0.0
+
+
+def evaluate(
+    search: SearchFunction,
+    golden: List[Dict],
+    ks: Sequence[int] = DEFAULT_KS,
+    embeddings: Optional[List[np.ndarray]] = None,
+    texts: Optional[Dict[str, str]] = None
+) -> Dict:
+    """
+    Correr el set dorado contra una búsqueda
+
+    Se pide una sola vez el ranking de max(ks) chunks por pregunta y el
+    recall de cada k se calcula sobre sus prefijos.
+
+    Args:
+        search: Función de búsqueda del backend
+        golden: Set dorado (load_golden)
+        ks: Valores de k a reportar
+        embeddings: Embedding precalculado de cada pregunta (None = sin embeddings)
+        texts: chunk_texts() del chunking evaluado; si se pasa, la relevancia
+            sale de las evidencias y no de los chunk_id del set dorado
+
+    Returns:
+        {'recall': {k: media}, 'mrr': media, 'latency': summarize, 'misses': preguntas sin aciertos}
+    """
+    depth = max(ks)
+    recalls = {k: [] for k in ks}
+    reciprocal_ranks = []
+    latencies = []
+    misses = []
+
+    for index, item in enumerate(golden):
+        embedding = embeddings[index] if embeddings is not None else None
+        start = time.perf_counter()
+        retrieved = search(item['query'], embedding, depth)
+        latencies.append(time.perf_counter() - start)
+
+        if texts is None:
+            relevant = item['relevant']
+            for k in ks:
+                recalls[k].append(recall_at_k(retrieved, relevant, k))
+        else:
+            relevant = relevant_chunks(item['evidence'], texts)
+            for k in ks:
+                recalls[k].append(evidence_recall_at_k(retrieved, item['evidence'], texts, k))
+        rank = reciprocal_rank(retrieved, relevant)
+        reciprocal_ranks.append(rank)
+        if rank == 0:
+            misses.append(item['query'])
+
+    return {
+        'recall': {k: round(sum(values) / len(values), 4) for k, values in recalls.items()},
+        'mrr': round(sum(reciprocal_ranks) / len(reciprocal_ranks), 4),
+        'latency': summarize(latencies),
+        'misses': misses
+    }
+
+
+# ==================== BACKENDS ====================
+
+STOPWORDS = frozenset(
+    "a al como con cual cuales de del el en es la las lo los para por que qué se su sus un una y o "
+    "hay debe deben tengo tiene tienen hago hace cómo cuándo dónde cuál cuáles".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Palabras en minúsculas sin stopwords"""
+    return [w for w in re.findall(r'\w+', text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+class LexicalIndex:
+    """BM25 en Python puro sobre el texto de los chunks (línea de base sin modelos)"""
+
+    def __init__(self, chunks: List[Dict], k1: float = 1.5, b: float = 0.75):
+        self.chunk_ids = [c['chunk_id'] for c in chunks]
+        self.k1 = k1
+        self.b = b
+        self.term_counts: List[Dict[str, int]] = []
+        self.lengths: List[int] = []
+        document_frequency: Dict[str, int] = {}
+        for chunk in chunks:
+            counts: Dict[str, int] = {}
+            for word in tokenize(chunk['text']):
+                counts[word] = counts.get(word, 0) + 1
+            self.term_counts.append(counts)
+            self.lengths.append(sum(counts.values()))
+            for word in counts:
+                document_frequency[word] = document_frequency.get(word, 0) + 1
+
+        total = len(chunks)
+        self.average_length = sum(self.lengths) / total if total else 0.0
+        self.idf = {
+            word: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for word, df in document_frequency.items()
+        }
+
+    def search(self, query: str, query_embedding: Optional[np.ndarray], k: int) -> List[str]:
+        words = [w for w in tokenize(query) if w in self.idf]
+        scores = []
+        for index, counts in enumerate(self.term_counts):
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / self.average_length)
+            score = 0.0
+            for word in words:
+                tf = counts.get(word, 0)
+                if tf:
+                    score += self.idf[word] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((score, index))
+        scores.sort(reverse=True)
+        return [self.chunk_ids[index] for _, index in scores[:k]]
+
+
+class ExactIndex:
+    """Coseno por fuerza bruta sobre una matriz de embeddings"""
+
+    def __init__(self, chunk_ids: List[str], embeddings):
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.chunk_ids = list(chunk_ids)
+        self.matrix = matrix / np.where(norms > 0, norms, 1)
+
+    def search(self, query: str, query_embedding: np.ndarray, k: int) -> List[str]:
+        scores = self.matrix @ _unit(query_embedding)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.chunk_ids[i] for i in top]
+
+
+class SentenceMaxIndex:
+    """Chunks ordenados por su oración más similar (utils.sentence_index)"""
+
+    def __init__(self, sentence_index):
+        self.index = sentence_index
+        self.chunk_ids = list(sentence_index.offsets)
+        position = {chunk_id: i for i, chunk_id in enumerate(self.chunk_ids)}
+        self.owner = np.array([position[c] for c in sentence_index.chunk_ids], dtype=np.int64)
+
+    def search(self, query: str, query_embedding: np.ndarray, k: int) -> List[str]:
+        scores = self.index.embeddings @ _unit(query_embedding)
+        best = np.full(len(self.chunk_ids), -np.inf, dtype=np.float32)
+        np.maximum.at(best, self.owner, scores)
+        top = np.argsort(-best)[:k]
+        return [self.chunk_ids[i] for i in top]
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def chroma_search(collection) -> SearchFunction:
+    """Búsqueda en la colección ChromaDB (mismo llamado que retrieve_documents)"""
+    def search(query: str, query_embedding: np.ndarray, k: int) -> List[str]:
+        results = collection.query(query_embeddings=[query_embedding.tolist()], n_results=k, include=['distances'])
+        return results['ids'][0]
+    return search
+
+
+BACKENDS = ('chroma', 'exact', 'sentences', 'lexical')
+DENSE_BACKENDS = ('chroma', 'exact', 'sentences')
+
+
+def load_backends(names: Sequence[str], chunks: List[Dict], config) -> Tuple[Dict[str, SearchFunction], Optional[object]]:
+    """
+    Construir los backends pedidos que estén disponibles
+
+    Args:
+        names: Backends a construir (subconjunto de BACKENDS)
+        chunks: Chunks de data/processed/chunks.json
+        config: RAGConfig con rutas de ChromaDB, modelo e índice de oraciones
+
+    Returns:
+        (nombre -> búsqueda, modelo de embeddings o None)
+    """
+    backends: Dict[str, SearchFunction] = {}
+    if 'lexical' in names:
+        backends['lexical'] = LexicalIndex(chunks).search
+
+    dense = [name for name in names if name in DENSE_BACKENDS]
+    if not dense:
+        return backends, None
+
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        print(f"⚠️  sentence-transformers no instalado: se omiten {', '.join(dense)}")
+        return backends, None
+    model = SentenceTransformer(config.embedding_model)
+
+    if 'chroma' in dense or 'exact' in dense:
+        try:
+            import chromadb
+            client = chromadb.PersistentClient(path=config.chroma_db_path)
+            collection = client.get_collection(name=config.collection_name)
+        except Exception as e:
+            print(f"⚠️  ChromaDB no disponible ({e}): se omiten chroma y exact")
+        else:
+            if 'chroma' in dense:
+                backends['chroma'] = chroma_search(collection)
+            if 'exact' in dense:
+                stored = collection.get(include=['embeddings'])
+                backends['exact'] = ExactIndex(stored['ids'], stored['embeddings']).search
+
+    if 'sentences' in dense:
+        from utils.sentence_index import SentenceIndex
+        try:
+            backends['sentences'] = SentenceMaxIndex(SentenceIndex.load(config.sentence_index_path)).search
+        except FileNotFoundError:
+            print(f"⚠️  Índice de oraciones no encontrado en {config.sentence_index_path}: se omite sentences")
+
+    return backends, model
+
+
+# ==================== REPORTE ====================
+
+def print_comparison(results: Dict[str, Dict], ks: Sequence[int]):
+    """Tabla backend vs recall@k, MRR y latencia"""
+    recall_headers = ''.join(f"{'R@' + str(k):>7}" for k in ks)
+    print(f"\n📊 Retrieval: calidad vs latencia")
+    print(f"   {'backend':<10}{recall_headers}{'MRR':>7}{'p50':>10}{'p95':>10}")
+    for name, result in results.items():
+        recalls = ''.join(f"{result['recall'][k]:>7.3f}" for k in ks)
+        latency = result['latency']
+        print(f"   {name:<10}{recalls}{result['mrr']:>7.3f}"
+              f"{latency['p50'] * 1000:>8.2f}ms{latency['p95'] * 1000:>8.2f}ms")
+    for name, result in results.items():
+        if result['misses']:
+            print(f"\n   ⚠️  {name}: {len(result['misses'])} preguntas sin ningún chunk relevante en el top {max(ks)}")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Recall@k, MRR y latencia del retrieval con el set dorado")
+    parser.add_argument("--golden", type=Path, default=GOLDEN_FILE, help="JSON del set dorado")
+    parser.add_argument("--backend", action="append", choices=BACKENDS, help="Backends a medir (por defecto todos)")
+    parser.add_argument("--k", type=int, nargs="+", default=list(DEFAULT_KS), help="Valores de k")
+    parser.add_argument("--output", type=Path, default=None, help="Archivo del reporte JSON")
+    args = parser.parse_args(argv)
+
+    from config.settings import RAGConfig
+
+    config = RAGConfig()
+    chunks = load_chunks()
+    golden = load_golden(args.golden, chunks)
+    ks = sorted(set(args.k))
+    backends, model = load_backends(args.backend or BACKENDS, chunks, config)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(),
+            'golden': str(args.golden),
+            'queries': len(golden),
+            'chunks': len(chunks),
+            'ks': ks,
+            'embedding_model': config.embedding_model if model is not None else None
+        },
+        'results': {}
+    }
+
+    embeddings = None
+    if model is not None:
+        # El embedding de la pregunta es común a los backends densos: se mide aparte
+        embeddings, encode_seconds = [], []
+        for item in golden:
+            start = time.perf_counter()
+            embeddings.append(model.encode([item['query']])[0])
+            encode_seconds.append(time.perf_counter() - start)
+        report['meta']['embedding_latency'] = summarize(encode_seconds)
+        print(f"🔢 Embedding de la pregunta: p50 {report['meta']['embedding_latency']['p50'] * 1000:.1f}ms")
+
+    for name, search in backends.items():
+        print(f"🔍 {name}...")
+        report['results'][name] = evaluate(search, golden, ks, embeddings if name in DENSE_BACKENDS else None)
+
+    print_comparison(report['results'], ks)
+
+    output = args.output or OUTPUT_DIR / f"retrieval_{datetime.now():%Y%m%d_%H%M%S}_{report['meta']['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Reporte guardado en {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Suite de benchmarks end-to-end contra un Ollama simulado
+
+Levanta benchmarks.fake_ollama.FakeOllama y mide RAGSystemBPG.query y la API
+FastAPI (/api/v1/query) con distintos niveles de concurrencia. El reporte
+JSON (throughput, p50/p95/p99 y desglose por etapa) permite comparar
+commits: la velocidad del "LLM" es fija, así que las diferencias vienen
+del código.
+
+Requiere la base ChromaDB indexada (models/chroma_db) y el modelo de
+embeddings, igual que el sistema real.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --concurrency 1 4 8 --repeat 3
+    python -m benchmarks.run_benchmarks --compare outputs/benchmarks/base.json
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+# Agregar la raíz del proyecto al path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import requests
+
+from benchmarks.fake_ollama import FakeOllama, load_responses, RESPONSES_FILE
+from benchmarks.stats import stage_breakdown, summarize
+from utils.extractive import EXTRACTIVE_STRATEGY
+
+
+QUERIES_FILE = Path(__file__).parent / "fixtures" / "queries.json"
+OUTPUT_DIR = PROJECT_ROOT / "outputs" / "benchmarks"
+
+# Métricas comparadas con --compare: (ruta en el escenario, menor es mejor)
+COMPARED_METRICS = [
+    (('latency', 'p50'), True),
+    (('latency', 'p95'), True),
+    (('latency', 'p99'), True),
+    (('throughput_qps',), False),
+]
+
+
+def load_queries(path: Path = QUERIES_FILE) -> List[str]:
+    """Cargar consultas (lista JSON de strings)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def git_commit() -> Optional[str]:
+    """Commit actual (para identificar el reporte)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ==================== EJECUCIÓN DE ESCENARIOS ====================
+
+def run_scenario(
+    name: str,
+    send: Callable[[str], Dict],
+    queries: List[str],
+    concurrency: int,
+    repeat: int = 1,
+    warmup: int = 2
+) -> Dict:
+    """
+    Ejecutar las consultas con N hilos y resumir
+
+    Args:
+        name: Nombre del escenario ("rag", "api")
+        send: Función consulta -> {'ok', 'degraded', 'timings', 'prompt_tokens', 'generated_tokens'}
+        queries: Consultas a enviar
+        concurrency: Consultas simultáneas
+        repeat: Veces que se recorre la lista de consultas
+        warmup: Consultas iniciales que no se miden
+
+    Returns:
+        Resumen del escenario
+    """
+    for query in queries[:warmup]:
+        send(query)
+
+    def timed(query: str) -> Dict:
+        start = time.perf_counter()
+        try:
+            outcome = send(query)
+        except Exception as e:
+            outcome = {'ok': False, 'error': str(e)}
+        outcome['latency'] = time.perf_counter() - start
+        return outcome
+
+    items = queries * repeat
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, items))
+    wall = time.perf_counter() - start
+
+    succeeded = [o for o in outcomes if o['ok']]
+    errors = len(outcomes) - len(succeeded)
+    generated = sum(o.get('generated_tokens') or 0 for o in succeeded)
+    return {
+        'name': name,
+        'concurrency': concurrency,
+        'requests': len(outcomes),
+        'errors': errors,
+        'error_rate': round(errors / len(outcomes), 4) if outcomes else 0.0,
+        'degraded': sum(1 for o in succeeded if o.get('degraded')),
+        'wall_seconds': round(wall, 3),
+        'throughput_qps': round(len(succeeded) / wall, 3) if wall > 0 else None,
+        'latency': summarize([o['latency'] for o in succeeded]),
+        'stages': stage_breakdown([o.get('timings') for o in succeeded]),
+        'tokens': {
+            'prompt': sum(o.get('prompt_tokens') or 0 for o in succeeded),
+            'generated': generated,
+            'generated_per_sec': round(generated / wall, 2) if wall > 0 else None
+        }
+    }
+
+
+def rag_sender(rag, k: int, strategy: Optional[str]) -> Callable[[str], Dict]:
+    """Consultas directas a RAGSystemBPG.query"""
+    def send(query: str) -> Dict:
+        result = rag.query(query, k=k, strategy=strategy, verbose=False)
+        return {
+            'ok': result.get('success', False),
+            'degraded': bool(result.get('fallback_reason')),
+            'timings': result.get('timings'),
+            'prompt_tokens': result.get('prompt_eval_count'),
+            'generated_tokens': result.get('eval_count')
+        }
+    return send
+
+
+def api_sender(base_url: str, k: int, strategy: Optional[str]) -> Callable[[str], Dict]:
+    """Consultas HTTP a /api/v1/query (una sesión por hilo)"""
+    local = threading.local()
+
+    def send(query: str) -> Dict:
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        payload = {'query': query, 'k': k}
+        if strategy:
+            payload['strategy'] = strategy
+        response = local.session.post(f"{base_url}/api/v1/query", json=payload, timeout=300)
+        if response.status_code != 200:
+            return {'ok': False, 'error': f"HTTP {response.status_code}"}
+        body = response.json()
+        usage = body.get('token_usage') or {}
+        return {
+            'ok': body.get('success', False),
+            'degraded': body.get('model') == 'extractive' and strategy != EXTRACTIVE_STRATEGY,
+            'timings': body.get('timings'),
+            'prompt_tokens': usage.get('prompt_tokens'),
+            'generated_tokens': usage.get('generated_tokens')
+        }
+    return send
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ApiServer:
+    """API FastAPI (router de api/endpoints.py) servida con uvicorn en un hilo"""
+
+    def __init__(self, rag):
+        import uvicorn
+        from fastapi import FastAPI
+        from api.endpoints import router, set_rag_system
+
+        set_rag_system(rag)
+        app = FastAPI()
+        app.include_router(router, prefix="/api/v1")
+        self.port = _free_port()
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        )
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> 'ApiServer':
+        self._thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+# ==================== REPORTE ====================
+
+def _metric(scenario: Dict, path) -> Optional[float]:
+    value = scenario
+    for key in path:
+        value = (value or {}).get(key)
+    return value
+
+
+def compare_reports(report: Dict, baseline: Dict) -> List[str]:
+    """Líneas con la variación de cada métrica respecto de un reporte anterior"""
+    previous = {(s['name'], s['concurrency']): s for s in baseline.get('scenarios', [])}
+    lines = []
+    for scenario in report['scenarios']:
+        base = previous.get((scenario['name'], scenario['concurrency']))
+        if not base:
+            continue
+        parts = []
+        for path, lower_is_better in COMPARED_METRICS:
+            new, old = _metric(scenario, path), _metric(base, path)
+            if not new or not old:
+                continue
+            change = (new - old) / old * 100
+            better = change < 0 if lower_is_better else change > 0
+            mark = "🟢" if better or abs(change) < 2 else "🔴"
+            parts.append(f"{'.'.join(path)} {old:.3f} → {new:.3f} ({change:+.1f}%) {mark}")
+        lines.append(f"{scenario['name']} c={scenario['concurrency']}: " + " | ".join(parts))
+    return lines
+
+
+def print_scenario(scenario: Dict):
+    latency = scenario['latency']
+    print(f"\n📊 {scenario['name']} (concurrencia {scenario['concurrency']}): "
+          f"{scenario['throughput_qps']} consultas/s, errores {scenario['error_rate']:.1%}")
+    if latency['count']:
+        print(f"   ⏱️  p50 {latency['p50']:.3f}s | p95 {latency['p95']:.3f}s | p99 {latency['p99']:.3f}s")
+    for stage, summary in scenario['stages'].items():
+        print(f"   • {stage:<18} p50 {summary['p50'] * 1000:8.1f}ms | p95 {summary['p95'] * 1000:8.1f}ms")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Benchmarks end-to-end con Ollama simulado")
+    parser.add_argument("--queries", type=Path, default=QUERIES_FILE, help="JSON con la lista de consultas")
+    parser.add_argument("--responses", type=Path, default=RESPONSES_FILE, help="JSON con respuestas grabadas")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="Niveles de concurrencia")
+    parser.add_argument("--repeat", type=int, default=1, help="Veces que se recorre la lista de consultas")
+    parser.add_argument("--warmup", type=int, default=2, help="Consultas de calentamiento no medidas")
+    parser.add_argument("--k", type=int, default=5, help="Documentos a recuperar")
+    parser.add_argument("--strategy", default=None, help="Estrategia de prompt (por defecto la de config)")
+    parser.add_argument("--prefill-rate", type=float, default=1500.0, help="Tokens de prompt por segundo")
+    parser.add_argument("--decode-rate", type=float, default=30.0, help="Tokens generados por segundo")
+    parser.add_argument("--parallel", type=int, default=1, help="Slots de Ollama (0 = sin límite)")
+    parser.add_argument("--validation", action="store_true", help="Activar la validación de respuestas")
+    parser.add_argument("--skip-api", action="store_true", help="No medir la API HTTP")
+    parser.add_argument("--output", type=Path, default=None, help="Archivo del reporte JSON")
+    parser.add_argument("--compare", type=Path, default=None, help="Reporte anterior para comparar")
+    args = parser.parse_args(argv)
+
+    from config.settings import RAGConfig
+    from rag_bpg_ollama import RAGSystemBPG
+
+    queries = load_queries(args.queries)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'queries': len(queries),
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+            'k': args.k,
+            'strategy': args.strategy,
+            'validation': args.validation
+        },
+        'scenarios': []
+    }
+
+    with FakeOllama(
+        responses=load_responses(args.responses),
+        prefill_rate=args.prefill_rate,
+        decode_rate=args.decode_rate,
+        parallel=args.parallel or None
+    ) as fake:
+        report['meta']['fake_ollama'] = fake.config()
+        config = RAGConfig(
+            ollama_base_url=fake.url,
+            ollama_model=fake.model,
+            enable_validation=args.validation,
+            enable_coalescing=False,  # medir cada consulta, no el resultado compartido
+            answer_cache_size=0,
+            verbose=False
+        )
+        rag = RAGSystemBPG(config=config)
+        try:
+            for concurrency in args.concurrency:
+                scenario = run_scenario(
+                    "rag", rag_sender(rag, args.k, args.strategy), queries,
+                    concurrency, args.repeat, args.warmup
+                )
+                report['scenarios'].append(scenario)
+                print_scenario(scenario)
+
+            if not args.skip_api:
+                with ApiServer(rag) as api:
+                    for concurrency in args.concurrency:
+                        scenario = run_scenario(
+                            "api", api_sender(api.url, args.k, args.strategy), queries,
+                            concurrency, args.repeat, args.warmup
+                        )
+                        report['scenarios'].append(scenario)
+                        print_scenario(scenario)
+        finally:
+            rag.shutdown()
+
+    output = args.output or OUTPUT_DIR / f"benchmark_{datetime.now():%Y%m%d_%H%M%S}_{report['meta']['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Reporte guardado en {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n🔁 Comparación con {args.compare} ({baseline['meta'].get('commit')})")
+        for line in compare_reports(report, baseline):
+            print(f"   {line}")
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Estadísticas de latencia para los benchmarks (percentiles y desglose por etapa)
+"""
+
+from typing import Dict, Iterable, List, Optional
+import math
+
+
+def percentile(values: Iterable[float], p: float) -> Optional[float]:
+    """
+    Percentil con interpolación lineal (igual que numpy.percentile por defecto)
+
+    Args:
+        values: Muestras
+        p: Percentil entre 0 y 100
+
+    Returns:
+        Valor del percentil, o None si no hay muestras
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * p / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: List[float]) -> Dict:
+    """Conteo, media, p50/p95/p99 y máximo (segundos, redondeados a ms)"""
+    def _round(value):
+        return round(value, 4) if value is not None else None
+
+    return {
+        'count': len(values),
+        'mean': _round(sum(values) / len(values)) if values else None,
+        'p50': _round(percentile(values, 50)),
+        'p95': _round(percentile(values, 95)),
+        'p99': _round(percentile(values, 99)),
+        'max': _round(max(values)) if values else None
+    }
+
+
+def stage_breakdown(timings: List[Dict[str, float]]) -> Dict[str, Dict]:
+    """
+    Resumen por etapa de los 'timings' de cada consulta
+
+    Args:
+        timings: Un dict etapa -> segundos por consulta
+
+    Returns:
+        etapa -> resumen (mismo formato que summarize)
+    """
+    by_stage: Dict[str, List[float]] = {}
+    for entry in timings:
+        for stage, seconds in (entry or {}).items():
+            by_stage.setdefault(stage, []).append(seconds)
+    return {stage: summarize(values) for stage, values in by_stage.items()}
@@ -0,0 +1,115 @@
+"""
+Validación offline de respuestas históricas
+
+Lee un JSONL con un objeto por respuesta ({"response", "context", "query"}
+y opcionalmente "id"), las valida en lote con utils/batch_validation.py
+y guarda el resultado de cada una (JSONL o Parquet) más un resumen JSON
+con la tasa de aprobación de cada chequeo.
+
+Parquet requiere pyarrow (opcional).
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.validate_answers respuestas.jsonl
+    python -m benchmarks.validate_answers respuestas.jsonl --workers 4 --format parquet
+    python -m benchmarks.validate_answers respuestas.jsonl --strict
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import json
+import sys
+import time
+
+# Agregar la raíz del proyecto al path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.run_benchmarks import OUTPUT_DIR, git_commit
+from utils.batch_validation import summarize, validate_batch, write_jsonl, write_parquet
+
+
+def load_items(path: Path) -> List[Dict]:
+    """Leer el JSONL de entrada (se ignoran las líneas vacías)"""
+    items = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if 'response' not in item:
+                raise ValueError(f"{path}:{number}: falta 'response'")
+            items.append(item)
+    return items
+
+
+def print_summary(summary: Dict):
+    print(f"\n📊 {summary['items']} respuestas | válidas {summary['valid_rate']:.1%} | "
+          f"score promedio {summary['mean_score']:.1%}")
+    for check, rate in sorted(summary['pass_rate'].items(), key=lambda item: item[1]):
+        print(f"   {check:<24} {rate:>7.1%}")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Validar en lote respuestas (response, context, query)")
+    parser.add_argument("input", type=Path, help="JSONL con un objeto por respuesta")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos en paralelo")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl", help="Formato de los resultados por respuesta")
+    parser.add_argument("--strict", action="store_true", help="Modo estricto del validador")
+    parser.add_argument("--output", type=Path, default=None, help="Archivo de resultados por respuesta")
+    args = parser.parse_args(argv)
+
+    from config.settings import RAGConfig
+
+    config = RAGConfig()
+    items = load_items(args.input)
+    print(f"🔍 {len(items)} respuestas de {args.input} | {args.workers} proceso(s)")
+
+    start = time.perf_counter()
+    results = validate_batch(
+        items,
+        min_length=config.min_answer_length,
+        max_length=config.max_answer_length,
+        strict_mode=args.strict,
+        workers=args.workers
+    )
+    seconds = time.perf_counter() - start
+    print(f"⏱️  Validadas en {seconds:.2f}s ({len(items) / seconds if seconds else 0:.0f} respuestas/s)")
+
+    summary = summarize(results)
+    print_summary(summary)
+
+    commit = git_commit()
+    output = args.output or OUTPUT_DIR / f"validation_{datetime.now():%Y%m%d_%H%M%S}_{commit or 'nogit'}.{args.format}"
+    if args.format == "parquet":
+        try:
+            write_parquet(results, output)
+        except ImportError as e:
+            parser.error(str(e))
+    else:
+        write_jsonl(results, output)
+
+    report = {
+        'meta': {
+            'commit': commit,
+            'timestamp': datetime.now().isoformat(),
+            'input': str(args.input),
+            'strict_mode': args.strict,
+            'workers': args.workers,
+            'seconds': round(seconds, 3),
+            'results_file': str(output)
+        },
+        'summary': summary
+    }
+    summary_file = output.with_name(output.stem + "_summary.json")
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados en {output}")
+    print(f"💾 Resumen en {summary_file}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
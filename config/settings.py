@@ -4,7 +4,7 @@ Este archivo centraliza todos los parámetros configurables
 """
 
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from enum import Enum
 
 
@@ -34,20 +34,67 @@ class RAGConfig:
     ollama_base_url: str = "http://localhost:11434"
     ollama_model: str = "llama3.1:8b"
     ollama_timeout: int = 120  # segundos
+    ollama_keep_alive: str = "30m"  # tiempo que Ollama mantiene el modelo cargado
+    ollama_warmup_on_start: bool = True  # pre-cargar el modelo al iniciar
+    ollama_keeper_enabled: bool = False  # refrescar el modelo en segundo plano
+    ollama_keeper_interval: int = 240  # segundos entre refrescos
+    ollama_keeper_hours: Tuple[int, int] = (7, 19)  # horario laboral (inicio, fin)
+    ollama_cold_load_threshold: float = 1.0  # segundos de carga = carga en frío
+    # Pool de backends: [{"url": ..., "weight": 1, "max_concurrency": 1}] (None = solo ollama_base_url)
+    ollama_backends: Optional[List[Dict]] = None
+    ollama_eject_after: int = 3  # fallas seguidas que sacan un backend de rotación
+    ollama_eject_seconds: float = 30.0  # tiempo mínimo fuera de rotación
+    ollama_hedging: bool = False  # duplicar en otro backend si el primer token se demora
+    ollama_hedge_percentile: float = 95.0  # percentil del tiempo al primer token usado como demora
+    ollama_hedge_min_delay: float = 0.5  # demora mínima antes de duplicar (segundos)
     
     # ==================== Retrieval ====================
     default_k: int = 5  # número de documentos a recuperar
     min_similarity: float = 0.0  # similaridad mínima (0-1)
     
+    # ==================== Contexto ====================
+    enable_context_builder: bool = True  # de-duplicar overlap y fusionar chunks consecutivos
+    context_token_budget: int = 4000  # tokens máximos del contexto recuperado
+    enable_compression: bool = False  # conservar solo las oraciones relevantes de cada chunk
+    sentence_index_path: str = "models/sentence_index"  # embeddings de oraciones precalculados
+    compression_top_sentences: int = 8  # oraciones más similares a conservar
+    compression_neighbors: int = 1  # oraciones vecinas a conservar a cada lado
+    vocabulary_index_path: str = "models/vocabulary_index"  # palabras significativas de cada chunk (validación)
+    
     # ==================== Generation ====================
     default_temperature: float = 0.7  # creatividad del modelo (0-1)
     default_max_tokens: int = 500  # máximo tokens en respuesta
-    prompt_strategy: str = "standard"  # estrategia de prompt a usar
+    prompt_strategy: str = "standard"  # estrategia de prompt a usar ("extractive" = sin LLM)
+    extractive_fallback: bool = True  # responder en modo extractivo si Ollama falla
+    extractive_max_sentences: int = 5  # viñetas en respuestas extractivas
+    prompt_layout: str = "inline"  # "inline" (/api/generate) o "chat" (prefijo estable en /api/chat)
+    enable_num_ctx_sizing: bool = True  # calcular num_ctx según el tamaño del prompt
+    num_ctx_buckets: Tuple[int, ...] = (2048, 4096, 8192)  # tamaños de contexto permitidos
+    num_ctx_initial: Optional[int] = None  # num_ctx al pre-cargar (None = el bucket más chico)
+    num_ctx_sticky: bool = False  # no bajar de bucket (menos recargas del modelo, más KV cache)
+    
+    # ==================== Resiliencia ====================
+    circuit_failure_threshold: int = 5  # fallas seguidas que abren el circuito
+    circuit_slow_call_seconds: float = 60.0  # respuestas más lentas cuentan como falla
+    circuit_probe_interval: float = 15.0  # segundos entre sondeos con el circuito abierto
+    answer_cache_size: int = 256  # respuestas guardadas para modo degradado (0 = sin caché)
+    answer_cache_ttl: int = 86400  # segundos de validez de una respuesta en caché
+    enable_coalescing: bool = True  # consultas idénticas en curso comparten el resultado
+    health_check_interval: float = 10.0  # segundos entre verificaciones de salud en segundo plano
+    health_max_age: float = 30.0  # antigüedad máxima del estado cacheado para estar "ready"
     
     # ==================== Validación ====================
     enable_validation: bool = False  # activar validación de respuestas
     min_answer_length: int = 50  # longitud mínima de respuesta
     max_answer_length: int = 2000  # longitud máxima de respuesta
+    validation_mode: str = "sync"  # "sync" (antes de responder) o "async" (en segundo plano, con validation_id)
+    validation_workers: int = 1  # hilos que validan en modo async
+    validation_results_max: int = 1000  # validaciones async conservadas para consultar por id
+    validation_queue_max: int = 1000  # validaciones async en cola; con la cola llena se omiten
+    validation_results_ttl: float = 3600.0  # segundos que se conserva cada validación async
+    enable_streaming_validation: bool = False  # abortar la generación si filtra instrucciones, código o alucinaciones
+    streaming_validation_chars: int = 600  # caracteres iniciales del stream que se revisan
+    streaming_retry_strategy: Optional[str] = "concise"  # estrategia para reintentar tras abortar (None = modo degradado)
     
     # ==================== Logging ====================
     verbose: bool = True  # mostrar información detallada
@@ -64,6 +111,66 @@ class RAGConfig:
         
         if self.default_k < 1:
             raise ValueError("default_k debe ser al menos 1")
+        
+        if self.context_token_budget < 1:
+            raise ValueError("context_token_budget debe ser al menos 1")
+        
+        if self.compression_top_sentences < 1 or self.compression_neighbors < 0:
+            raise ValueError("compression_top_sentences debe ser >= 1 y compression_neighbors >= 0")
+        
+        if self.extractive_max_sentences < 1:
+            raise ValueError("extractive_max_sentences debe ser al menos 1")
+        
+        if self.circuit_failure_threshold < 1:
+            raise ValueError("circuit_failure_threshold debe ser al menos 1")
+        
+        if self.circuit_slow_call_seconds <= 0 or self.circuit_probe_interval <= 0:
+            raise ValueError("circuit_slow_call_seconds y circuit_probe_interval deben ser positivos")
+        
+        if self.health_check_interval <= 0 or self.health_max_age < self.health_check_interval:
+            raise ValueError("health_check_interval debe ser positivo y health_max_age >= health_check_interval")
+        
+        if self.answer_cache_size < 0:
+            raise ValueError("answer_cache_size no puede ser negativo")
+        
+        if self.validation_mode not in ("sync", "async"):
+            raise ValueError("validation_mode debe ser 'sync' o 'async'")
+        
+        if self.validation_workers < 1 or self.validation_results_max < 1 or self.validation_queue_max < 1:
+            raise ValueError("validation_workers, validation_results_max y validation_queue_max deben ser al menos 1")
+        
+        if self.validation_results_ttl <= 0:
+            raise ValueError("validation_results_ttl debe ser positivo")
+        
+        if self.streaming_validation_chars < 1:
+            raise ValueError("streaming_validation_chars debe ser al menos 1")
+        
+        if self.prompt_layout not in ("inline", "chat"):
+            raise ValueError("prompt_layout debe ser 'inline' o 'chat'")
+        
+        if not self.num_ctx_buckets or min(self.num_ctx_buckets) < 512:
+            raise ValueError("num_ctx_buckets debe tener tamaños de al menos 512")
+        
+        if self.num_ctx_initial is not None and self.num_ctx_initial not in self.num_ctx_buckets:
+            raise ValueError("num_ctx_initial debe ser uno de num_ctx_buckets")
+        
+        for backend in self.ollama_backends or []:
+            if not backend.get('url'):
+                raise ValueError("Cada backend de ollama_backends necesita 'url'")
+            if backend.get('weight', 1) <= 0 or backend.get('max_concurrency', 1) < 1:
+                raise ValueError("Backend Ollama: weight debe ser > 0 y max_concurrency >= 1")
+        
+        if not 50 <= self.ollama_hedge_percentile <= 100:
+            raise ValueError("ollama_hedge_percentile debe estar entre 50 y 100")
+        
+        if self.ollama_eject_after < 1:
+            raise ValueError("ollama_eject_after debe ser al menos 1")
+        
+        if self.ollama_keeper_interval < 1:
+            raise ValueError("ollama_keeper_interval debe ser al menos 1")
+        
+        if not all(0 <= h <= 24 for h in self.ollama_keeper_hours):
+            raise ValueError("ollama_keeper_hours debe estar entre 0 y 24")
     
     def to_dict(self) -> dict:
         """Convertir configuración a diccionario"""
@@ -74,12 +181,54 @@ class RAGConfig:
             'ollama_base_url': self.ollama_base_url,
             'ollama_model': self.ollama_model,
             'ollama_timeout': self.ollama_timeout,
+            'ollama_keep_alive': self.ollama_keep_alive,
+            'ollama_warmup_on_start': self.ollama_warmup_on_start,
+            'ollama_keeper_enabled': self.ollama_keeper_enabled,
+            'ollama_keeper_interval': self.ollama_keeper_interval,
+            'ollama_keeper_hours': self.ollama_keeper_hours,
+            'ollama_cold_load_threshold': self.ollama_cold_load_threshold,
+            'ollama_backends': self.ollama_backends,
+            'ollama_eject_after': self.ollama_eject_after,
+            'ollama_eject_seconds': self.ollama_eject_seconds,
+            'ollama_hedging': self.ollama_hedging,
+            'ollama_hedge_percentile': self.ollama_hedge_percentile,
+            'ollama_hedge_min_delay': self.ollama_hedge_min_delay,
             'default_k': self.default_k,
             'min_similarity': self.min_similarity,
+            'enable_context_builder': self.enable_context_builder,
+            'context_token_budget': self.context_token_budget,
+            'enable_compression': self.enable_compression,
+            'sentence_index_path': self.sentence_index_path,
+            'compression_top_sentences': self.compression_top_sentences,
+            'compression_neighbors': self.compression_neighbors,
+            'vocabulary_index_path': self.vocabulary_index_path,
             'default_temperature': self.default_temperature,
             'default_max_tokens': self.default_max_tokens,
             'prompt_strategy': self.prompt_strategy,
+            'extractive_fallback': self.extractive_fallback,
+            'extractive_max_sentences': self.extractive_max_sentences,
+            'prompt_layout': self.prompt_layout,
+            'enable_num_ctx_sizing': self.enable_num_ctx_sizing,
+            'num_ctx_buckets': self.num_ctx_buckets,
+            'num_ctx_initial': self.num_ctx_initial,
+            'num_ctx_sticky': self.num_ctx_sticky,
+            'circuit_failure_threshold': self.circuit_failure_threshold,
+            'circuit_slow_call_seconds': self.circuit_slow_call_seconds,
+            'circuit_probe_interval': self.circuit_probe_interval,
+            'answer_cache_size': self.answer_cache_size,
+            'answer_cache_ttl': self.answer_cache_ttl,
+            'enable_coalescing': self.enable_coalescing,
+            'health_check_interval': self.health_check_interval,
+            'health_max_age': self.health_max_age,
             'enable_validation': self.enable_validation,
+            'validation_mode': self.validation_mode,
+            'validation_workers': self.validation_workers,
+            'validation_results_max': self.validation_results_max,
+            'validation_queue_max': self.validation_queue_max,
+            'validation_results_ttl': self.validation_results_ttl,
+            'enable_streaming_validation': self.enable_streaming_validation,
+            'streaming_validation_chars': self.streaming_validation_chars,
+            'streaming_retry_strategy': self.streaming_retry_strategy,
             'verbose': self.verbose
         }
     
@@ -105,6 +254,7 @@ DEV_CONFIG = RAGConfig(
 FAST_CONFIG = RAGConfig(
     default_k=3,
     default_max_tokens=300,
+    context_token_budget=2000,
     prompt_strategy="concise",
     ollama_timeout=60
 )
@@ -154,18 +304,43 @@ def print_config(config: RAGConfig):
     print(f"  • URL: {config.ollama_base_url}")
     print(f"  • Model: {config.ollama_model}")
     print(f"  • Timeout: {config.ollama_timeout}s")
+    print(f"  • Keep alive: {config.ollama_keep_alive}")
+    if config.ollama_backends:
+        for backend in config.ollama_backends:
+            print(f"  • Backend: {backend['url']} (peso {backend.get('weight', 1)}, "
+                  f"{backend.get('max_concurrency', 1)} slots)")
+        if config.ollama_hedging:
+            print(f"  • Hedging: p{config.ollama_hedge_percentile:g} del primer token")
+    if config.ollama_keeper_enabled:
+        start, end = config.ollama_keeper_hours
+        print(f"  • Keeper: cada {config.ollama_keeper_interval}s ({start}-{end}h)")
     
     print("\n🔍 Retrieval:")
     print(f"  • K documentos: {config.default_k}")
     print(f"  • Min similarity: {config.min_similarity}")
     
+    print("\n🧩 Contexto:")
+    print(f"  • Builder: {'✅' if config.enable_context_builder else '❌'}")
+    print(f"  • Presupuesto: {config.context_token_budget} tokens")
+    print(f"  • Compresión: {'✅' if config.enable_compression else '❌'}")
+    
     print("\n✨ Generation:")
     print(f"  • Temperature: {config.default_temperature}")
     print(f"  • Max tokens: {config.default_max_tokens}")
     print(f"  • Prompt strategy: {config.prompt_strategy}")
+    print(f"  • Prompt layout: {config.prompt_layout}")
+    print(f"  • Fallback extractivo: {'✅' if config.extractive_fallback else '❌'}")
+    if config.enable_num_ctx_sizing:
+        print(f"  • num_ctx buckets: {list(config.num_ctx_buckets)}")
+    
+    print("\n🛡️  Resiliencia:")
+    print(f"  • Circuit breaker: {config.circuit_failure_threshold} fallas / >{config.circuit_slow_call_seconds}s")
+    print(f"  • Caché de respuestas: {config.answer_cache_size} entradas")
+    print(f"  • Coalescencia de consultas: {'✅' if config.enable_coalescing else '❌'}")
     
     print("\n🔧 Otros:")
-    print(f"  • Validación: {'✅' if config.enable_validation else '❌'}")
+    print(f"  • Validación: {'✅ (' + config.validation_mode + ')' if config.enable_validation else '❌'}")
+    print(f"  • Validación en streaming: {'✅' if config.enable_streaming_validation else '❌'}")
     print(f"  • Verbose: {'✅' if config.verbose else '❌'}")
     print(f"  • Log file: {config.log_file or 'None'}")
     
@@ -7,7 +7,7 @@ Versión: 2.0
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from enum import Enum
 
 
@@ -57,6 +57,66 @@ class BasePromptStrategy(ABC):
     def max_tokens_recommended(self) -> int:
         """Tokens máximos recomendados para esta estrategia"""
         pass
+    
+    # ==================== PARTES DEL PROMPT ====================
+    # El prompt inline (el original) es: intro, contexto, pregunta,
+    # instrucciones y encabezado de respuesta. El layout chat reúne las
+    # partes estáticas (intro e instrucciones) en el mensaje system.
+    
+    intro: Optional[str] = None  # persona (y ejemplos) antes del contexto
+    instructions: Optional[str] = None  # reglas después de la pregunta
+    context_header = "INFORMACIÓN DE LOS MANUALES BPG:"
+    query_header = "PREGUNTA DEL PRODUCTOR:"
+    query_separator = "\n"  # entre query_header y la pregunta
+    answer_header = "RESPUESTA:"
+    
+    @property
+    def system_prompt(self) -> Optional[str]:
+        """
+        Instrucciones estáticas (persona, ejemplos, reglas) para el layout chat
+        Es idéntico entre requests, así Ollama reutiliza el prefijo del KV cache.
+        None = la estrategia no soporta layout chat
+        """
+        if self.intro is None or self.instructions is None:
+            return None
+        return f"{self.intro}\n\n{self.instructions}"
+    
+    def build_user_message(self, context: str, query: str) -> str:
+        """Parte variable del prompt: contexto recuperado y pregunta"""
+        return f"{self.context_header}\n{context}\n\n{self.query_header}{self.query_separator}{query}"
+    
+    def build_inline(self, context: str, query: str) -> str:
+        """Layout inline (/api/generate): instrucciones después del contexto y la pregunta"""
+        return (
+            f"{self.intro}\n\n{self.build_user_message(context, query)}"
+            f"\n\n{self.instructions}\n\n{self.answer_header}"
+        )
+    
+    def build_messages(
+        self,
+        context: str,
+        query: str,
+        metadata: Optional[Dict] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Construir mensajes para /api/chat con prefijo estable
+        
+        Args:
+            context: Contexto recuperado de los documentos
+            query: Pregunta del usuario
+            metadata: Información adicional opcional
+            
+        Returns:
+            Lista de mensajes [system, user]; si la estrategia no define
+            system_prompt, un único mensaje user con el prompt de build()
+        """
+        system = self.system_prompt
+        if system is None:
+            return [{'role': 'user', 'content': self.build(context, query, metadata)}]
+        return [
+            {'role': 'system', 'content': system},
+            {'role': 'user', 'content': self.build_user_message(context, query)}
+        ]
 
 
 # ==================== ESTRATEGIA STANDARD ====================
@@ -79,24 +139,18 @@ class StandardPromptStrategy(BasePromptStrategy):
     def max_tokens_recommended(self) -> int:
         return 500
     
-    def build(self, context: str, query: str, metadata: Optional[Dict] = None) -> str:
-        return f"""Sos un experto en Buenas Prácticas Ganaderas (BPG) para productores argentinos de ganado vacuno.
-
-INFORMACIÓN DE LOS MANUALES BPG:
-{context}
-
-PREGUNTA DEL PRODUCTOR:
-{query}
-
-INSTRUCCIONES:
+    intro = "Sos un experto en Buenas Prácticas Ganaderas (BPG) para productores argentinos de ganado vacuno."
+    
+    instructions = """INSTRUCCIONES:
 - Respondé SOLO con información del contexto proporcionado
 - Si la información NO está en el contexto, respondé exactamente: "No encuentro esa información específica en los manuales BPG disponibles. Te recomiendo consultar con un técnico especializado."
 - Usá viñetas (•) para organizar la información
 - Máximo 250 palabras
 - Lenguaje claro con voseo argentino
-- Si hay números o medidas específicas, citá textualmente
-
-RESPUESTA:"""
+- Si hay números o medidas específicas, citá textualmente"""
+    
+    def build(self, context: str, query: str, metadata: Optional[Dict] = None) -> str:
+        return self.build_inline(context, query)
 
 # ==================== ESTRATEGIA CONCISE ====================
 
@@ -118,22 +172,21 @@ class ConcisePromptStrategy(BasePromptStrategy):
     def max_tokens_recommended(self) -> int:
         return 300
     
-    def build(self, context: str, query: str, metadata: Optional[Dict] = None) -> str:
-        return f"""Sos asesor en BPG para productores ganaderos argentinos.
-
-INFORMACIÓN DE LOS MANUALES:
-{context}
-
-PREGUNTA: {query}
-
-REGLAS:
+    context_header = "INFORMACIÓN DE LOS MANUALES:"
+    query_header = "PREGUNTA:"
+    query_separator = " "
+    
+    intro = "Sos asesor en BPG para productores ganaderos argentinos."
+    
+    instructions = """REGLAS:
 - Respondé SOLO con info del contexto
 - Usá viñetas, máximo 200 palabras
 - Lenguaje claro y directo
 - Si no está en el contexto: "No tengo esa info en los manuales"
-- Citá números exactamente como aparecen
-
-RESPUESTA:"""
+- Citá números exactamente como aparecen"""
+    
+    def build(self, context: str, query: str, metadata: Optional[Dict] = None) -> str:
+        return self.build_inline(context, query)
 
 
 # ==================== ESTRATEGIA FEWSHOT ====================
@@ -156,8 +209,11 @@ class FewShotPromptStrategy(BasePromptStrategy):
     def max_tokens_recommended(self) -> int:
         return 600
     
-    def build(self, context: str, query: str, metadata: Optional[Dict] = None) -> str:
-        return f"""Sos asesor técnico en Buenas Prácticas Ganaderas para productores argentinos.
+    context_header = "INFORMACIÓN DISPONIBLE:"
+    query_header = "CONSULTA ACTUAL:"
+    query_separator = " "
+    
+    intro = """Sos asesor técnico en Buenas Prácticas Ganaderas para productores argentinos.
 
 EJEMPLOS DE RESPUESTAS CORRECTAS:
 
@@ -172,16 +228,12 @@ Respuesta: "La rampa de carga debe tener:
 Pregunta: "¿Cómo prevenir la mastitis en feedlot?"
 Respuesta: "No encuentro información específica sobre mastitis en estos manuales BPG de ganado de carne. Te recomiendo consultar con tu veterinario especializado."
 
----
-
-INFORMACIÓN DISPONIBLE:
-{context}
-
-CONSULTA ACTUAL: {query}
-
-Respondé siguiendo el estilo de los ejemplos. Máximo 300 palabras, lenguaje directo, viñetas para listas.
-
-RESPUESTA:"""
+---"""
+    
+    instructions = "Respondé siguiendo el estilo de los ejemplos. Máximo 300 palabras, lenguaje directo, viñetas para listas."
+    
+    def build(self, context: str, query: str, metadata: Optional[Dict] = None) -> str:
+        return self.build_inline(context, query)
 
 
 # ==================== ESTRATEGIA TECHNICAL ====================
@@ -204,16 +256,13 @@ class TechnicalPromptStrategy(BasePromptStrategy):
     def max_tokens_recommended(self) -> int:
         return 700
     
-    def build(self, context: str, query: str, metadata: Optional[Dict] = None) -> str:
-        return f"""Sos un consultor técnico especializado en normativas y BPG para ganado vacuno en Argentina.
-
-DOCUMENTACIÓN TÉCNICA DISPONIBLE:
-{context}
-
-CONSULTA TÉCNICA:
-{query}
-
-FORMATO DE RESPUESTA TÉCNICA:
+    context_header = "DOCUMENTACIÓN TÉCNICA DISPONIBLE:"
+    query_header = "CONSULTA TÉCNICA:"
+    answer_header = "RESPUESTA TÉCNICA:"
+    
+    intro = "Sos un consultor técnico especializado en normativas y BPG para ganado vacuno en Argentina."
+    
+    instructions = """FORMATO DE RESPUESTA TÉCNICA:
 
 1. REQUISITOS NORMATIVOS:
    - Citá normativas específicas si están en el contexto
@@ -238,9 +287,10 @@ FORMATO DE RESPUESTA TÉCNICA:
 IMPORTANTE: 
 - Si la información técnica específica no está en el contexto, indicá claramente
 - Sugerí qué tipo de profesional consultar (veterinario, ingeniero agrónomo, etc.)
-- No extrapoles ni supongas requisitos no mencionados
-
-RESPUESTA TÉCNICA:"""
+- No extrapoles ni supongas requisitos no mencionados"""
+    
+    def build(self, context: str, query: str, metadata: Optional[Dict] = None) -> str:
+        return self.build_inline(context, query)
 
 
 # ==================== FACTORY ====================
@@ -12,8 +12,32 @@ import chromadb
 from sentence_transformers import SentenceTransformer
 import requests
 import json
+import time
 from datetime import datetime
 
+from utils.ollama_client import OllamaClient, OllamaError, ModelKeeper
+from utils.ollama_pool import OllamaPool
+from utils.context_builder import ContextBuilder, format_context_doc, join_context
+from utils.compression import SentenceCompressor
+from utils.sentence_index import SentenceIndex
+from utils.vocabulary_index import VocabularyIndex
+from utils.async_validation import AsyncValidator
+from utils.streaming_validator import StreamingValidator
+from utils.extractive import ExtractiveAnswerer, EXTRACTIVE_STRATEGY
+from utils.circuit_breaker import CircuitBreaker
+from utils.answer_cache import AnswerCache, normalize_query
+from utils.single_flight import SingleFlight
+from utils.cancellation import CancelToken, Deadline, GenerationCancelled, DEADLINE_EXCEEDED
+from utils.health_monitor import HealthMonitor
+from utils.metrics import RAGMetrics
+from utils.token_usage import TokenUsageStats, token_usage
+from utils.context_window import (
+    estimate_tokens,
+    trim_docs_to_budget,
+    NumCtxSelector,
+    DEFAULT_SAFETY_MARGIN
+)
+
 # ✨ Importar sistema de configuración
 try:
     from config.settings import RAGConfig, DEFAULT_CONFIG
@@ -123,9 +147,58 @@ class RAGSystemBPG:
         # Verificar conexión con Ollama
         self._verificar_ollama()
         
+        # ✨ Métricas Prometheus por etapa (/metrics)
+        self.metrics = RAGMetrics()
+        self.token_stats = TokenUsageStats()
+        
+        # ✨ Cliente Ollama con keep_alive y pre-calentamiento
+        self._init_ollama_client()
+        
+        # ✨ Índice de oraciones precalculado (compresión contextual y modo extractivo)
+        self.sentence_index = None
+        self.compressor = None
+        self.extractor = None
+        if self.config and (
+            self.config.enable_compression
+            or self.config.extractive_fallback
+            or self.config.prompt_strategy == EXTRACTIVE_STRATEGY
+        ):
+            try:
+                self.sentence_index = SentenceIndex.load(self.config.sentence_index_path)
+                print(f"✂️  Índice de oraciones: {len(self.sentence_index)} oraciones")
+            except FileNotFoundError:
+                print(f"⚠️  Índice de oraciones no encontrado en {self.config.sentence_index_path}")
+                print("   Ejecuta: python src/rag/embeddings.py")
+        
+        if self.sentence_index is not None:
+            if self.config.enable_compression:
+                self.compressor = SentenceCompressor(
+                    self.sentence_index,
+                    top_sentences=self.config.compression_top_sentences,
+                    neighbors=self.config.compression_neighbors
+                )
+                print("🗜️  Compresión contextual: ACTIVADA")
+            self.extractor = ExtractiveAnswerer(
+                self.sentence_index,
+                max_sentences=self.config.extractive_max_sentences
+            )
+        
+        # ✨ Constructor de contexto (de-duplicación de overlap + presupuesto de tokens)
+        if self.config and self.config.enable_context_builder:
+            self.context_builder = ContextBuilder(
+                token_budget=self.config.context_token_budget,
+                format_doc=self._format_context_doc
+            )
+            print(f"🧩 Presupuesto de contexto: {self.config.context_token_budget} tokens")
+        else:
+            self.context_builder = None
+        
         # ✨ Inicializar estrategia de prompts
         if PROMPTS_AVAILABLE and self.config:
             strategy_name = self.config.prompt_strategy
+            if strategy_name == EXTRACTIVE_STRATEGY:
+                # El modo extractivo no usa prompt; standard queda para pedidos con LLM
+                strategy_name = PromptType.STANDARD.value
             self.prompt_strategy = PromptFactory.get_strategy_by_name(strategy_name)
             print(f"📝 Estrategia de prompt: {self.prompt_strategy.name}")
         else:
@@ -150,8 +223,147 @@ class RAGSystemBPG:
             if self.config:
                 print(f"🔍 Validación de respuestas: DESACTIVADA")
         
+        # ✨ Vocabulario precalculado de cada chunk (relevancia contextual sin recorrer el contexto)
+        self.vocabulary_index = None
+        if self.validator:
+            try:
+                self.vocabulary_index = VocabularyIndex.load(self.config.vocabulary_index_path)
+                print(f"🔤 Índice de vocabulario: {len(self.vocabulary_index)} chunks")
+            except FileNotFoundError:
+                print(f"⚠️  Índice de vocabulario no encontrado en {self.config.vocabulary_index_path}")
+                print("   Ejecuta: python src/rag/embeddings.py")
+        
+        # ✨ Validación sobre el stream: aborta generaciones que filtran instrucciones, código o alucinaciones
+        self.stream_validator = None
+        if self.config and self.config.enable_streaming_validation:
+            self.stream_validator = StreamingValidator(max_chars=self.config.streaming_validation_chars)
+            retry = self.config.streaming_retry_strategy
+            print(f"🛑 Validación en streaming: ACTIVADA (reintento: {retry or 'modo degradado'})")
+        
+        # ✨ Validación fuera del camino crítico: se responde con un validation_id
+        self.async_validator = None
+        if self.validator and self.config.validation_mode == "async":
+            self.async_validator = AsyncValidator(
+                self.validator,
+                workers=self.config.validation_workers,
+                max_results=self.config.validation_results_max,
+                max_pending=self.config.validation_queue_max,
+                result_ttl=self.config.validation_results_ttl,
+                on_result=self._observe_async_validation
+            )
+            self.async_validator.start()
+            print(f"🔍 Validación en segundo plano ({self.config.validation_workers} hilo/s)")
+        
+        # ✨ Monitor de salud (lo inician las APIs; /health responde desde su caché)
+        if self.config:
+            self.health_monitor = HealthMonitor(
+                self.check_health,
+                interval=self.config.health_check_interval,
+                max_age=self.config.health_max_age
+            )
+        else:
+            self.health_monitor = HealthMonitor(self.check_health)
+        
         print("✅ Sistema RAG inicializado correctamente\n")
     
+    def _init_ollama_client(self):
+        """Crear cliente Ollama, pre-cargar el modelo y lanzar el keeper si corresponde"""
+        if self.config and self.config.ollama_backends:
+            # ✨ Pool de backends con balanceo least-outstanding
+            self.ollama_client = OllamaPool.from_config(
+                self.config.ollama_backends,
+                model=self.ollama_model,
+                timeout=self.config.ollama_timeout,
+                keep_alive=self.config.ollama_keep_alive,
+                cold_load_threshold=self.config.ollama_cold_load_threshold,
+                eject_after=self.config.ollama_eject_after,
+                eject_seconds=self.config.ollama_eject_seconds,
+                hedge=self.config.ollama_hedging,
+                hedge_percentile=self.config.ollama_hedge_percentile,
+                hedge_min_delay=self.config.ollama_hedge_min_delay,
+                on_hedge=self.metrics.observe_hedge
+            )
+            self.ollama_client.start()
+            print(f"⚖️  Pool Ollama: {len(self.config.ollama_backends)} backends")
+            warmup = self.config.ollama_warmup_on_start
+        elif self.config:
+            self.ollama_client = OllamaClient(
+                base_url=self.ollama_base_url,
+                model=self.ollama_model,
+                timeout=self.config.ollama_timeout,
+                keep_alive=self.config.ollama_keep_alive,
+                cold_load_threshold=self.config.ollama_cold_load_threshold
+            )
+            warmup = self.config.ollama_warmup_on_start
+        else:
+            self.ollama_client = OllamaClient(
+                base_url=self.ollama_base_url,
+                model=self.ollama_model
+            )
+            warmup = False
+        
+        # ✨ num_ctx por consulta: cambiarlo recarga el modelo en Ollama, así que
+        # el pre-calentamiento y el keeper reusan el último valor enviado
+        self.num_ctx_selector = None
+        if self.config and self.config.enable_num_ctx_sizing:
+            self.num_ctx_selector = NumCtxSelector(
+                self.config.num_ctx_buckets,
+                initial=self.config.num_ctx_initial,
+                sticky=self.config.num_ctx_sticky
+            )
+        
+        if warmup:
+            load_time = self.ollama_client.warmup(num_ctx=self._loaded_num_ctx())
+            if load_time is not None:
+                print(f"🔥 Modelo pre-cargado en Ollama ({load_time:.2f}s)")
+            else:
+                print("⚠️  No se pudo pre-cargar el modelo en Ollama")
+        
+        self.model_keeper = None
+        if self.config and self.config.ollama_keeper_enabled:
+            self.model_keeper = ModelKeeper(
+                self.ollama_client,
+                interval=self.config.ollama_keeper_interval,
+                business_hours=self.config.ollama_keeper_hours,
+                num_ctx=self._loaded_num_ctx
+            )
+            self.model_keeper.start()
+            start, end = self.config.ollama_keeper_hours
+            print(f"⏰ Keeper de modelo activo ({start}-{end}h)")
+        
+        # ✨ Circuit breaker + caché de respuestas para el modo degradado
+        if self.config:
+            self.circuit_breaker = CircuitBreaker(
+                failure_threshold=self.config.circuit_failure_threshold,
+                slow_call_seconds=self.config.circuit_slow_call_seconds,
+                probe_interval=self.config.circuit_probe_interval,
+                probe=self.ollama_client.ping
+            )
+            self.answer_cache = AnswerCache(
+                max_entries=self.config.answer_cache_size,
+                ttl=self.config.answer_cache_ttl
+            )
+        else:
+            self.circuit_breaker = CircuitBreaker(probe=self.ollama_client.ping)
+            self.answer_cache = AnswerCache()
+        self.single_flight = SingleFlight()
+    
+    def _loaded_num_ctx(self) -> Optional[int]:
+        """num_ctx vigente de las consultas (None si no se dimensiona)"""
+        return self.num_ctx_selector.current if self.num_ctx_selector else None
+    
+    def shutdown(self):
+        """Liberar recursos en segundo plano (keeper del modelo, sondeo del breaker, validación)"""
+        if self.async_validator:
+            self.async_validator.stop()
+        if self.model_keeper:
+            self.model_keeper.stop()
+            self.model_keeper = None
+        self.circuit_breaker.stop()
+        self.health_monitor.stop()
+        if isinstance(self.ollama_client, OllamaPool):
+            self.ollama_client.stop()
+    
     def _verificar_ollama(self):
         """Verificar que Ollama esté corriendo y el modelo disponible"""
         try:
@@ -171,11 +383,50 @@ class RAGSystemBPG:
             print(f"   Inicia Ollama con: ollama serve")
             print(f"   Error detallado: {str(e)}")
     
+    def check_health(self) -> Dict:
+        """
+        Verificar Ollama y ChromaDB (llamadas de red: usar desde el HealthMonitor)
+        
+        Returns:
+            Estado de cada componente y 'ready' (puede responder consultas,
+            aunque sea en modo degradado)
+        """
+        ollama_available = False
+        models_available = []
+        try:
+            response = requests.get(f"{self.ollama_base_url}/api/tags", timeout=2)
+            if response.status_code == 200:
+                ollama_available = True
+                models_available = [m['name'] for m in response.json().get('models', [])]
+        except requests.RequestException:
+            pass
+        
+        chroma_available = self.collection is not None
+        total_documents = 0
+        if chroma_available:
+            try:
+                total_documents = self.collection.count()
+            except Exception:
+                chroma_available = False
+        
+        return {
+            'ollama_available': ollama_available,
+            'models_available': models_available,
+            'chroma_available': chroma_available,
+            'total_documents': total_documents,
+            'ready': chroma_available and (ollama_available or self.extractor is not None)
+        }
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Generar embedding de la query (se reutiliza en retrieval y compresión)"""
+        return self.embedding_model.encode([query])[0].tolist()
+    
     def retrieve_documents(
         self, 
         query: str, 
         k: int = 5,
-        min_similarity: float = 0.0
+        min_similarity: float = 0.0,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict]:
         """
         Recuperar documentos relevantes de ChromaDB
@@ -184,6 +435,7 @@ class RAGSystemBPG:
             query: Pregunta del usuario
             k: Número de chunks a recuperar
             min_similarity: Similaridad mínima (0-1)
+            query_embedding: Embedding ya calculado de la query (se calcula si es None)
             
         Returns:
             Lista de documentos relevantes con metadata
@@ -191,7 +443,8 @@ class RAGSystemBPG:
         print(f"\n🔍 Buscando documentos relevantes para: '{query}'")
         
         # Generar embedding de la query
-        query_embedding = self.embedding_model.encode([query])[0].tolist()
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
         
         # Buscar en ChromaDB
         results = self.collection.query(
@@ -202,7 +455,8 @@ class RAGSystemBPG:
         # Procesar resultados
         documentos_relevantes = []
         if results['documents'] and results['documents'][0]:
-            for i, (doc, metadata, distance) in enumerate(zip(
+            for i, (chunk_id, doc, metadata, distance) in enumerate(zip(
+                results['ids'][0],
                 results['documents'][0],
                 results['metadatas'][0],
                 results['distances'][0]
@@ -213,6 +467,7 @@ class RAGSystemBPG:
                 if similarity >= min_similarity:
                     documentos_relevantes.append({
                         'rank': i + 1,
+                        'chunk_id': chunk_id,
                         'text': doc,
                         'metadata': metadata,
                         'similarity': round(similarity, 4),
@@ -222,12 +477,80 @@ class RAGSystemBPG:
         print(f"✅ Recuperados {len(documentos_relevantes)} documentos relevantes")
         return documentos_relevantes
     
+    _format_context_doc = staticmethod(format_context_doc)
+    
+    def _build_context(self, context_docs: List[Dict]) -> str:
+        """Unir documentos recuperados en el bloque de contexto del prompt"""
+        return join_context(context_docs)
+    
+    def _resolve_strategy(self, strategy: Optional[str]):
+        """Estrategia de prompt para este pedido (la configurada si es None)"""
+        if strategy and PROMPTS_AVAILABLE:
+            return PromptFactory.get_strategy_by_name(strategy)
+        return self.prompt_strategy
+    
+    def _use_chat_layout(self, prompt_strategy) -> bool:
+        """Layout chat: prefijo estático en mensaje system, contexto y pregunta al final"""
+        return bool(
+            self.config
+            and self.config.prompt_layout == "chat"
+            and prompt_strategy
+            and prompt_strategy.system_prompt is not None
+        )
+    
+    def _build_request(
+        self,
+        context: str,
+        query: str,
+        prompt_strategy=None
+    ) -> Tuple[str, Optional[List[Dict[str, str]]]]:
+        """
+        Construir el prompt según el layout configurado
+        
+        Returns:
+            (texto completo del prompt, mensajes para /api/chat o None en layout inline)
+        """
+        if self._use_chat_layout(prompt_strategy):
+            messages = prompt_strategy.build_messages(context, query)
+            return "\n\n".join(m['content'] for m in messages), messages
+        return self._build_prompt(context, query, prompt_strategy), None
+    
+    def _build_prompt(self, context: str, query: str, prompt_strategy=None) -> str:
+        """Construir prompt con la estrategia indicada o el prompt legacy"""
+        if prompt_strategy:
+            return prompt_strategy.build(context, query)
+        
+        # Prompt legacy (el original)
+        prompt = f"""Eres un experto en Buenas Prácticas Ganaderas (BPG) para ganado vacuno de carne. 
+
+Tu tarea es responder preguntas de productores ganaderos basándote ÚNICAMENTE en la información proporcionada en los documentos de referencia.
+
+DOCUMENTOS DE REFERENCIA:
+{context}
+
+PREGUNTA DEL PRODUCTOR:
+{query}
+
+INSTRUCCIONES:
+1. Responde SOLO con información de los documentos de referencia
+2. Si la información no está en los documentos, di "No tengo información suficiente en los manuales"
+3. Sé específico, práctico y directo
+4. Usa un lenguaje profesional pero accesible
+5. Si hay normativas o números específicos, cítalos exactamente
+
+RESPUESTA:"""
+        return prompt
+    
     def generate_answer(
         self, 
         query: str, 
         context_docs: List[Dict],
         temperature: Optional[float] = None,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None,
+        strategy: Optional[str] = None,
+        cancel: Optional[CancelToken] = None,
+        timings: Optional[Dict[str, float]] = None
     ) -> Dict:
         """
         Generar respuesta usando Ollama con contexto recuperado
@@ -237,18 +560,41 @@ class RAGSystemBPG:
             context_docs: Documentos recuperados del retriever
             temperature: Creatividad del modelo (0-1) - usa config si es None
             max_tokens: Máximo de tokens en respuesta - usa recomendación de estrategia si es None
+            query_embedding: Embedding de la query para compresión/modo extractivo (se calcula si es None)
+            strategy: Estrategia para este pedido ("standard", ..., "extractive") - usa config si es None
+            cancel: Token de cancelación/deadline; corta el stream de Ollama al cancelarse
+            timings: Dict donde anotar la duración (segundos) de cada etapa
             
         Returns:
             Diccionario con respuesta y metadata
+            
+        Raises:
+            GenerationCancelled: Si el cliente canceló la consulta (al vencer el
+                deadline se responde en modo degradado)
         """
+        if timings is None:
+            timings = {}
+        
+        # ===== MODO EXTRACTIVO (sin LLM) =====
+        if strategy is None and self.config:
+            strategy = self.config.prompt_strategy
+        if strategy == EXTRACTIVE_STRATEGY:
+            if self.extractor:
+                return self._extractive_answer(query, context_docs, query_embedding, timings=timings)
+            print("⚠️  Modo extractivo no disponible (falta índice de oraciones), usando LLM")
+            strategy = None
+        prompt_strategy = self._resolve_strategy(strategy)
+        retrieved_docs = context_docs
+        
         print(f"\n🤖 Generando respuesta con Ollama ({self.ollama_model})...")
         
         # ===== DETERMINAR PARÁMETROS DE GENERACIÓN =====
+        requested_max_tokens = max_tokens  # el reintento recalcula según su estrategia
         if self.config:
             temperature = temperature if temperature is not None else self.config.default_temperature
             # Si hay estrategia, usar sus tokens recomendados, sino usar de config
-            if self.prompt_strategy and max_tokens is None:
-                max_tokens = self.prompt_strategy.max_tokens_recommended
+            if prompt_strategy and max_tokens is None:
+                max_tokens = prompt_strategy.max_tokens_recommended
             else:
                 max_tokens = max_tokens if max_tokens is not None else self.config.default_max_tokens
         else:
@@ -256,110 +602,370 @@ class RAGSystemBPG:
             temperature = temperature if temperature is not None else 0.7
             max_tokens = max_tokens if max_tokens is not None else 500
         
-        # ===== CONSTRUIR CONTEXTO =====
-        context = "\n\n---\n\n".join([
-            f"Fragmento {doc['rank']} (Similaridad: {doc['similarity']}):\n{doc['text']}"
-            for doc in context_docs
-        ])
+        # ===== COMPRESIÓN A NIVEL DE ORACIÓN =====
+        stage_start = time.perf_counter()
+        compression_stats = None
+        if self.compressor:
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
+            context_docs, compression_stats = self.compressor.compress(context_docs, query_embedding)
+            if compression_stats['compression_ratio']:
+                print(f"🗜️  Contexto comprimido {compression_stats['compression_ratio']}x "
+                      f"({compression_stats['sentences_kept']} oraciones)")
         
-        # ===== CONSTRUIR PROMPT USANDO ESTRATEGIA O FALLBACK =====
-        if self.prompt_strategy:
-            # Usar estrategia configurada
-            prompt = self.prompt_strategy.build(context, query)
-            strategy_used = self.prompt_strategy.name
-            print(f"📝 Usando estrategia: {strategy_used}")
-        else:
-            # Prompt legacy (el original)
-            prompt = f"""Eres un experto en Buenas Prácticas Ganaderas (BPG) para ganado vacuno de carne. 
-
-Tu tarea es responder preguntas de productores ganaderos basándote ÚNICAMENTE en la información proporcionada en los documentos de referencia.
-
-DOCUMENTOS DE REFERENCIA:
-{context}
-
-PREGUNTA DEL PRODUCTOR:
-{query}
-
-INSTRUCCIONES:
-1. Responde SOLO con información de los documentos de referencia
-2. Si la información no está en los documentos, di "No tengo información suficiente en los manuales"
-3. Sé específico, práctico y directo
-4. Usa un lenguaje profesional pero accesible
-5. Si hay normativas o números específicos, cítalos exactamente
-
-RESPUESTA:"""
-            strategy_used = "Legacy"
-            print(f"📝 Usando prompt: Legacy (por defecto)")
+        # ===== CONSTRUIR CONTEXTO Y PROMPT =====
+        context_stats = None
+        if self.context_builder:
+            context_docs, context_stats = self.context_builder.build(context_docs)
+            print(f"🧩 Contexto: {context_stats['tokens_after']} tokens "
+                  f"({context_stats['tokens_saved']} ahorrados)")
+        timings['context_assembly'] = time.perf_counter() - stage_start
         
-        # ===== LLAMAR A OLLAMA API =====
-        try:
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json={
-                    "model": self.ollama_model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": temperature,
-                        "num_predict": max_tokens
-                    }
-                },
-                timeout=120  # 2 minutos timeout
+        stage_start = time.perf_counter()
+        context = self._build_context(context_docs)
+        prompt, messages = self._build_request(context, query, prompt_strategy)
+        strategy_used = prompt_strategy.name if prompt_strategy else "Legacy"
+        print(f"📝 Usando estrategia: {strategy_used}{' (layout chat)' if messages else ''}")
+        
+        # ===== DIMENSIONAR VENTANA DE CONTEXTO (num_ctx) =====
+        options = {
+            "temperature": temperature,
+            "num_predict": max_tokens
+        }
+        docs_trimmed = 0
+        prompt_tokens_est = estimate_tokens(prompt)
+        if self.config and self.config.enable_num_ctx_sizing:
+            buckets = self.config.num_ctx_buckets
+            max_ctx = max(buckets)
+            if prompt_tokens_est + max_tokens + DEFAULT_SAFETY_MARGIN > max_ctx:
+                # Recortar contexto de forma controlada (se conservan los docs más relevantes)
+                overhead = estimate_tokens(self._build_request("", query, prompt_strategy)[0])
+                budget = max_ctx - max_tokens - DEFAULT_SAFETY_MARGIN - overhead
+                context_docs, docs_trimmed = trim_docs_to_budget(
+                    context_docs, budget, self._format_context_doc
+                )
+                context = self._build_context(context_docs)
+                prompt, messages = self._build_request(context, query, prompt_strategy)
+                prompt_tokens_est = estimate_tokens(prompt)
+                print(f"✂️  Contexto recortado: {docs_trimmed} fragmento(s) para entrar en {max_ctx} tokens")
+            options["num_ctx"] = self.num_ctx_selector.select(prompt_tokens_est, max_tokens)
+        timings['prompt_build'] = time.perf_counter() - stage_start
+        
+        # ===== LLAMAR A OLLAMA API (protegido por el circuit breaker) =====
+        if cancel is not None and cancel.cancelled:
+            if cancel.reason != DEADLINE_EXCEEDED:
+                self.metrics.errors.inc(error_class=cancel.reason or "cancelled")
+                raise GenerationCancelled(cancel.reason)
+            self.metrics.errors.inc(error_class=DEADLINE_EXCEEDED)
+            return self._degraded_answer(
+                query, retrieved_docs, strategy_used, query_embedding,
+                reason="Tiempo límite de la consulta excedido", timings=timings
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                answer_text = result.get('response', '').strip()
-                
-                print(f"✅ Respuesta generada ({len(answer_text)} caracteres)")
-                
-                # ✨ NUEVO: Validar respuesta si el validador está activo
-                validation_result = None
-                if self.validator:
-                    validation_result = self.validator.validate_response(
-                        response=answer_text,
-                        context=context,
-                        query=query
-                    )
-                    
-                    if self.config and self.config.verbose and not validation_result['is_valid']:
-                        print(f"⚠️  Validación: Score {validation_result['score']:.1%}")
-                        print(f"   Recomendaciones: {validation_result['recommendations'][0]}")
-                
-                return {
-                    'answer': answer_text,
-                    'model': self.ollama_model,
-                    'strategy': strategy_used,
-                    'temperature': temperature,
-                    'max_tokens': max_tokens,
-                    'num_docs_used': len(context_docs),
-                    'total_eval_duration': result.get('total_duration', 0) / 1e9,
-                    'timestamp': datetime.now().isoformat(),
-                    'validation': validation_result,  # ✨ NUEVO
-                    'success': True
-                }
+        if not self.circuit_breaker.allow_request():
+            print("⛔ Circuito abierto: Ollama no disponible, respuesta en modo degradado")
+            self.metrics.errors.inc(error_class="circuit_open")
+            return self._degraded_answer(
+                query, retrieved_docs, strategy_used, query_embedding,
+                reason="Circuito abierto: Ollama no disponible", timings=timings
+            )
+        
+        # El validador de streaming cancela solo esta generación (token hijo)
+        call_cancel = cancel
+        stream_watch = None
+        if self.stream_validator:
+            call_cancel = cancel.child() if cancel is not None else CancelToken()
+            stream_watch = self.stream_validator.watch(call_cancel)
+        on_token = stream_watch.feed if stream_watch else None
+        
+        call_start = time.perf_counter()
+        self.metrics.ollama_in_progress.inc()
+        try:
+            if messages:
+                result = self.ollama_client.chat(messages, options=options, cancel=call_cancel, on_token=on_token)
             else:
-                error_msg = f"Error de Ollama (status {response.status_code})"
-                print(f"❌ {error_msg}")
-                return {
-                    'answer': error_msg,
-                    'success': False
-                }
-                
+                result = self.ollama_client.generate(prompt, options=options, cancel=call_cancel, on_token=on_token)
+        except GenerationCancelled as e:
+            if stream_watch and stream_watch.violation and not (cancel and cancel.cancelled):
+                # Respuesta descartada a mitad de camino: Ollama respondió bien
+                self.circuit_breaker.record_cancelled()
+                timings['llm_rejected'] = timings.get('llm_rejected', 0.0) + time.perf_counter() - call_start
+                return self._rejected_generation(
+                    query, retrieved_docs, temperature, requested_max_tokens, query_embedding,
+                    strategy, strategy_used, stream_watch.violation, cancel, timings
+                )
+            self.metrics.errors.inc(error_class=e.reason or "cancelled")
+            if e.reason != DEADLINE_EXCEEDED:
+                # El cliente se fue: no es una falla de Ollama ni hace falta responder
+                self.circuit_breaker.record_cancelled()
+                print("🚫 Consulta cancelada por el cliente")
+                raise
+            self.circuit_breaker.record_failure(time.perf_counter() - call_start)
+            print("⏱️  Tiempo límite de la consulta excedido")
+            return self._degraded_answer(
+                query, retrieved_docs, strategy_used, query_embedding,
+                reason="Tiempo límite de la consulta excedido", timings=timings
+            )
         except Exception as e:
-            error_msg = f"Error al generar respuesta: {str(e)}"
+            self.circuit_breaker.record_failure(time.perf_counter() - call_start)
+            self.metrics.errors.inc(error_class=self._error_class(e))
+            error_msg = str(e) if isinstance(e, OllamaError) else f"Error al generar respuesta: {str(e)}"
             print(f"❌ {error_msg}")
-            return {
-                'answer': error_msg,
-                'success': False
-            }
+            return self._degraded_answer(
+                query, retrieved_docs, strategy_used, query_embedding,
+                reason=error_msg, timings=timings
+            )
+        finally:
+            self.metrics.ollama_in_progress.dec()
+            if call_cancel is not cancel:
+                call_cancel.close()
+        llm_seconds = time.perf_counter() - call_start
+        self.circuit_breaker.record_success(llm_seconds)
+        
+        # Tiempo de Ollama: carga del modelo, prefill (prompt) y decode (generación)
+        usage = token_usage(result)
+        timings['llm'] = llm_seconds
+        timings['llm_load'] = result.get('load_duration', 0) / 1e9
+        timings['llm_prefill'] = usage['prompt_eval_seconds']
+        timings['llm_decode'] = usage['eval_seconds']
+        self.token_stats.record(strategy_used, usage)
+        self.metrics.tokens.inc(
+            usage['prompt_eval_count'], kind="prompt", strategy=strategy_used, model=self.ollama_model
+        )
+        self.metrics.tokens.inc(
+            usage['eval_count'], kind="generated", strategy=strategy_used, model=self.ollama_model
+        )
+        if result['cold_load']:
+            self.metrics.cold_loads.inc(model=self.ollama_model)
+        
+        answer_text = result.get('response', '').strip()
+        print(f"✅ Respuesta generada ({len(answer_text)} caracteres)")
+        if result['cold_load']:
+            print(f"🧊 Carga en frío del modelo ({result['load_duration_s']:.2f}s)")
+        
+        # ✨ NUEVO: Validar respuesta si el validador está activo
+        validation_result = None
+        validation_id = None
+        if self.validator:
+            stage_start = time.perf_counter()
+            # Con compresión el texto de los docs ya no es el del chunk indexado
+            context_words = None
+            if self.vocabulary_index and not self.compressor:
+                context_words = self.vocabulary_index.context_words(context_docs)
+            if self.async_validator:
+                # El resultado se consulta después por validation_id
+                validation_id = self.async_validator.submit(
+                    answer_text, context, query,
+                    context_words=context_words,
+                    labels={'strategy': strategy_used, 'model': self.ollama_model}
+                )
+                if validation_id:
+                    self.metrics.validations_pending.inc()
+                else:
+                    # Cola llena: se responde sin validar en lugar de acumular trabajo
+                    self.metrics.validations.inc(strategy=strategy_used, result="skipped")
+            else:
+                validation_result = self.validator.validate_response(
+                    response=answer_text,
+                    context=context,
+                    query=query,
+                    context_words=context_words
+                )
+                timings['validation'] = time.perf_counter() - stage_start
+                self.metrics.observe_validation(validation_result, strategy=strategy_used)
+            
+            if self.config and self.config.verbose and validation_result and not validation_result['is_valid']:
+                print(f"⚠️  Validación: Score {validation_result['score']:.1%}")
+                print(f"   Recomendaciones: {validation_result['recommendations'][0]}")
+        
+        response = {
+            'answer': answer_text,
+            'model': self.ollama_model,
+            'backend': result.get('backend', self.ollama_base_url),
+            'strategy': strategy_used,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'num_docs_used': len(context_docs),
+            'num_ctx': options.get('num_ctx'),
+            'prompt_tokens_est': prompt_tokens_est,
+            'docs_trimmed': docs_trimmed,
+            'context_stats': context_stats,
+            'compression_stats': compression_stats,
+            'total_eval_duration': result.get('total_duration', 0) / 1e9,
+            'load_duration': result['load_duration_s'],
+            'cold_load': result['cold_load'],
+            **usage,
+            'timestamp': datetime.now().isoformat(),
+            'validation': validation_result,  # ✨ NUEVO
+            'validation_id': validation_id,
+            'success': True
+        }
+        if answer_text:
+            self.answer_cache.put(query, strategy_used, response)
+        return response
+    
+    def _observe_async_validation(self, record: Dict, labels: Dict):
+        """Callback del validador en segundo plano: alimentar las métricas de calidad"""
+        self.metrics.validations_pending.dec()
+        self.metrics.observe_validation(record['validation'], strategy=labels['strategy'])
+        self.metrics.stage_seconds.observe(
+            record['seconds'], stage="validation", strategy=labels['strategy'], model=labels['model']
+        )
+    
+    @staticmethod
+    def _error_class(error: Exception) -> str:
+        """Clase de error para métricas"""
+        if isinstance(error, OllamaError):
+            return "ollama_http"
+        if isinstance(error, requests.Timeout):
+            return "timeout"
+        if isinstance(error, requests.ConnectionError):
+            return "connection"
+        return "other"
+    
+    def _rejected_generation(
+        self,
+        query: str,
+        retrieved_docs: List[Dict],
+        temperature: float,
+        max_tokens: Optional[int],
+        query_embedding: Optional[List[float]],
+        strategy: Optional[str],
+        strategy_used: str,
+        violation: Dict,
+        cancel: Optional[CancelToken],
+        timings: Dict[str, float]
+    ) -> Dict:
+        """
+        Generación abortada por el validador de streaming: reintentar una vez
+        con streaming_retry_strategy o responder en modo degradado
+        """
+        check = violation['check']
+        print(f"🛑 Generación abortada a los {violation['chars']} caracteres ({check})")
+        self.metrics.stream_rejections.inc(check=check, strategy=strategy_used)
+        
+        retry = self.config.streaming_retry_strategy
+        if retry and retry.lower() != (strategy or "").lower():
+            print(f"🔁 Reintentando con estrategia '{retry}'")
+            resultado = self.generate_answer(
+                query=query,
+                context_docs=retrieved_docs,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                query_embedding=query_embedding,
+                strategy=retry,
+                cancel=cancel,
+                timings=timings
+            )
+        else:
+            resultado = self._degraded_answer(
+                query, retrieved_docs, strategy_used, query_embedding,
+                reason=f"Respuesta descartada durante la generación ({check})", timings=timings
+            )
+        # Del primer intento al último
+        resultado['stream_rejections'] = [
+            {**violation, 'strategy': strategy_used}, *resultado.get('stream_rejections', [])
+        ]
+        return resultado
+    
+    def _degraded_answer(
+        self,
+        query: str,
+        context_docs: List[Dict],
+        strategy_used: str,
+        query_embedding: Optional[List[float]] = None,
+        reason: str = "",
+        timings: Optional[Dict[str, float]] = None
+    ) -> Dict:
+        """
+        Responder sin Ollama: caché de respuestas, luego modo extractivo
+        
+        Args:
+            query: Pregunta del usuario
+            context_docs: Documentos recuperados (sin comprimir)
+            strategy_used: Estrategia con la que se hubiera generado
+            query_embedding: Embedding de la query (se calcula si es None)
+            reason: Motivo por el que no se usó Ollama
+            timings: Dict donde anotar la duración de las etapas
+            
+        Returns:
+            Diccionario con el mismo formato que generate_answer
+        """
+        cached = self.answer_cache.get(query, strategy_used)
+        self.metrics.answer_cache.inc(result="hit" if cached else "miss")
+        if cached:
+            print("💾 Respuesta servida desde caché")
+            self.metrics.degraded.inc(mode="cache")
+            cached.update({'cached': True, 'fallback_reason': reason})
+            return cached
+        
+        # ✨ Fallback extractivo: el productor recibe algo útil aunque Ollama falle
+        if self.extractor and self.config and self.config.extractive_fallback:
+            print("📎 Respondiendo en modo extractivo (fallback)")
+            self.metrics.degraded.inc(mode="extractive")
+            return self._extractive_answer(
+                query, context_docs, query_embedding, fallback_reason=reason, timings=timings
+            )
+        self.metrics.degraded.inc(mode="none")
+        return {
+            'answer': reason,
+            'success': False
+        }
+    
+    def _extractive_answer(
+        self,
+        query: str,
+        context_docs: List[Dict],
+        query_embedding: Optional[List[float]] = None,
+        fallback_reason: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None
+    ) -> Dict:
+        """
+        Responder con oraciones textuales de los manuales (sin LLM)
+        
+        Args:
+            query: Pregunta del usuario
+            context_docs: Documentos recuperados
+            query_embedding: Embedding de la query (se calcula si es None)
+            fallback_reason: Error de Ollama si se usa como fallback
+            timings: Dict donde anotar la duración de la extracción
+            
+        Returns:
+            Diccionario con el mismo formato que generate_answer
+        """
+        start = time.perf_counter()
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        extraction = self.extractor.answer(context_docs, query_embedding)
+        elapsed = time.perf_counter() - start
+        if timings is not None:
+            timings['extractive'] = elapsed
+        print(f"✅ Respuesta extractiva ({len(extraction['sentences'])} oraciones, {elapsed*1000:.0f} ms)")
+        
+        return {
+            'answer': extraction['answer'],
+            'model': 'extractive',
+            'strategy': 'Extractive',
+            'temperature': 0.0,
+            'max_tokens': 0,
+            'num_docs_used': len(context_docs),
+            'total_eval_duration': elapsed,
+            'timestamp': datetime.now().isoformat(),
+            'validation': None,
+            'extractive': True,
+            'fallback_reason': fallback_reason,
+            'success': True
+        }
     
     def query(
         self, 
         pregunta: str, 
         k: Optional[int] = None,
         temperature: Optional[float] = None,
-        verbose: bool = True
+        verbose: bool = True,
+        max_tokens: Optional[int] = None,
+        strategy: Optional[str] = None,
+        timeout: Optional[float] = None,
+        cancel: Optional[CancelToken] = None
     ) -> Dict:
         """
         Ejecutar consulta completa RAG (Retrieve + Generate)
@@ -369,24 +975,108 @@ RESPUESTA:"""
             k: Número de chunks a recuperar (usa config si es None)
             temperature: Creatividad de la respuesta (usa config si es None)
             verbose: Mostrar documentos recuperados
+            max_tokens: Máximo de tokens en respuesta (usa estrategia/config si es None)
+            strategy: Estrategia de prompt o "extractive" (usa config si es None)
+            timeout: Segundos hasta el deadline de la consulta (None = sin deadline)
+            cancel: Token que cancela la consulta (ej: el cliente se desconectó)
             
         Returns:
             Respuesta completa con metadata
+            
+        Raises:
+            GenerationCancelled: Si la consulta se canceló con el token
         """
-        print("\n" + "="*60)
-        print("📋 CONSULTA RAG BPG")
-        print("="*60)
-        
         # Usar valores de configuración si están disponibles y no se especificaron
         if self.config:
             k = k if k is not None else self.config.default_k
             temperature = temperature if temperature is not None else self.config.default_temperature
+            strategy = strategy or self.config.prompt_strategy
         else:
             k = k if k is not None else 5
             temperature = temperature if temperature is not None else 0.7
         
-        # 1. RETRIEVAL
-        docs_relevantes = self.retrieve_documents(pregunta, k=k)
+        # ✨ Deadline: al vencer cancela el token y la generación pasa a modo degradado
+        deadline = None
+        if timeout is not None:
+            cancel = cancel or CancelToken()
+            deadline = Deadline(timeout, cancel)
+        
+        def run(token: Optional[CancelToken]) -> Dict:
+            return self._run_query(pregunta, k, temperature, verbose, max_tokens, strategy, token)
+        
+        start = time.perf_counter()
+        self.metrics.queries_in_progress.inc()
+        try:
+            if not (self.config and self.config.enable_coalescing):
+                resultado = run(cancel)
+            else:
+                # ✨ Consultas idénticas en curso comparten un único retrieval + generación
+                key = (normalize_query(pregunta), k, strategy, temperature, max_tokens, self.ollama_model)
+                try:
+                    resultado, shared = self.single_flight.do(key, run, cancel=cancel)
+                except GenerationCancelled as e:
+                    if e.reason != DEADLINE_EXCEEDED:
+                        raise
+                    # Seguidor con el deadline vencido: mismo modo degradado que sin coalescer
+                    resultado, shared = run(cancel), False
+                if shared:
+                    print(f"🔗 Consulta idéntica en curso: resultado compartido ('{pregunta}')")
+                    self.metrics.coalesced.inc()
+                resultado = {**resultado, 'coalesced': shared}
+            self._observe_query(resultado, strategy, time.perf_counter() - start)
+            return resultado
+        finally:
+            self.metrics.queries_in_progress.dec()
+            if deadline:
+                deadline.clear()
+    
+    def _observe_query(self, resultado: Dict, strategy: Optional[str], seconds: float):
+        """Registrar duración total y resultado de la consulta en las métricas"""
+        if not resultado.get('success', False):
+            outcome = "error"
+        elif resultado.get('fallback_reason'):
+            outcome = "degraded"
+        else:
+            outcome = "success"
+        self.metrics.query_seconds.observe(
+            seconds,
+            strategy=resultado.get('strategy', strategy or "Legacy"),
+            model=resultado.get('model', self.ollama_model),
+            outcome=outcome
+        )
+        self.metrics.queries.inc(
+            strategy=resultado.get('strategy', strategy or "Legacy"),
+            model=resultado.get('model', self.ollama_model),
+            outcome=outcome
+        )
+    
+    def _run_query(
+        self,
+        pregunta: str,
+        k: int,
+        temperature: float,
+        verbose: bool,
+        max_tokens: Optional[int],
+        strategy: Optional[str],
+        cancel: Optional[CancelToken] = None
+    ) -> Dict:
+        """Retrieval + generación de una consulta con parámetros ya resueltos"""
+        if cancel is not None and cancel.reason != DEADLINE_EXCEEDED:
+            cancel.raise_if_cancelled()
+        print("\n" + "="*60)
+        print("📋 CONSULTA RAG BPG")
+        print("="*60)
+        
+        timings: Dict[str, float] = {}
+        
+        # 1. RETRIEVAL (el embedding de la query se reutiliza en la compresión)
+        stage_start = time.perf_counter()
+        query_embedding = self.embed_query(pregunta)
+        timings['embedding'] = time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        docs_relevantes = self.retrieve_documents(pregunta, k=k, query_embedding=query_embedding)
+        timings['vector_search'] = time.perf_counter() - stage_start
         
         if verbose and docs_relevantes:
             print("\n📄 Documentos recuperados:")
@@ -398,16 +1088,32 @@ RESPUESTA:"""
         resultado = self.generate_answer(
             query=pregunta,
             context_docs=docs_relevantes,
-            temperature=temperature
+            temperature=temperature,
+            max_tokens=max_tokens,
+            query_embedding=query_embedding,
+            strategy=strategy,
+            cancel=cancel,
+            timings=timings
+        )
+        self.metrics.observe_stages(
+            timings,
+            strategy=resultado.get('strategy', strategy or "Legacy"),
+            model=resultado.get('model', self.ollama_model)
         )
         
         # Agregar información de retrieval al resultado
         resultado['retrieved_docs'] = docs_relevantes
         resultado['query'] = pregunta
         resultado['k_used'] = k
+        resultado['timings'] = {stage: round(seconds, 4) for stage, seconds in timings.items()}
         
         return resultado
     
+    @staticmethod
+    def _format_timings(timings: Dict[str, float]) -> str:
+        """Etapas de la consulta en una línea (milisegundos)"""
+        return " | ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in timings.items())
+    
     def chat_interactivo(self):
         """Modo chat interactivo para pruebas"""
         print("\n" + "="*60)
@@ -452,6 +1158,12 @@ RESPUESTA:"""
                 if resultado['success']:
                     print(f"\n🤖 Asistente BPG: {resultado['answer']}")
                     print(f"\n⏱️  Tiempo: {resultado['total_eval_duration']:.2f}s")
+                    if resultado.get('timings'):
+                        print(f"⏱️  Etapas: {self._format_timings(resultado['timings'])}")
+                    if resultado.get('eval_count'):
+                        print(f"🔢 Tokens: {resultado['prompt_eval_count']} prompt "
+                              f"({resultado['prompt_tokens_per_sec']} tok/s) | "
+                              f"{resultado['eval_count']} generados ({resultado['generated_tokens_per_sec']} tok/s)")
                     print(f"📊 Docs: {resultado['num_docs_used']} | Estrategia: {resultado.get('strategy', 'N/A')}")
                     
                     # Guardar validación para comando 'reporte'
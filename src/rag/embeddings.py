@@ -1,4 +1,5 @@
 import json
+import sys
 from pathlib import Path
 from sentence_transformers import SentenceTransformer
 import chromadb
@@ -7,9 +8,19 @@ from tqdm import tqdm
 import numpy as np
 import shutil
 
+# Agregar la raíz del proyecto al path (para importar utils/)
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.sentence_index import SentenceIndex
+from utils.vocabulary_index import VocabularyIndex
+
 # Rutas
 CHUNKS_FILE = Path("data/processed/chunks.json")
 CHROMA_DIR = Path("models/chroma_db")
+SENTENCE_INDEX_DIR = Path("models/sentence_index")
+VOCABULARY_INDEX_DIR = Path("models/vocabulary_index")
 CHROMA_DIR.mkdir(parents=True, exist_ok=True)
 
 # Configuración
@@ -125,6 +136,26 @@ def generate_and_store_embeddings(chunks, model, collection):
         print(f"⚠️  ADVERTENCIA: Se esperaban {len(chunks)} vectores, pero se guardaron {stored_count}")
     print()
 
+def build_sentence_index(chunks, model):
+    """Precalcula embeddings de oraciones para la compresión contextual"""
+    print("✂️  Generando índice de oraciones...")
+    
+    index = SentenceIndex.build(chunks, model)
+    index.save(str(SENTENCE_INDEX_DIR))
+    
+    print(f"✅ {len(index)} oraciones indexadas en {SENTENCE_INDEX_DIR}\n")
+    return index
+
+def build_vocabulary_index(chunks):
+    """Precalcula las palabras significativas de cada chunk para la validación"""
+    print("🔤 Generando índice de vocabulario...")
+    
+    index = VocabularyIndex.build(chunks)
+    index.save(str(VOCABULARY_INDEX_DIR))
+    
+    print(f"✅ Vocabulario de {len(index)} chunks guardado en {VOCABULARY_INDEX_DIR}\n")
+    return index
+
 def verify_storage(collection, model):
     """Verifica que los datos se guardaron correctamente"""
     print("🔍 Verificando almacenamiento...")
@@ -177,7 +208,13 @@ def main():
         # 4. Generar y guardar embeddings
         generate_and_store_embeddings(chunks, model, collection)
         
-        # 5. Verificar
+        # 5. Índice de oraciones (compresión contextual)
+        sentence_index = build_sentence_index(chunks, model)
+        
+        # 6. Vocabulario por chunk (validación de relevancia contextual)
+        build_vocabulary_index(chunks)
+        
+        # 7. Verificar
         verify_storage(collection, model)
         
         print("\n" + "=" * 60)
@@ -186,6 +223,7 @@ def main():
         print(f"\n📊 Resumen:")
         print(f"   • Chunks procesados: {len(chunks)}")
         print(f"   • Vectores en ChromaDB: {collection.count()}")
+        print(f"   • Oraciones indexadas: {len(sentence_index)}")
         print(f"   • Dimensión embeddings: {embedding_dim}")
         print(f"   • Ubicación: {CHROMA_DIR}")
         print(f"   • Modelo: {EMBEDDING_MODEL}")
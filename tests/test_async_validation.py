@@ -0,0 +1,169 @@
+"""
+Tests para la validación de respuestas en segundo plano
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.async_validation import AsyncValidator, DONE, FAILED, PENDING
+from utils.metrics import RAGMetrics
+from utils.validators import ResponseValidator
+
+
+CONTEXT = (
+    "Fragmento 1 (Similaridad: 0.9):\n"
+    "Los bebederos deben limpiarse semanalmente y el agua debe ser de buena calidad "
+    "para garantizar el bienestar animal del rodeo."
+)
+ANSWER = (
+    "Para garantizar el bienestar animal, los bebederos deben limpiarse "
+    "semanalmente y el agua debe ser de buena calidad para todo el rodeo."
+)
+QUERY = "¿Cada cuánto se limpian los bebederos?"
+
+
+class BlockingValidator:
+    """Validador que espera una señal antes de responder"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.inner = ResponseValidator()
+
+    def validate_response(self, **kwargs):
+        self.release.wait(5)
+        return self.inner.validate_response(**kwargs)
+
+
+class BrokenValidator:
+    def validate_response(self, **kwargs):
+        raise RuntimeError("validador roto")
+
+
+def test_submit_returns_immediately():
+    """Test: submit no espera al validador y el resultado se consulta por id"""
+    print("\n🧪 TEST 1: Validación en segundo plano")
+    print("-" * 50)
+
+    validator = BlockingValidator()
+    background = AsyncValidator(validator)
+    background.start()
+    try:
+        validation_id = background.submit(ANSWER, CONTEXT, QUERY)
+        assert background.get(validation_id)['status'] == PENDING
+        assert background.pending() == 1
+
+        validator.release.set()
+        record = background.wait(validation_id, timeout=5)
+        assert record['status'] == DONE
+        assert record['validation'] == validator.inner.validate_response(
+            response=ANSWER, context=CONTEXT, query=QUERY
+        )
+        assert record['completed_at'] is not None and record['seconds'] >= 0
+        assert background.get("no-existe") is None
+    finally:
+        background.stop()
+
+    print(f"✅ Validación {validation_id[:8]}: score {record['validation']['score']:.0%}")
+
+
+def test_errors_eviction_and_metrics():
+    """Test: Errores del validador, descarte de resultados viejos y métricas"""
+    print("\n🧪 TEST 2: Errores, descarte y métricas")
+    print("-" * 50)
+
+    broken = AsyncValidator(BrokenValidator())
+    broken.start()
+    try:
+        record = broken.wait(broken.submit(ANSWER, CONTEXT, QUERY), timeout=5)
+    finally:
+        broken.stop()
+    assert record['status'] == FAILED
+    assert "validador roto" in record['error']
+
+    metrics = RAGMetrics()
+    observed = []
+
+    def on_result(record, labels):
+        observed.append(record['validation_id'])
+        metrics.observe_validation(record['validation'], strategy=labels['strategy'])
+
+    background = AsyncValidator(ResponseValidator(), workers=2, max_results=2, on_result=on_result)
+    ids = [background.submit(ANSWER, CONTEXT, QUERY, labels={'strategy': "Standard"}) for _ in range(3)]
+    # Solo se conservan los dos más recientes
+    assert background.get(ids[0]) is None
+    background.start()
+    background.stop()
+
+    # Las métricas incluyen también la validación descartada
+    assert sorted(observed) == sorted(ids)
+    assert metrics.validations.value(strategy="Standard", result="valid") == 3
+    assert metrics.validation_score.count(strategy="Standard") == 3
+    assert background.get(ids[2])['status'] == DONE
+    assert 'rag_bpg_validation_score_bucket{strategy="Standard",le="1"} 3' in metrics.render()
+
+    metrics.observe_validation(None, strategy="Standard")
+    assert metrics.validations.value(strategy="Standard", result="error") == 1
+
+    print("✅ Errores, descarte y métricas OK")
+
+
+def test_bounded_queue_and_ttl():
+    """Test: Con la cola llena se omite la validación y los resultados vencen por TTL"""
+    print("\n🧪 TEST 3: Cola acotada y TTL de resultados")
+    print("-" * 50)
+
+    validator = BlockingValidator()
+    background = AsyncValidator(validator, max_pending=2)
+    ids = [background.submit(ANSWER, CONTEXT, QUERY) for _ in range(3)]
+    # La tercera no entra en la cola y no deja registro
+    assert ids[2] is None
+    assert background.skipped == 1
+    assert background.pending() == 2
+    assert len(background._records) == 2
+
+    validator.release.set()
+    background.start()
+    background.stop()
+    assert all(background.get(validation_id)['status'] == DONE for validation_id in ids[:2])
+
+    # Con la cola libre se vuelve a aceptar
+    assert background.submit(ANSWER, CONTEXT, QUERY) is not None
+
+    expiring = AsyncValidator(ResponseValidator(), result_ttl=0.05)
+    old_id = expiring.submit(ANSWER, CONTEXT, QUERY)
+    assert expiring.get(old_id) is not None
+    time.sleep(0.1)
+    new_id = expiring.submit(ANSWER, CONTEXT, QUERY)
+    assert expiring.get(old_id) is None
+    assert expiring.get(new_id)['status'] == PENDING
+    assert len(expiring._records) == 1
+
+    print("✅ Cola acotada y TTL OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DE VALIDACIÓN EN SEGUNDO PLANO")
+    print("="*60)
+
+    try:
+        test_submit_returns_immediately()
+        test_errors_eviction_and_metrics()
+        test_bounded_queue_and_ttl()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DE VALIDACIÓN EN SEGUNDO PLANO PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,124 @@
+"""
+Tests para la validación de respuestas en lote
+"""
+
+import sys
+import os
+import json
+import tempfile
+from pathlib import Path
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.validate_answers import main as validate_answers
+from utils.batch_validation import summarize, to_columns, validate_batch
+from utils.context_builder import join_context
+from utils.validators import ResponseValidator
+
+
+CHUNKS_FILE = os.path.join(project_root, "data", "processed", "chunks.json")
+
+
+def _items():
+    """Respuestas armadas con texto de los chunks; cada contexto se repite"""
+    with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    items = []
+    for i in range(0, 36, 3):
+        docs = [{'rank': r, 'similarity': 0.8, 'text': chunks[i + r]['text']} for r in range(3)]
+        context = join_context(docs)
+        for j, response in enumerate([
+            chunks[i]['text'][:500],
+            "• " + chunks[i + 40]['text'][:300],
+            "Según mi conocimiento no tengo esa información.",
+            "FORMATO DE RESPUESTA:\n```\ncódigo\n```",
+        ]):
+            items.append({'id': f"{i}-{j}", 'response': response, 'context': context, 'query': "¿Cómo manejar el ganado?"})
+    return items
+
+
+def test_batch_matches_single_validation():
+    """Test: El lote (en uno o varios procesos) da lo mismo que validar de a una"""
+    print("\n🧪 TEST 1: Lote equivalente a validar de a una")
+    print("-" * 50)
+
+    items = _items()
+    validator = ResponseValidator()
+    expected = [
+        {'id': item['id'], **validator.validate_response(item['response'], item['context'], item['query'])}
+        for item in items
+    ]
+
+    assert validate_batch(items) == expected
+    assert validate_batch(items, workers=2, chunk_size=25) == expected
+
+    # Sin 'id' se usa la posición en el lote completo
+    anonymous = [{k: v for k, v in item.items() if k != 'id'} for item in items]
+    assert [r['id'] for r in validate_batch(anonymous, workers=2, chunk_size=25)] == list(range(len(items)))
+
+    print(f"✅ {len(items)} respuestas, iguales en 1 y 2 procesos")
+
+
+def test_summary_and_outputs():
+    """Test: Resumen por chequeo, columnas y archivos de salida"""
+    print("\n🧪 TEST 2: Resumen y salida")
+    print("-" * 50)
+
+    items = _items()
+    results = validate_batch(items)
+    summary = summarize(results)
+    columns = to_columns(results)
+
+    assert summary['items'] == len(items)
+    assert set(summary['pass_rate']) == set(results[0]['validations'])
+    # Una de cada cuatro respuestas filtra instrucciones
+    assert summary['pass_rate']['no_instructions_leaked'] == 0.75
+    assert columns['no_code_blocks'].count(False) == len(items) // 4
+    assert len(columns['id']) == len(columns['score']) == len(items)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "respuestas.jsonl"
+        source.write_text("\n".join(json.dumps(item, ensure_ascii=False) for item in items) + "\n\n", encoding='utf-8')
+        output = Path(tmp) / "resultados.jsonl"
+        report = validate_answers([str(source), "--output", str(output)])
+
+        assert report['summary'] == summary
+        lines = output.read_text(encoding='utf-8').splitlines()
+        assert [json.loads(line) for line in lines] == results
+        assert (Path(tmp) / "resultados_summary.json").exists()
+
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("   ⚠️  pyarrow no instalado: se omite Parquet")
+        else:
+            parquet = Path(tmp) / "resultados.parquet"
+            validate_answers([str(source), "--format", "parquet", "--output", str(parquet)])
+            table = pq.read_table(parquet)
+            assert table.num_rows == len(items)
+            assert table.column('no_instructions_leaked').to_pylist() == columns['no_instructions_leaked']
+
+    print(f"✅ Válidas {summary['valid_rate']:.0%}, score promedio {summary['mean_score']:.0%}")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DE VALIDACIÓN EN LOTE")
+    print("="*60)
+
+    try:
+        test_batch_matches_single_validation()
+        test_summary_and_outputs()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DE VALIDACIÓN EN LOTE PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
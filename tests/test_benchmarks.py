@@ -0,0 +1,124 @@
+"""
+Tests para la suite de benchmarks (Ollama simulado y estadísticas)
+"""
+
+import sys
+import os
+import time
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.run_benchmarks import compare_reports, run_scenario
+from benchmarks.stats import percentile, stage_breakdown, summarize
+from utils.cancellation import CancelToken
+from utils.context_window import estimate_tokens
+from utils.ollama_client import OllamaClient
+
+
+def test_fake_ollama_rates():
+    """Test: El Ollama simulado respeta prefill/decode y devuelve los campos de Ollama"""
+    print("\n🧪 TEST 1: Ollama simulado")
+    print("-" * 50)
+
+    responses = ["uno dos tres cuatro cinco seis siete ocho nueve diez"]
+    with FakeOllama(responses=responses, prefill_rate=400.0, decode_rate=100.0) as fake:
+        client = OllamaClient(base_url=fake.url, model=fake.model)
+        assert client.ping()
+
+        # Sin streaming: prefill a 400 tok/s + 10 tokens a 100 tok/s
+        prompt = "x" * 160
+        start = time.perf_counter()
+        result = client.generate(prompt)
+        elapsed = time.perf_counter() - start
+        prefill = estimate_tokens(prompt) / 400.0
+        assert result['response'] == responses[0]
+        assert result['prompt_eval_count'] == estimate_tokens(prompt)
+        assert result['eval_count'] == 10
+        assert abs(result['prompt_eval_duration'] / 1e9 - prefill) < 0.01
+        assert prefill + 0.1 <= elapsed < 1.0
+
+        # Streaming por /api/chat, cortado por num_predict
+        result = client.chat(
+            [{'role': 'user', 'content': 'hola'}],
+            options={'num_predict': 3},
+            cancel=CancelToken()
+        )
+        assert result['response'] == "uno dos tres"
+        assert result['eval_count'] == 3
+        assert result['ttft_s'] is not None
+        assert fake.stats['streamed'] == 1
+
+    print(f"✅ Ollama simulado OK ({elapsed:.2f}s)")
+
+
+def test_percentiles_and_stages():
+    """Test: Percentiles con interpolación y desglose por etapa"""
+    print("\n🧪 TEST 2: Estadísticas")
+    print("-" * 50)
+
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.5
+    assert abs(percentile(values, 99) - 99.01) < 1e-9
+    assert percentile([], 50) is None
+
+    summary = summarize([0.1, 0.2, 0.3])
+    assert summary['count'] == 3
+    assert summary['p50'] == 0.2
+    assert summary['max'] == 0.3
+
+    stages = stage_breakdown([{'embedding': 0.01, 'llm': 2.0}, {'embedding': 0.03}, None])
+    assert stages['embedding']['count'] == 2
+    assert stages['llm']['p50'] == 2.0
+
+    print("✅ Estadísticas OK")
+
+
+def test_run_scenario_and_compare():
+    """Test: Escenario concurrente, errores y comparación entre reportes"""
+    print("\n🧪 TEST 3: Escenario y comparación")
+    print("-" * 50)
+
+    def send(query):
+        if query == "falla":
+            raise RuntimeError("boom")
+        time.sleep(0.01)
+        return {'ok': True, 'timings': {'llm': 0.01}, 'prompt_tokens': 10, 'generated_tokens': 5}
+
+    scenario = run_scenario("fake", send, ["a", "b", "c", "falla"], concurrency=2, repeat=2, warmup=0)
+    assert scenario['requests'] == 8
+    assert scenario['errors'] == 2
+    assert scenario['latency']['count'] == 6
+    assert scenario['tokens']['generated'] == 30
+    assert 'llm' in scenario['stages']
+
+    slower = {**scenario, 'latency': {**scenario['latency'], 'p50': scenario['latency']['p50'] * 2}}
+    lines = compare_reports({'scenarios': [slower]}, {'scenarios': [scenario]})
+    assert len(lines) == 1
+    assert "latency.p50" in lines[0] and "+100.0%" in lines[0]
+
+    print("✅ Escenario y comparación OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DE BENCHMARKS")
+    print("="*60)
+
+    try:
+        test_fake_ollama_rates()
+        test_percentiles_and_stages()
+        test_run_scenario_and_compare()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DE BENCHMARKS PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,139 @@
+"""
+Tests para cancelación y deadlines de consultas
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.cancellation import (
+    CancelToken, Deadline, GenerationCancelled, CLIENT_DISCONNECTED, DEADLINE_EXCEEDED
+)
+from utils.single_flight import SingleFlight
+
+
+def test_cancel_token_callbacks():
+    """Test: Cancelar ejecuta los callbacks una sola vez y guarda el motivo"""
+    print("\n🧪 TEST 1: CancelToken")
+    print("-" * 50)
+
+    token = CancelToken()
+    calls = []
+    token.register(lambda: calls.append("abort"))
+    token.cancel(CLIENT_DISCONNECTED)
+    token.cancel(DEADLINE_EXCEEDED)
+
+    assert calls == ["abort"]
+    assert token.reason == CLIENT_DISCONNECTED
+
+    # Registrar sobre un token ya cancelado ejecuta el callback en el momento
+    token.register(lambda: calls.append("tarde"))
+    assert calls == ["abort", "tarde"]
+
+    try:
+        token.raise_if_cancelled()
+        assert False, "Debería lanzar GenerationCancelled"
+    except GenerationCancelled as e:
+        assert e.reason == CLIENT_DISCONNECTED
+
+    print("✅ CancelToken OK")
+
+
+def test_deadline_cancels_token():
+    """Test: El deadline cancela el token al vencer y se puede desactivar"""
+    print("\n🧪 TEST 2: Deadline")
+    print("-" * 50)
+
+    token = CancelToken()
+    deadline = Deadline(0.05, token)
+    assert deadline.remaining() > 0
+    time.sleep(0.15)
+    assert token.cancelled and token.reason == DEADLINE_EXCEEDED
+    assert deadline.expired
+
+    token = CancelToken()
+    Deadline(0.05, token).clear()
+    time.sleep(0.1)
+    assert not token.cancelled
+
+    print("✅ Deadline OK")
+
+
+def test_single_flight_cancellation():
+    """Test: Un seguidor cancelado deja de esperar; el cómputo se cancela cuando se van todos"""
+    print("\n🧪 TEST 3: Cancelación con coalescencia")
+    print("-" * 50)
+
+    flight = SingleFlight()
+    started = threading.Event()
+    shared_tokens = []
+
+    def generation(token):
+        shared_tokens.append(token)
+        started.set()
+        # Simula un stream de Ollama que se corta al cancelar el token compartido
+        aborted = threading.Event()
+        token.register(aborted.set)
+        if aborted.wait(5):
+            raise GenerationCancelled(token.reason)
+        return "respuesta"
+
+    leader_cancel = CancelToken()
+    follower_cancel = CancelToken()
+    outcomes = {}
+
+    def call(name, cancel):
+        try:
+            outcomes[name] = flight.do("clave", generation, cancel=cancel)
+        except GenerationCancelled as e:
+            outcomes[name] = e
+
+    leader = threading.Thread(target=call, args=("lider", leader_cancel))
+    leader.start()
+    started.wait(1)
+    follower = threading.Thread(target=call, args=("seguidor", follower_cancel))
+    follower.start()
+    time.sleep(0.05)
+
+    # El seguidor se va: vuelve enseguida pero el cómputo sigue para el líder
+    follower_cancel.cancel(CLIENT_DISCONNECTED)
+    follower.join(1)
+    assert isinstance(outcomes["seguidor"], GenerationCancelled)
+    assert not shared_tokens[0].cancelled
+
+    # Se va el último participante: se cancela el cómputo compartido
+    leader_cancel.cancel(CLIENT_DISCONNECTED)
+    leader.join(1)
+    assert shared_tokens[0].cancelled
+    assert isinstance(outcomes["lider"], GenerationCancelled)
+    assert flight.get_stats()['abandoned'] == 1
+    assert flight.in_flight() == 0
+
+    print("✅ Cancelación con coalescencia OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DE CANCELACIÓN Y DEADLINES")
+    print("="*60)
+
+    try:
+        test_cancel_token_callbacks()
+        test_deadline_cancels_token()
+        test_single_flight_cancellation()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DE CANCELACIÓN PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,86 @@
+"""
+Tests para el barrido de parámetros del chunker
+"""
+
+import sys
+import os
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.chunking_sweep import load_documents, recommend, run_sweep, sweep_chunks
+from benchmarks.retrieval_eval import load_chunks, load_golden
+
+
+def test_sweep_chunks_overlap_words():
+    """Test: El overlap entre chunks del barrido respeta overlap_words"""
+    print("\n🧪 TEST 1: Overlap del barrido")
+    print("-" * 50)
+
+    paragraphs = [" ".join(f"p{i}w{j}" for j in range(40)) for i in range(10)]
+    text = "\n\n".join(paragraphs)
+
+    without = sweep_chunks(text, target_words=100, overlap_words=0)
+    with_overlap = sweep_chunks(text, target_words=100, overlap_words=15)
+
+    # Sin overlap cada palabra aparece una sola vez
+    assert sum(len(c.split()) for c in without) == 400
+    for previous, following in zip(with_overlap, with_overlap[1:]):
+        assert following.split()[:15] == previous.split()[-15:]
+
+    print("✅ Overlap del barrido OK")
+
+
+def test_sweep_lexical():
+    """Test: Barrido en procesos separados con el índice léxico"""
+    print("\n🧪 TEST 2: Barrido de chunking")
+    print("-" * 50)
+
+    documents = load_documents()
+    golden = load_golden(chunks=load_chunks())
+    grid = [
+        {
+            'target_words': target, 'overlap_words': 25, 'backend': 'lexical',
+            'documents': documents, 'golden': golden, 'ks': [1, 5], 'k': 5,
+            'strategy': 'standard', 'token_budget': 4000, 'embedding_model': None
+        }
+        for target in (200, 500)
+    ]
+    results = run_sweep(grid, workers=2)
+
+    assert [r['target_words'] for r in results] == [200, 500]
+    small, large = results
+    assert small['chunks'] > large['chunks']
+    for result in results:
+        assert result['index_bytes'] > 0
+        assert result['prompt_tokens'] > 0
+        assert 0 < result['recall'][5] <= 1
+    print(f"   200 palabras: {small['prompt_tokens']} tokens | 500 palabras: {large['prompt_tokens']} tokens")
+
+    # Con tolerancia total gana la de menos tokens
+    cheapest = min(results, key=lambda r: r['prompt_tokens'])
+    assert recommend(results, 5, max_recall_drop=1.0) is cheapest
+
+    print("✅ Barrido de chunking OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DEL BARRIDO DE CHUNKING")
+    print("="*60)
+
+    try:
+        test_sweep_chunks_overlap_words()
+        test_sweep_lexical()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DEL BARRIDO DE CHUNKING PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,119 @@
+"""
+Tests para el circuit breaker y la caché de respuestas del modo degradado
+"""
+
+import sys
+import os
+import time
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from utils.answer_cache import AnswerCache, normalize_query
+
+
+def test_opens_after_threshold():
+    """Test: El circuito se abre tras N fallas seguidas y rechaza requests"""
+    print("\n🧪 TEST 1: Apertura del circuito")
+    print("-" * 50)
+
+    breaker = CircuitBreaker(failure_threshold=3)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+    snapshot = breaker.snapshot()
+    assert snapshot['rejected'] == 1
+    assert snapshot['times_opened'] == 1
+
+    print(f"✅ Circuito abierto: {snapshot['state']}")
+
+
+def test_slow_calls_count_as_failures():
+    """Test: Las respuestas más lentas que el umbral cuentan como falla"""
+    print("\n🧪 TEST 2: Llamados lentos")
+    print("-" * 50)
+
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=10)
+    breaker.record_success(1.0)
+    breaker.record_success(30.0)
+    breaker.record_success(45.0)
+
+    assert breaker.state == OPEN
+    assert breaker.snapshot()['slow_calls'] == 2
+
+    print("✅ Llamados lentos abren el circuito")
+
+
+def test_probe_and_half_open_trial():
+    """Test: El sondeo pasa a half_open y un único request de prueba cierra el circuito"""
+    print("\n🧪 TEST 3: Sondeo y request de prueba")
+    print("-" * 50)
+
+    breaker = CircuitBreaker(failure_threshold=1, probe_interval=0.01, probe=lambda: True)
+    breaker.record_failure()
+    for _ in range(100):
+        if breaker.state == HALF_OPEN:
+            break
+        time.sleep(0.01)
+    assert breaker.state == HALF_OPEN
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # solo un request de prueba a la vez
+    breaker.record_success(0.5)
+    assert breaker.state == CLOSED
+    breaker.stop()
+
+    print("✅ Circuito cerrado tras la prueba")
+
+
+def test_answer_cache():
+    """Test: Caché LRU por pregunta normalizada y estrategia"""
+    print("\n🧪 TEST 4: Caché de respuestas")
+    print("-" * 50)
+
+    assert normalize_query("  ¿Qué es el BIENESTAR animal? ") == "que es el bienestar animal"
+
+    cache = AnswerCache(max_entries=2)
+    cache.put("¿Qué es el bienestar animal?", "Standard", {'answer': 'a'})
+    assert cache.get("que es el bienestar animal", "standard")['answer'] == 'a'
+    assert cache.get("que es el bienestar animal", "Concise") is None
+
+    cache.put("pregunta dos", "Standard", {'answer': 'b'})
+    cache.put("pregunta tres", "Standard", {'answer': 'c'})
+    assert len(cache) == 2
+    # La entrada menos usada recientemente se descarta
+    assert cache.get("¿Qué es el bienestar animal?", "Standard") is None
+    assert cache.get("pregunta tres", "Standard")['answer'] == 'c'
+
+    print(f"✅ Caché OK: {cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DEL CIRCUIT BREAKER")
+    print("="*60)
+
+    try:
+        test_opens_after_threshold()
+        test_slow_calls_count_as_failures()
+        test_probe_and_half_open_trial()
+        test_answer_cache()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DEL CIRCUIT BREAKER PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
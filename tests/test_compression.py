@@ -0,0 +1,124 @@
+"""
+Tests para el índice de oraciones y la compresión contextual
+"""
+
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.sentence_index import SentenceIndex, split_into_sentences
+from utils.compression import SentenceCompressor, GAP_MARK
+
+
+def _make_index():
+    """Índice chico con embeddings en ejes conocidos"""
+    sentences = [
+        "La rampa debe tener pendiente máxima de 20°.",   # chunk a, fila 0
+        "El piso debe ser antideslizante.",               # chunk a, fila 1
+        "Los corrales deben tener sombra.",               # chunk a, fila 2
+        "El agua debe estar limpia.",                     # chunk a, fila 3
+        "Los bebederos se limpian a diario.",             # chunk b, fila 4
+        "La rampa debe tener pendiente máxima de 20°.",   # chunk b, fila 5 (overlap)
+    ]
+    chunk_ids = ["a", "a", "a", "a", "b", "b"]
+    embeddings = np.array([
+        [1.0, 0.0, 0.0],
+        [0.8, 0.6, 0.0],
+        [0.0, 1.0, 0.0],
+        [0.0, 0.0, 1.0],
+        [0.0, 0.2, 0.98],
+        [1.0, 0.0, 0.0],
+    ], dtype=np.float32)
+    return SentenceIndex(sentences, chunk_ids, embeddings)
+
+
+def _docs():
+    return [
+        {'rank': 1, 'chunk_id': 'a', 'text': 'texto a', 'similarity': 0.9},
+        {'rank': 2, 'chunk_id': 'b', 'text': 'texto b', 'similarity': 0.8},
+        {'rank': 3, 'chunk_id': 'zzz', 'text': 'sin indexar', 'similarity': 0.7},
+    ]
+
+
+def test_split_sentences():
+    """Test: División en oraciones"""
+    print("\n🧪 TEST 1: División en oraciones")
+    print("-" * 50)
+
+    sentences = split_into_sentences("Primera oración. ¿Segunda? Tercera!  Cuarta")
+    assert sentences == ["Primera oración.", "¿Segunda?", "Tercera!", "Cuarta"]
+
+    print("✅ División OK")
+
+
+def test_index_score_and_persistence():
+    """Test: Puntuación vectorizada y guardado/carga del índice"""
+    print("\n🧪 TEST 2: Índice de oraciones")
+    print("-" * 50)
+
+    index = _make_index()
+    rows, scores = index.score(["a"], [2.0, 0.0, 0.0])
+
+    assert list(rows) == [0, 1, 2, 3]
+    assert np.argmax(scores) == 0
+    assert abs(scores[0] - 1.0) < 1e-6
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(tmp)
+        loaded = SentenceIndex.load(tmp)
+    assert len(loaded) == len(index)
+    assert loaded.rows_for("b") == range(4, 6)
+
+    print("✅ Índice OK")
+
+
+def test_compress_keeps_top_and_neighbors():
+    """Test: Se conservan las oraciones top, sus vecinas y se evitan duplicados"""
+    print("\n🧪 TEST 3: Compresión")
+    print("-" * 50)
+
+    compressor = SentenceCompressor(_make_index(), top_sentences=1, neighbors=1)
+    docs, stats = compressor.compress(_docs(), [1.0, 0.0, 0.0])
+
+    # Chunk a: fila 0 (top) + fila 1 (vecina); chunk b: solo la oración repetida -> se descarta
+    assert docs[0]['text'] == ("La rampa debe tener pendiente máxima de 20°. "
+                               "El piso debe ser antideslizante.")
+    assert docs[0]['compressed'] is True
+    # El documento sin indexar pasa sin cambios
+    assert docs[-1]['text'] == 'sin indexar'
+    assert stats['sentences_scored'] == 6
+
+    # Grupos no contiguos se separan con la marca
+    compressor = SentenceCompressor(_make_index(), top_sentences=2, neighbors=0)
+    docs, _ = compressor.compress(_docs()[:1], [0.7, 0.0, 0.7])
+    assert GAP_MARK in docs[0]['text']
+
+    print(f"✅ Compresión OK (ratio {stats['compression_ratio']})")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DE COMPRESIÓN CONTEXTUAL")
+    print("="*60)
+
+    try:
+        test_split_sentences()
+        test_index_score_and_persistence()
+        test_compress_keeps_top_and_neighbors()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DE COMPRESIÓN PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
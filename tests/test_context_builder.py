@@ -0,0 +1,118 @@
+"""
+Tests para el constructor de contexto (overlap, fusión y presupuesto de tokens)
+"""
+
+import sys
+import os
+import json
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.context_builder import ContextBuilder, find_overlap
+from utils.context_window import estimate_tokens
+
+
+CHUNKS_FILE = os.path.join(project_root, "data", "processed", "chunks.json")
+
+
+def _load_docs(indices):
+    """Convertir chunks reales al formato de retrieve_documents"""
+    with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    docs = []
+    for rank, i in enumerate(indices, 1):
+        chunk = chunks[i]
+        docs.append({
+            'rank': rank,
+            'text': chunk['text'],
+            'similarity': round(0.9 - rank * 0.05, 4),
+            'metadata': {
+                'source': chunk['source'],
+                'chunk_number': chunk['chunk_number']
+            }
+        })
+    return docs
+
+
+def test_find_overlap():
+    """Test: Detectar overlap entre chunks consecutivos"""
+    print("\n🧪 TEST 1: Detección de overlap")
+    print("-" * 50)
+
+    assert find_overlap("uno dos tres cuatro", "tres cuatro cinco") == 2
+    assert find_overlap("uno dos", "tres cuatro") == 0
+    assert find_overlap("", "algo") == 0
+
+    first, second = _load_docs([0, 1])
+    overlap = find_overlap(first['text'], second['text'])
+    assert overlap > 0
+
+    print(f"✅ Overlap real entre chunk 1 y 2: {overlap} palabras")
+
+
+def test_merge_adjacent_chunks():
+    """Test: Fusionar chunks consecutivos de la misma fuente"""
+    print("\n🧪 TEST 2: Fusión de chunks consecutivos")
+    print("-" * 50)
+
+    # Rank 1 = chunk 2, rank 2 = chunk de otra fuente, rank 3 = chunk 1
+    docs = _load_docs([1, 40, 0])
+    builder = ContextBuilder(token_budget=100000)
+
+    passages, stats = builder.build(docs)
+
+    assert len(passages) == 2
+    assert passages[0]['metadata']['chunk_numbers'] == [1, 2]
+    assert passages[0]['rank'] == 1
+    assert stats['merged_chunks'] == 1
+    assert stats['overlap_words_removed'] > 0
+    assert stats['tokens_saved'] > 0
+
+    # El texto fusionado no repite el overlap
+    merged_words = len(passages[0]['text'].split())
+    original_words = len(docs[0]['text'].split()) + len(docs[2]['text'].split())
+    assert merged_words == original_words - stats['overlap_words_removed']
+
+    print(f"✅ Tokens ahorrados: {stats['tokens_saved']}")
+
+
+def test_budget_in_relevance_order():
+    """Test: Se respeta el presupuesto de tokens por orden de relevancia"""
+    print("\n🧪 TEST 3: Presupuesto de tokens")
+    print("-" * 50)
+
+    docs = _load_docs([0, 10, 20, 40, 60])
+    one_doc = estimate_tokens(docs[0]['text'])
+    builder = ContextBuilder(token_budget=one_doc * 2, merge_adjacent=False)
+
+    passages, stats = builder.build(docs)
+
+    assert passages[0]['rank'] == 1
+    assert stats['tokens_after'] <= one_doc * 2
+    assert stats['dropped_passages'] + stats['truncated_passages'] >= 3
+
+    print(f"✅ Pasajes: {len(passages)}, tokens: {stats['tokens_after']}")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DEL CONSTRUCTOR DE CONTEXTO")
+    print("="*60)
+
+    try:
+        test_find_overlap()
+        test_merge_adjacent_chunks()
+        test_budget_in_relevance_order()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DEL CONSTRUCTOR DE CONTEXTO PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,133 @@
+"""
+Tests para el dimensionamiento de num_ctx y el recorte de contexto
+"""
+
+import sys
+import os
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.context_window import (
+    estimate_tokens,
+    select_num_ctx,
+    trim_docs_to_budget,
+    NumCtxSelector
+)
+
+
+def _format(doc):
+    return f"Fragmento {doc['rank']}:\n{doc['text']}"
+
+
+def _doc(rank, words):
+    return {'rank': rank, 'similarity': 0.5, 'text': ' '.join(['palabra'] * words)}
+
+
+def test_select_smallest_bucket():
+    """Test: Se elige el bucket más chico que entra"""
+    print("\n🧪 TEST 1: Selección de bucket")
+    print("-" * 50)
+
+    buckets = (2048, 4096, 8192)
+
+    assert select_num_ctx(500, 300, buckets) == 2048
+    assert select_num_ctx(1800, 300, buckets) == 4096
+    assert select_num_ctx(7000, 700, buckets) == 8192
+    # Si no entra en ninguno, el más grande
+    assert select_num_ctx(20000, 700, buckets) == 8192
+
+    print("✅ Buckets OK")
+
+
+def test_selector_sizes_each_prompt():
+    """Test: Cada consulta usa el bucket justo; current sigue al último enviado"""
+    print("\n🧪 TEST 2: num_ctx por consulta")
+    print("-" * 50)
+
+    selector = NumCtxSelector((2048, 4096, 8192), initial=4096)
+    assert selector.select(500, 300) == 2048
+    assert selector.select(7000, 700) == 8192
+    assert selector.current == 8192
+    assert selector.select(500, 300) == 2048
+    assert selector.current == 2048
+
+    print("✅ num_ctx por consulta OK")
+
+
+def test_selector_only_grows():
+    """Test: Con sticky el num_ctx no baja del último cargado (evita recargas en Ollama)"""
+    print("\n🧪 TEST 3: num_ctx pegajoso")
+    print("-" * 50)
+
+    selector = NumCtxSelector((2048, 4096, 8192), initial=4096, sticky=True)
+    assert selector.select(500, 300) == 4096
+    assert selector.select(7000, 700) == 8192
+    # Un prompt chico después de uno grande reusa el modelo ya cargado
+    assert selector.select(500, 300) == 8192
+    assert selector.current == 8192
+
+    assert NumCtxSelector((4096, 2048)).current == 2048
+
+    print("✅ num_ctx pegajoso OK")
+
+
+def test_estimate_tokens():
+    """Test: Estimación de tokens proporcional al largo"""
+    print("\n🧪 TEST 4: Estimación de tokens")
+    print("-" * 50)
+
+    assert estimate_tokens("") == 0
+    short = estimate_tokens("La rampa de carga debe tener pendiente suave")
+    long = estimate_tokens("La rampa de carga debe tener pendiente suave " * 10)
+
+    assert 0 < short < long
+
+    print(f"✅ Tokens estimados: {short} / {long}")
+
+
+def test_trim_keeps_most_relevant():
+    """Test: El recorte conserva los documentos de mayor rank"""
+    print("\n🧪 TEST 5: Recorte controlado")
+    print("-" * 50)
+
+    docs = [_doc(1, 100), _doc(2, 100), _doc(3, 100), _doc(4, 100)]
+    one_doc = estimate_tokens(_format(docs[0]))
+
+    kept, trimmed = trim_docs_to_budget(docs, one_doc * 2 + 60, _format)
+
+    assert [d['rank'] for d in kept] == [1, 2, 3]
+    assert kept[-1]['truncated'] is True
+    assert trimmed == 2
+    assert sum(estimate_tokens(_format(d)) for d in kept) <= one_doc * 2 + 60 + 5
+
+    # Presupuesto amplio: no se recorta nada
+    kept, trimmed = trim_docs_to_budget(docs, one_doc * 10, _format)
+    assert len(kept) == 4 and trimmed == 0
+
+    print("✅ Recorte OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DE VENTANA DE CONTEXTO")
+    print("="*60)
+
+    try:
+        test_select_smallest_bucket()
+        test_selector_sizes_each_prompt()
+        test_selector_only_grows()
+        test_estimate_tokens()
+        test_trim_keeps_most_relevant()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DE VENTANA DE CONTEXTO PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
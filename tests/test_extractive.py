@@ -0,0 +1,128 @@
+"""
+Tests para el modo de respuesta extractiva (sin LLM)
+"""
+
+import sys
+import os
+import time
+
+import numpy as np
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.sentence_index import SentenceIndex
+from utils.extractive import ExtractiveAnswerer, NO_INFO_MESSAGE
+
+
+def _make_index():
+    """Índice chico con embeddings en ejes conocidos"""
+    sentences = [
+        "La rampa debe tener pendiente máxima de 20°.",   # chunk a
+        "El piso de la rampa debe ser antideslizante.",   # chunk a
+        "Corto.",                                         # chunk a (muy corta)
+        "El agua de bebida debe estar limpia.",           # chunk b
+        "La rampa debe tener pendiente máxima de 20°.",   # chunk b (overlap)
+    ]
+    chunk_ids = ["a", "a", "a", "b", "b"]
+    embeddings = np.array([
+        [1.0, 0.0, 0.0],
+        [0.8, 0.6, 0.0],
+        [1.0, 0.0, 0.0],
+        [0.0, 0.0, 1.0],
+        [1.0, 0.0, 0.0],
+    ], dtype=np.float32)
+    return SentenceIndex(sentences, chunk_ids, embeddings)
+
+
+def _docs():
+    return [
+        {'rank': 1, 'chunk_id': 'a', 'text': 'texto a',
+         'metadata': {'source': 'manual_bovinos.txt', 'chunk_number': 3}},
+        {'rank': 2, 'chunk_id': 'b', 'text': 'texto b',
+         'metadata': {'source': 'manual_agua.txt', 'chunk_number': 7}},
+    ]
+
+
+def test_extractive_bullets_with_citations():
+    """Test: Viñetas ordenadas por similitud, con cita y sin duplicados"""
+    print("\n🧪 TEST 1: Respuesta extractiva")
+    print("-" * 50)
+
+    answerer = ExtractiveAnswerer(_make_index(), max_sentences=5)
+    result = answerer.answer(_docs(), [1.0, 0.0, 0.0])
+
+    texts = [s['text'] for s in result['sentences']]
+    # La oración repetida por overlap aparece una sola vez, la corta se descarta
+    assert texts == [
+        "La rampa debe tener pendiente máxima de 20°.",
+        "El piso de la rampa debe ser antideslizante.",
+    ]
+    assert "(manual_bovinos.txt, fragmento 3)" in result['answer']
+    assert result['answer'].count("•") == 2
+
+    print(f"✅ Respuesta:\n{result['answer']}")
+
+
+def test_extractive_no_match():
+    """Test: Sin oraciones relevantes se devuelve el mensaje estándar"""
+    print("\n🧪 TEST 2: Sin información relevante")
+    print("-" * 50)
+
+    answerer = ExtractiveAnswerer(_make_index(), min_score=0.7)
+    result = answerer.answer(_docs(), [0.0, 1.0, 0.0])
+    assert result['answer'] == NO_INFO_MESSAGE
+    assert result['sentences'] == []
+
+    # Documentos no indexados tampoco rompen
+    result = answerer.answer([{'chunk_id': 'zzz', 'text': 'x'}], [1.0, 0.0, 0.0])
+    assert result['answer'] == NO_INFO_MESSAGE
+
+    print("✅ Mensaje sin información OK")
+
+
+def test_extractive_latency():
+    """Test: Responde en decenas de milisegundos con un índice realista"""
+    print("\n🧪 TEST 3: Latencia")
+    print("-" * 50)
+
+    rng = np.random.default_rng(0)
+    n_chunks, per_chunk, dim = 100, 30, 384
+    chunk_ids = [f"c{i}" for i in range(n_chunks) for _ in range(per_chunk)]
+    sentences = [f"Oración número {i} del manual de buenas prácticas." for i in range(len(chunk_ids))]
+    embeddings = rng.normal(size=(len(chunk_ids), dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    answerer = ExtractiveAnswerer(SentenceIndex(sentences, chunk_ids, embeddings), min_score=-1.0)
+
+    docs = [{'chunk_id': f"c{i}", 'metadata': {}} for i in range(10)]
+    start = time.perf_counter()
+    result = answerer.answer(docs, rng.normal(size=dim))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    assert len(result['sentences']) == 5
+    assert elapsed_ms < 50
+
+    print(f"✅ Respuesta en {elapsed_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DEL MODO EXTRACTIVO")
+    print("="*60)
+
+    try:
+        test_extractive_bullets_with_citations()
+        test_extractive_no_match()
+        test_extractive_latency()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DEL MODO EXTRACTIVO PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
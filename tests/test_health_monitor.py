@@ -0,0 +1,150 @@
+"""
+Tests para el monitor de salud en segundo plano
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.health_monitor import HealthMonitor
+
+
+class FakeChecks:
+    """Verificación que cuenta las llamadas y devuelve un estado configurable"""
+
+    def __init__(self):
+        self.calls = 0
+        self.ollama = True
+
+    def __call__(self):
+        self.calls += 1
+        return {'ollama_available': self.ollama, 'chroma_available': True, 'ready': self.ollama}
+
+
+def test_snapshot_served_from_cache():
+    """Test: Las consultas al estado no repiten la verificación"""
+    print("\n🧪 TEST 1: Estado cacheado")
+    print("-" * 50)
+
+    checks = FakeChecks()
+    monitor = HealthMonitor(checks, interval=60)
+
+    # Sin primera verificación: 'starting' no listo, sin llamar a check
+    starting = monitor.snapshot()
+    assert starting['starting'] and not starting['ready']
+    assert checks.calls == 0
+
+    first = monitor.refresh()
+    start = time.perf_counter()
+    for _ in range(1000):
+        snapshot = monitor.snapshot()
+    per_call_us = (time.perf_counter() - start) / 1000 * 1e6
+
+    assert checks.calls == 1
+    assert first['ready'] and snapshot['ready']
+    assert snapshot['age_seconds'] >= 0
+    assert 'timestamp' in snapshot
+
+    print(f"✅ {per_call_us:.1f} µs por consulta")
+
+
+def test_background_refresh_and_staleness():
+    """Test: El hilo refresca el estado y una foto vieja deja de estar lista"""
+    print("\n🧪 TEST 2: Refresco y antigüedad")
+    print("-" * 50)
+
+    checks = FakeChecks()
+    monitor = HealthMonitor(checks, interval=0.02, max_age=0.2)
+    monitor.start()
+    time.sleep(0.1)
+    checks.ollama = False
+    time.sleep(0.1)
+    assert checks.calls >= 3
+    assert not monitor.is_ready()
+    monitor.stop()
+
+    # Con el hilo detenido la foto envejece y se marca como no lista
+    checks.ollama = True
+    monitor.refresh()
+    assert monitor.is_ready()
+    time.sleep(0.25)
+    snapshot = monitor.snapshot()
+    assert snapshot['stale'] and not snapshot['ready']
+
+    print("✅ Refresco y antigüedad OK")
+
+
+def test_failing_check():
+    """Test: Una verificación que lanza excepción deja el estado como no listo"""
+    print("\n🧪 TEST 3: Verificación con error")
+    print("-" * 50)
+
+    def broken():
+        raise RuntimeError("ChromaDB no responde")
+
+    monitor = HealthMonitor(broken)
+    monitor.refresh()
+    snapshot = monitor.snapshot()
+    assert snapshot['ready'] is False
+    assert "ChromaDB" in snapshot['error']
+
+    print("✅ Error registrado en el estado")
+
+
+def test_slow_first_check_does_not_block():
+    """Test: Mientras el hilo hace la primera verificación, snapshot responde sin esperar"""
+    print("\n🧪 TEST 4: Primera verificación lenta")
+    print("-" * 50)
+
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return {'ollama_available': True, 'chroma_available': True, 'ready': True}
+
+    monitor = HealthMonitor(slow, interval=60)
+    monitor.start()
+    start = time.perf_counter()
+    snapshot = monitor.snapshot()
+    elapsed = time.perf_counter() - start
+    assert snapshot['starting'] and not snapshot['ready']
+    assert elapsed < 0.1
+
+    release.set()
+    for _ in range(100):
+        if monitor.is_ready():
+            break
+        time.sleep(0.01)
+    assert monitor.is_ready()
+    assert 'starting' not in monitor.snapshot()
+    monitor.stop()
+
+    print(f"✅ Estado 'starting' en {elapsed * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DEL MONITOR DE SALUD")
+    print("="*60)
+
+    try:
+        test_snapshot_served_from_cache()
+        test_background_refresh_and_staleness()
+        test_failing_check()
+        test_slow_first_check_does_not_block()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DEL MONITOR DE SALUD PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
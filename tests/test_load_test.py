@@ -0,0 +1,115 @@
+"""
+Tests para el generador de carga de la API
+"""
+
+import sys
+import os
+import json
+import random
+import tempfile
+import threading
+import time
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.load_test import arrival_times, load_corpus, run_closed_loop, run_open_loop
+
+
+def test_load_corpus_formats():
+    """Test: Export del historial de la PWA, lista JSON y texto plano"""
+    print("\n🧪 TEST 1: Corpus de consultas")
+    print("-" * 50)
+
+    history = [
+        {'id': 2, 'query': '¿Cómo vacuno?', 'answer': '...', 'strategy': 'standard',
+         'timestamp': '2025-11-01T10:00:00', 'source': 'api', 'metadata': {}},
+        {'id': 1, 'query': '  ', 'answer': '', 'source': 'cache', 'metadata': {}},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        history_file = os.path.join(tmp, 'bpg-history-2025-11-01.json')
+        with open(history_file, 'w', encoding='utf-8') as f:
+            json.dump(history, f)
+        text_file = os.path.join(tmp, 'queries.txt')
+        with open(text_file, 'w', encoding='utf-8') as f:
+            f.write("primera\n\nsegunda\n")
+
+        assert load_corpus(history_file) == ['¿Cómo vacuno?']
+        assert load_corpus(text_file) == ['primera', 'segunda']
+
+    print("✅ Corpus OK")
+
+
+def test_open_loop_poisson():
+    """Test: Llegadas Poisson independientes de la latencia del servidor"""
+    print("\n🧪 TEST 2: Lazo abierto")
+    print("-" * 50)
+
+    times = arrival_times(100.0, 10.0, random.Random(1))
+    assert 900 < len(times) < 1100
+    assert times == sorted(times)
+
+    in_flight = []
+    lock = threading.Lock()
+    current = [0]
+
+    def send(query):
+        with lock:
+            current[0] += 1
+            in_flight.append(current[0])
+        time.sleep(0.05)
+        with lock:
+            current[0] -= 1
+        return "http_503" if query == "mala" else None
+
+    # 40 consultas/s con 50 ms de servicio: ~2 en curso a la vez
+    step = run_open_loop(send, ["a", "b", "c", "mala"], rate=40.0, duration=1.0,
+                         concurrency=8, warmup=0.2, seed=3)
+    assert step['mode'] == 'open'
+    assert step['requests'] > 10
+    assert step['errors'].get('http_503', 0) > 0
+    assert step['latency']['p50'] >= 0.05
+    assert max(in_flight) > 1
+
+    print(f"✅ Lazo abierto OK ({step['requests']} consultas, {step['throughput_qps']} consultas/s)")
+
+
+def test_closed_loop_warmup():
+    """Test: Lazo cerrado excluye el calentamiento"""
+    print("\n🧪 TEST 3: Lazo cerrado")
+    print("-" * 50)
+
+    def send(query):
+        time.sleep(0.02)
+        return None
+
+    step = run_closed_loop(send, ["a"], concurrency=2, duration=0.5, warmup=0.25)
+    # ~25 consultas en total por cliente; solo la mitad final se mide
+    assert 10 <= step['requests'] <= 30
+    assert step['error_rate'] == 0.0
+    assert 40 <= step['throughput_qps'] <= 110
+
+    print(f"✅ Lazo cerrado OK ({step['throughput_qps']} consultas/s)")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DEL GENERADOR DE CARGA")
+    print("="*60)
+
+    try:
+        test_load_corpus_formats()
+        test_open_loop_poisson()
+        test_closed_loop_warmup()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DEL GENERADOR DE CARGA PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
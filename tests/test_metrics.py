@@ -0,0 +1,110 @@
+"""
+Tests para las métricas en formato Prometheus
+"""
+
+import sys
+import os
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.metrics import MetricsRegistry, RAGMetrics
+
+
+def test_counter_and_gauge():
+    """Test: Contadores y gauges con labels"""
+    print("\n🧪 TEST 1: Contadores y gauges")
+    print("-" * 50)
+
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errores", ("error_class",))
+    in_progress = registry.gauge("in_progress", "En curso")
+
+    errors.inc(error_class="timeout")
+    errors.inc(2, error_class="timeout")
+    in_progress.inc()
+    in_progress.inc()
+    in_progress.dec()
+
+    assert errors.value(error_class="timeout") == 3
+    assert in_progress.value() == 1
+
+    text = registry.render()
+    assert "# TYPE errors_total counter" in text
+    assert 'errors_total{error_class="timeout"} 3' in text
+    assert "in_progress 1" in text
+
+    # Labels incompletos son un error de programación
+    try:
+        errors.inc()
+        assert False, "Debería fallar sin labels"
+    except ValueError:
+        pass
+
+    print("✅ Contadores y gauges OK")
+
+
+def test_histogram_cumulative_buckets():
+    """Test: Buckets acumulativos, suma y conteo del histograma"""
+    print("\n🧪 TEST 2: Histograma")
+    print("-" * 50)
+
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latencia", ("stage",), buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, stage="llm")
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{stage="llm",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{stage="llm",le="1"} 3' in text
+    assert 'latency_seconds_bucket{stage="llm",le="+Inf"} 4' in text
+    assert 'latency_seconds_sum{stage="llm"} 3.65' in text
+    assert 'latency_seconds_count{stage="llm"} 4' in text
+    assert latency.count(stage="llm") == 4
+
+    print("✅ Histograma OK")
+
+
+def test_rag_metrics_stages():
+    """Test: Etapas de una consulta con estrategia y modelo como labels"""
+    print("\n🧪 TEST 3: Métricas por etapa")
+    print("-" * 50)
+
+    metrics = RAGMetrics()
+    metrics.observe_stages(
+        {'embedding': 0.02, 'vector_search': 0.004, 'llm': 4.2},
+        strategy="Optimized",
+        model="llama3.2:3b"
+    )
+
+    assert metrics.stage_seconds.count(stage="llm", strategy="Optimized", model="llama3.2:3b") == 1
+    text = metrics.render()
+    assert 'stage="vector_search",strategy="Optimized",model="llama3.2:3b",le="0.005"} 1' in text
+    assert "# TYPE rag_bpg_query_duration_seconds histogram" in text
+    assert text.endswith("\n")
+
+    print("✅ Métricas por etapa OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DE MÉTRICAS")
+    print("="*60)
+
+    try:
+        test_counter_and_gauge()
+        test_histogram_cumulative_buckets()
+        test_rag_metrics_stages()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DE MÉTRICAS PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
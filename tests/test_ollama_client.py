@@ -0,0 +1,243 @@
+"""
+Tests para el cliente Ollama (keep_alive, pre-calentamiento, cargas en frío)
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+from datetime import datetime
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.ollama_client import OllamaClient, OllamaError, ModelKeeper
+from utils.cancellation import CancelToken, GenerationCancelled
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+
+    def json(self):
+        return dict(self._data)
+
+
+class FakeSession:
+    """Sesión que registra los payloads y devuelve respuestas predefinidas"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.payloads = []
+
+    def post(self, url, json=None, timeout=None):
+        self.payloads.append(json)
+        return self.responses.pop(0)
+
+
+def test_generate_sends_keep_alive():
+    """Test: Cada generación envía el keep_alive configurado"""
+    print("\n🧪 TEST 1: keep_alive en cada request")
+    print("-" * 50)
+
+    session = FakeSession([FakeResponse(data={'response': 'ok', 'load_duration': 1000})])
+    client = OllamaClient("http://fake:11434", "llama3.1:8b", keep_alive="1h", session=session)
+
+    result = client.generate("hola", options={'temperature': 0.2})
+
+    assert session.payloads[0]['keep_alive'] == "1h"
+    assert session.payloads[0]['options'] == {'temperature': 0.2}
+    assert result['cold_load'] is False
+
+    print("✅ keep_alive enviado correctamente")
+
+
+def test_cold_load_is_counted():
+    """Test: Las cargas lentas del modelo se cuentan como carga en frío"""
+    print("\n🧪 TEST 2: Detección de carga en frío")
+    print("-" * 50)
+
+    session = FakeSession([
+        FakeResponse(data={'response': 'a', 'load_duration': int(4.5e9)}),
+        FakeResponse(data={'response': 'b', 'load_duration': int(0.01e9)}),
+    ])
+    client = OllamaClient("http://fake:11434", "m", cold_load_threshold=1.0, session=session)
+
+    first = client.generate("uno")
+    second = client.generate("dos")
+    stats = client.get_stats()
+
+    assert first['cold_load'] is True
+    assert second['cold_load'] is False
+    assert stats['requests'] == 2
+    assert stats['cold_loads'] == 1
+    assert abs(stats['total_load_time'] - 4.5) < 1e-6
+
+    print(f"✅ Cargas en frío: {stats['cold_loads']}")
+
+
+def test_warmup_and_errors():
+    """Test: Warm-up con prompt vacío y errores de status"""
+    print("\n🧪 TEST 3: Warm-up y errores")
+    print("-" * 50)
+
+    session = FakeSession([
+        FakeResponse(data={'load_duration': int(2e9)}),
+        FakeResponse(data={'load_duration': 0}),
+        FakeResponse(status_code=500),
+    ])
+    client = OllamaClient("http://fake:11434", "m", session=session)
+
+    load_time = client.warmup()
+    assert session.payloads[0]['prompt'] == ""
+    assert 'options' not in session.payloads[0]
+    assert abs(load_time - 2.0) < 1e-6
+    assert client.get_stats()['warmups'] == 1
+
+    # Con el num_ctx de las consultas, para que Ollama no recargue el modelo
+    client.warmup(num_ctx=4096)
+    assert session.payloads[1]['options'] == {'num_ctx': 4096}
+
+    try:
+        client.generate("falla")
+        assert False, "Debería haber lanzado OllamaError"
+    except OllamaError as e:
+        assert e.status_code == 500
+
+    print("✅ Warm-up y errores OK")
+
+
+def test_chat_uses_messages():
+    """Test: /api/chat envía mensajes y normaliza la respuesta"""
+    print("\n🧪 TEST 4: Layout chat")
+    print("-" * 50)
+
+    session = FakeSession([
+        FakeResponse(data={'message': {'role': 'assistant', 'content': 'respuesta'}, 'load_duration': 0})
+    ])
+    client = OllamaClient("http://fake:11434", "m", session=session)
+    messages = [{'role': 'system', 'content': 'reglas'}, {'role': 'user', 'content': 'pregunta'}]
+
+    result = client.chat(messages)
+
+    assert session.payloads[0]['messages'] == messages
+    assert result['response'] == 'respuesta'
+
+    print("✅ Chat OK")
+
+
+class FakeStreamResponse:
+    """Respuesta NDJSON; si stall=True se bloquea tras el primer token hasta close()"""
+
+    def __init__(self, tokens, stall=False):
+        self.status_code = 200
+        self.tokens = tokens
+        self.stall = stall
+        self.closed = threading.Event()
+
+    def iter_lines(self):
+        for i, token in enumerate(self.tokens):
+            yield json.dumps({'response': token, 'done': False}).encode()
+            if self.stall and i == 0:
+                self.closed.wait(5)
+                raise ConnectionError("conexión cerrada")
+        yield json.dumps({'response': '', 'done': True, 'load_duration': 0, 'eval_count': 3}).encode()
+
+    def close(self):
+        self.closed.set()
+
+
+class StreamSession:
+    def __init__(self, response):
+        self.response = response
+        self.payloads = []
+
+    def post(self, url, json=None, timeout=None, stream=False):
+        self.payloads.append(json)
+        return self.response
+
+
+def test_streaming_first_token_and_cancel():
+    """Test: Streaming reporta el primer token y la cancelación corta la conexión"""
+    print("\n🧪 TEST 5: Streaming y cancelación")
+    print("-" * 50)
+
+    first_tokens = []
+    session = StreamSession(FakeStreamResponse(["La ", "rampa ", "20°"]))
+    client = OllamaClient("http://fake:11434", "m", session=session)
+    result = client.generate("hola", on_first_token=first_tokens.append)
+
+    assert session.payloads[0]['stream'] is True
+    assert result['response'] == "La rampa 20°"
+    assert result['eval_count'] == 3
+    assert len(first_tokens) == 1 and result['ttft_s'] is not None
+
+    stalled = FakeStreamResponse(["La ", "rampa"], stall=True)
+    client = OllamaClient("http://fake:11434", "m", session=StreamSession(stalled))
+    token = CancelToken()
+    threading.Timer(0.05, token.cancel).start()
+    try:
+        client.generate("hola", cancel=token)
+        assert False, "Debería haberse cancelado"
+    except GenerationCancelled:
+        pass
+    assert stalled.closed.is_set()
+
+    print("✅ Streaming y cancelación OK")
+
+
+def test_keeper_business_hours():
+    """Test: El keeper solo refresca dentro del horario laboral"""
+    print("\n🧪 TEST 6: Horario laboral del keeper")
+    print("-" * 50)
+
+    client = OllamaClient("http://fake:11434", "m", session=FakeSession([]))
+    keeper = ModelKeeper(client, business_hours=(7, 19))
+    night_keeper = ModelKeeper(client, business_hours=(22, 6))
+
+    assert keeper.is_business_hours(datetime(2025, 11, 3, 10, 0))
+    assert not keeper.is_business_hours(datetime(2025, 11, 3, 19, 0))
+    assert night_keeper.is_business_hours(datetime(2025, 11, 3, 23, 0))
+    assert not night_keeper.is_business_hours(datetime(2025, 11, 3, 12, 0))
+
+    # El refresco usa el num_ctx vigente de las consultas
+    session = FakeSession([FakeResponse(data={'load_duration': 0})])
+    client = OllamaClient("http://fake:11434", "m", session=session)
+    always = ModelKeeper(client, interval=60, business_hours=(0, 24), num_ctx=lambda: 8192)
+    always.start()
+    for _ in range(100):
+        if session.payloads:
+            break
+        time.sleep(0.01)
+    always.stop()
+    assert session.payloads[0]['options'] == {'num_ctx': 8192}
+
+    print("✅ Horario laboral OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DEL CLIENTE OLLAMA")
+    print("="*60)
+
+    try:
+        test_generate_sends_keep_alive()
+        test_cold_load_is_counted()
+        test_warmup_and_errors()
+        test_chat_uses_messages()
+        test_streaming_first_token_and_cancel()
+        test_keeper_business_hours()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DEL CLIENTE OLLAMA PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,329 @@
+"""
+Tests para el pool de backends Ollama (balanceo, límites de concurrencia, expulsión)
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+
+import requests
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.cancellation import CancelToken, Deadline, DEADLINE_EXCEEDED, GenerationCancelled
+from utils.ollama_client import OllamaClient, OllamaError
+from utils.metrics import RAGMetrics
+from utils.ollama_pool import OllamaPool, PoolBackend
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+
+    def json(self):
+        return dict(self._data)
+
+
+class FakeSession:
+    """Sesión de un backend: responde OK, falla o bloquea hasta que se libere"""
+
+    def __init__(self, name, fail=False, block=None):
+        self.name = name
+        self.fail = fail
+        self.block = block
+        self.calls = 0
+
+    def post(self, url, json=None, timeout=None, stream=False):
+        self.calls += 1
+        if self.block:
+            self.block.wait(5)
+        if self.fail:
+            raise requests.ConnectionError(f"{self.name} caído")
+        return FakeResponse(data={'response': self.name})
+
+    def get(self, url, timeout=None):
+        if self.fail:
+            raise requests.ConnectionError(f"{self.name} caído")
+        return FakeResponse(data={'models': []})
+
+
+class StallingStream:
+    """
+    Stream NDJSON que tarda `delay` segundos en el primer token (o hasta close());
+    con `tail` emite un segundo token tras otros `tail` segundos
+    """
+
+    def __init__(self, name, delay, tail=None):
+        self.status_code = 200
+        self.name = name
+        self.delay = delay
+        self.tail = tail
+        self.closed = threading.Event()
+
+    def iter_lines(self):
+        if self.closed.wait(self.delay):
+            raise requests.ConnectionError("conexión cerrada")
+        yield json.dumps({'response': self.name, 'done': False}).encode()
+        if self.tail is not None:
+            if self.closed.wait(self.tail):
+                raise requests.ConnectionError("conexión cerrada")
+            yield json.dumps({'response': ' fin', 'done': False}).encode()
+        yield json.dumps({'response': '', 'done': True}).encode()
+
+    def close(self):
+        self.closed.set()
+
+
+class StreamingSession:
+    def __init__(self, name, delay, tail=None):
+        self.name = name
+        self.delay = delay
+        self.tail = tail
+        self.streams = []
+
+    def post(self, url, json=None, timeout=None, stream=False):
+        response = StallingStream(self.name, self.delay, self.tail)
+        self.streams.append(response)
+        return response
+
+
+def _backend(session, weight=1.0, max_concurrency=1):
+    client = OllamaClient(f"http://{session.name}:11434", "m", timeout=1, session=session)
+    return PoolBackend(client, weight=weight, max_concurrency=max_concurrency)
+
+
+def test_least_outstanding_routing():
+    """Test: Se elige el backend con menos pedidos en curso relativo a su peso"""
+    print("\n🧪 TEST 1: Routing least-outstanding")
+    print("-" * 50)
+
+    release = threading.Event()
+    a = FakeSession("a", block=release)
+    b = FakeSession("b")
+    pool = OllamaPool([_backend(a, max_concurrency=2), _backend(b)])
+
+    # Un pedido bloqueado en 'a' -> el siguiente va a 'b'
+    worker = threading.Thread(target=pool.generate, args=("uno",))
+    worker.start()
+    while pool.backends[0].outstanding == 0:
+        pass
+    result = pool.generate("dos")
+    release.set()
+    worker.join()
+
+    assert result['response'] == "b"
+    assert result['backend'] == "http://b:11434"
+    assert pool.get_stats()['requests'] == 2
+
+    print("✅ Pedido enviado al backend libre")
+
+
+def test_concurrency_limit_and_saturation():
+    """Test: Sin slots libres el pedido espera y luego falla con 503"""
+    print("\n🧪 TEST 2: Límite de concurrencia")
+    print("-" * 50)
+
+    release = threading.Event()
+    a = FakeSession("a", block=release)
+    pool = OllamaPool([_backend(a)], queue_timeout=0.05)
+
+    worker = threading.Thread(target=pool.generate, args=("uno",))
+    worker.start()
+    while pool.backends[0].outstanding == 0:
+        pass
+    try:
+        pool.generate("dos")
+        assert False, "Debería fallar por saturación"
+    except OllamaError as e:
+        assert e.status_code == 503
+    release.set()
+    worker.join()
+
+    print("✅ Saturación detectada")
+
+
+def test_ejection_failover_and_readmission():
+    """Test: Un backend caído sale de rotación, se reintenta en otro y vuelve al responder"""
+    print("\n🧪 TEST 3: Expulsión y re-admisión")
+    print("-" * 50)
+
+    a = FakeSession("a", fail=True)
+    b = FakeSession("b")
+    pool = OllamaPool([_backend(a, weight=2), _backend(b)], eject_after=2, eject_seconds=0)
+
+    # Los errores de conexión se reintentan en el otro backend
+    for _ in range(3):
+        assert pool.generate("x")['response'] == "b"
+    assert pool.backends[0].ejected
+    assert a.calls == 2
+
+    a.fail = False
+    pool.check_ejected()
+    assert not pool.backends[0].ejected
+    assert pool.generate("y")['response'] == "a"
+
+    stats = pool.get_stats()
+    assert stats['backends'][0]['ejections'] == 1
+
+    print(f"✅ Backends: {[(s['url'], s['healthy']) for s in stats['backends']]}")
+
+
+def test_hedging_first_response_wins():
+    """Test: Si el primario no entrega el primer token a tiempo se duplica y gana el más rápido"""
+    print("\n🧪 TEST 4: Hedging")
+    print("-" * 50)
+
+    slow = StreamingSession("lento", delay=5)
+    fast = StreamingSession("rapido", delay=0)
+    metrics = RAGMetrics()
+    pool = OllamaPool(
+        [_backend(slow, weight=2), _backend(fast)],
+        hedge=True, hedge_initial_delay=0.05, on_hedge=metrics.observe_hedge
+    )
+
+    start = time.perf_counter()
+    result = pool.generate("pregunta")
+    elapsed = time.perf_counter() - start
+
+    assert result['response'] == "rapido"
+    assert result['hedged'] is True
+    assert elapsed < 1
+    # El pedido perdedor se cancela y libera su slot
+    assert slow.streams[0].closed.wait(1)
+    for _ in range(100):
+        if pool.backends[0].outstanding == 0:
+            break
+        time.sleep(0.01)
+    assert pool.backends[0].outstanding == 0
+
+    hedging = pool.get_stats()['hedging']
+    assert hedging['hedges_sent'] == 1
+    assert hedging['hedge_wins'] == 1
+    assert hedging['hedge_rate'] == 1.0
+    # Los mismos contadores se exportan en /metrics
+    assert metrics.hedge_requests.value() == 1
+    assert metrics.hedges.value() == 1
+    assert metrics.hedge_wins.value() == 1
+    assert "rag_bpg_ollama_hedges_total 1" in metrics.render()
+    # El primario perdedor también aporta al percentil: su espera es una cota inferior
+    samples = sorted(pool._ttft_samples)
+    assert len(samples) == 2
+    assert samples[1] >= 0.05
+
+    # Un primario rápido no dispara hedging
+    pool = OllamaPool([_backend(fast), _backend(slow)], hedge=True, hedge_initial_delay=0.5)
+    assert pool.generate("otra")['hedged'] is False
+    assert pool.get_stats()['hedging']['hedge_rate'] == 0.0
+
+    print(f"✅ Hedging OK ({elapsed * 1000:.0f} ms)")
+
+
+def test_hedged_deadline_keeps_reason():
+    """Test: Con hedging, un deadline vencido llega como DEADLINE_EXCEEDED y no como desconexión"""
+    print("\n🧪 TEST 5: Deadline con hedging")
+    print("-" * 50)
+
+    reasons = {}
+    for hedge in (False, True):
+        sessions = [StreamingSession("a", delay=5), StreamingSession("b", delay=5)]
+        pool = OllamaPool([_backend(s) for s in sessions], hedge=hedge, hedge_initial_delay=0.05)
+        token = CancelToken()
+        Deadline(0.2, token)
+        try:
+            pool.generate("pregunta", cancel=token)
+            assert False, "Debería haberse cancelado"
+        except GenerationCancelled as e:
+            reasons[hedge] = e.reason
+        # Se cortan todos los intentos en curso (el primario y el duplicado)
+        streams = [stream for session in sessions for stream in session.streams]
+        assert len(streams) == (2 if hedge else 1)
+        assert all(stream.closed.wait(1) for stream in streams)
+
+    assert reasons == {False: DEADLINE_EXCEEDED, True: DEADLINE_EXCEEDED}
+
+    print(f"✅ Motivo con y sin hedging: {reasons[True]}")
+
+
+def test_hedged_connection_error_fails_over():
+    """Test: Con hedging, un primario que falla rápido por conexión pasa al otro backend"""
+    print("\n🧪 TEST 6: Falla de conexión con hedging")
+    print("-" * 50)
+
+    down = FakeSession("caido", fail=True)
+    up = StreamingSession("vivo", delay=0)
+    pool = OllamaPool(
+        [_backend(down, weight=2), _backend(up)],
+        hedge=True, hedge_initial_delay=5
+    )
+
+    start = time.perf_counter()
+    result = pool.generate("pregunta")
+    elapsed = time.perf_counter() - start
+
+    assert down.calls == 1
+    assert result['response'] == "vivo"
+    assert result['hedged'] is False
+    # No espera la demora de hedging: reintenta apenas falla la conexión
+    assert elapsed < 1
+    assert pool.backends[0].failures == 1
+    assert pool.get_stats()['hedging']['hedge_wins'] == 0
+
+    print(f"✅ Failover sin esperar el hedge ({elapsed * 1000:.0f} ms)")
+
+
+def test_hedged_tokens_match_answer():
+    """Test: on_token recibe solo el texto del intento cuya respuesta se devuelve"""
+    print("\n🧪 TEST 7: Tokens del intento ganador")
+    print("-" * 50)
+
+    # El primario emite su primer token después de la demora pero antes que el
+    # duplicado, y tarda en terminar: antes ganaba el duplicado con otro texto
+    primary = StreamingSession("lento", delay=0.15, tail=0.3)
+    secondary = StreamingSession("rapido", delay=0.3)
+    pool = OllamaPool(
+        [_backend(primary, weight=2), _backend(secondary)],
+        hedge=True, hedge_initial_delay=0.05
+    )
+
+    tokens = []
+    result = pool.generate("pregunta", on_token=tokens.append)
+
+    assert result['hedged'] is True
+    assert result['response'] == "lento fin"
+    assert "".join(tokens) == result['response']
+    # El duplicado se cancela apenas el primario empieza a responder
+    assert secondary.streams[0].closed.wait(1)
+    assert pool.get_stats()['hedging']['hedge_wins'] == 0
+
+    print(f"✅ Tokens reenviados: {tokens}")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DEL POOL DE OLLAMA")
+    print("="*60)
+
+    try:
+        test_least_outstanding_routing()
+        test_concurrency_limit_and_saturation()
+        test_ejection_failover_and_readmission()
+        test_hedging_first_response_wins()
+        test_hedged_deadline_keeps_reason()
+        test_hedged_connection_error_fails_over()
+        test_hedged_tokens_match_answer()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DEL POOL PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -4,6 +4,7 @@ Tests para verificar estrategias de prompts
 
 import sys
 import os
+import json
 
 # ✨ ARREGLADO: Agregar la raíz del proyecto al path
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -168,6 +169,55 @@ def test_prompt_content():
     print("✅ Technical: enfoque en normativas")
 
 
+def test_build_messages_stable_prefix():
+    """Test: Layout chat con prefijo estable y contexto al final"""
+    print("\n🧪 TEST 8: Mensajes con prefijo estable")
+    print("-" * 50)
+    
+    query = "¿Qué pendiente debe tener la rampa?"
+    
+    for pt in PromptType:
+        strategy = PromptFactory.get_strategy(pt)
+        first = strategy.build_messages("Contexto A sobre rampas", query)
+        second = strategy.build_messages("Contexto B distinto sobre corrales", "Otra pregunta")
+        
+        assert [m['role'] for m in first] == ['system', 'user']
+        # El mensaje system no depende del contexto ni de la pregunta
+        assert first[0]['content'] == second[0]['content']
+        assert "Contexto A" not in first[0]['content']
+        # Contexto y pregunta van al final, en el mensaje user
+        assert first[1]['content'].endswith(query)
+        assert "Contexto A sobre rampas" in first[1]['content']
+        # El layout inline arma el prompt con las mismas partes (una sola fuente)
+        inline = strategy.build("Contexto A sobre rampas", query)
+        assert inline.startswith(strategy.intro)
+        assert first[1]['content'] in inline
+        assert strategy.instructions in inline
+        
+        print(f"✅ {strategy.name}: prefijo de {len(first[0]['content'])} caracteres")
+    
+    # FewShot conserva los ejemplos en el prefijo
+    fewshot = PromptFactory.get_strategy(PromptType.FEWSHOT)
+    assert "EJEMPLOS" in fewshot.system_prompt
+
+
+
+def test_inline_prompts_match_baseline():
+    """Test: build() (layout inline) reproduce byte a byte los prompts originales"""
+    print("\n🧪 TEST 9: Prompts inline sin cambios")
+    print("-" * 50)
+    
+    # Generado con las estrategias anteriores al layout chat: un cambio acá
+    # mueve las respuestas cacheadas y los baselines de evaluación
+    with open(os.path.join(script_dir, "fixtures", "legacy_prompts.json"), encoding="utf-8") as f:
+        baseline = json.load(f)
+    
+    for name, expected in baseline['prompts'].items():
+        strategy = PromptFactory.get_strategy_by_name(name)
+        assert strategy.build(baseline['context'], baseline['query']) == expected, name
+        print(f"✅ {strategy.name}: {len(expected)} caracteres idénticos")
+
+
 if __name__ == "__main__":
     print("\n" + "="*60)
     print("🧪 TESTS DE ESTRATEGIAS DE PROMPTS")
@@ -181,6 +231,8 @@ if __name__ == "__main__":
         test_max_tokens()
         test_print_strategies()
         test_prompt_content()
+        test_build_messages_stable_prefix()
+        test_inline_prompts_match_baseline()
         
         print("\n" + "="*60)
         print("✅ TODOS LOS TESTS PASARON")
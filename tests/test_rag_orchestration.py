@@ -0,0 +1,552 @@
+"""
+Tests de orquestación de RAGSystemBPG (circuit breaker, deadline, cancelación,
+reintento tras abortar el stream, consultas compartidas, tiempos por etapa,
+num_ctx)
+
+ChromaDB, SentenceTransformer y Ollama se reemplazan por dobles en memoria:
+se prueba el camino de generate_answer sin servicios externos
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import types
+import zlib
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# rag_bpg_ollama importa chromadb y sentence_transformers al cargarse; si no
+# están instalados alcanza con módulos vacíos (los tests usan dobles)
+for module_name, attribute in (("chromadb", "PersistentClient"), ("sentence_transformers", "SentenceTransformer")):
+    try:
+        __import__(module_name)
+    except ImportError:
+        placeholder = types.ModuleType(module_name)
+        setattr(placeholder, attribute, None)
+        sys.modules[module_name] = placeholder
+
+import api.endpoints as endpoints
+import rag_bpg_ollama
+from rag_bpg_ollama import RAGSystemBPG
+from config.settings import RAGConfig
+from utils.cancellation import CancelToken, GenerationCancelled
+from utils.circuit_breaker import OPEN
+from utils.ollama_client import OllamaClient
+from utils.ollama_pool import OllamaPool, PoolBackend
+from utils.sentence_index import SentenceIndex
+from prompts.strategies import PromptFactory
+
+
+CHUNKS = [
+    {'chunk_id': "bovinos_1", 'source': "manual_bovinos.txt", 'text':
+        "La rampa de carga debe tener una pendiente máxima de 20 grados. "
+        "El piso de la rampa debe ser antideslizante para evitar caídas."},
+    {'chunk_id': "agua_1", 'source': "manual_agua.txt", 'text':
+        "Los bebederos deben limpiarse semanalmente. "
+        "El agua de bebida debe ser de buena calidad y estar disponible todo el día."},
+    {'chunk_id': "sombra_1", 'source': "manual_bienestar.txt", 'text':
+        "Los corrales deben contar con sombra suficiente en verano. "
+        "La sombra reduce el estrés calórico del rodeo."},
+]
+ANSWER = "• La rampa debe tener una pendiente máxima de 20 grados y piso antideslizante."
+# Respuesta que el validador de streaming corta (bloque de código)
+CODE_REPLY = ["```python\n", "print('rampa')\n"] + [" relleno"] * 50
+QUESTION = "¿Qué pendiente debe tener la rampa de carga?"
+
+
+class FakeEmbedder:
+    """SentenceTransformer determinístico: bolsa de palabras en 32 dimensiones"""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True,
+               normalize_embeddings=False, show_progress_bar=False):
+        embeddings = np.zeros((len(texts), 32), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                embeddings[row, zlib.crc32(word.encode()) % 32] += 1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-9)
+        return embeddings
+
+
+class FakeCollection:
+    """Colección de ChromaDB que devuelve los chunks en orden fijo"""
+
+    def count(self):
+        return len(CHUNKS)
+
+    def query(self, query_embeddings, n_results):
+        chunks = CHUNKS[:n_results]
+        return {
+            'ids': [[c['chunk_id'] for c in chunks]],
+            'documents': [[c['text'] for c in chunks]],
+            'metadatas': [[{'source': c['source'], 'chunk_number': 1} for c in chunks]],
+            'distances': [[0.1 * i for i in range(len(chunks))]],
+        }
+
+
+class FakeChromaClient:
+    def __init__(self, path=None):
+        self.path = path
+
+    def get_collection(self, name):
+        return FakeCollection()
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+
+    def json(self):
+        return dict(self._data)
+
+
+class FakeStream:
+    """Respuesta NDJSON de Ollama; con stall espera hasta close() (o 5s)"""
+
+    def __init__(self, tokens, stall=False):
+        self.status_code = 200
+        self.tokens = tokens
+        self.stall = stall
+        self.closed = threading.Event()
+
+    def iter_lines(self):
+        if self.stall and self.closed.wait(5):
+            raise ConnectionError("conexión cerrada")
+        for token in self.tokens:
+            yield json.dumps({'response': token, 'done': False}).encode()
+        yield json.dumps({
+            'response': '', 'done': True, 'load_duration': 0,
+            'prompt_eval_count': 100, 'prompt_eval_duration': int(0.2e9),
+            'eval_count': 20, 'eval_duration': int(0.4e9)
+        }).encode()
+
+    def close(self):
+        self.closed.set()
+
+
+class FakeOllama:
+    """
+    Sesión de Ollama con modo configurable:
+    "ok" responde ANSWER, "error" devuelve HTTP 500, "stall" no emite tokens.
+    replies fija los tokens de los siguientes streams (después, ANSWER)
+    """
+
+    def __init__(self, mode="ok", replies=None):
+        self.mode = mode
+        self.replies = list(replies or [])
+        self.calls = 0
+        self.payloads = []
+        self.streams = []
+
+    def post(self, url, json=None, timeout=None, stream=False):
+        self.calls += 1
+        self.payloads.append(json)
+        if self.mode == "error":
+            return FakeResponse(status_code=500)
+        if stream:
+            tokens = self.replies.pop(0) if self.replies else [ANSWER[:20], ANSWER[20:]]
+            response = FakeStream(tokens, stall=self.mode == "stall")
+            self.streams.append(response)
+            return response
+        return FakeResponse(data={
+            'response': ANSWER, 'load_duration': 0, 'total_duration': int(0.6e9),
+            'prompt_eval_count': 100, 'prompt_eval_duration': int(0.2e9),
+            'eval_count': 20, 'eval_duration': int(0.4e9)
+        })
+
+    def get(self, url, timeout=None):
+        return FakeResponse(data={'models': [{'name': "llama3.1:8b"}]})
+
+
+class GatedOllama(FakeOllama):
+    """Retiene cada generación hasta release (para juntar consultas concurrentes)"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def post(self, *args, **kwargs):
+        self.release.wait(5)
+        return super().post(*args, **kwargs)
+
+
+def _make_rag(directory, session, **overrides):
+    """RAGSystemBPG con dobles de ChromaDB, embeddings y Ollama"""
+    index_path = os.path.join(directory, "sentence_index")
+    SentenceIndex.build(CHUNKS, FakeEmbedder("fake")).save(index_path)
+
+    settings = dict(
+        chroma_db_path=os.path.join(directory, "chroma_db"),
+        sentence_index_path=index_path,
+        ollama_warmup_on_start=False,
+        circuit_failure_threshold=2,
+        circuit_probe_interval=60.0,
+        verbose=False
+    )
+    settings.update(overrides)
+
+    saved = (rag_bpg_ollama.chromadb, rag_bpg_ollama.SentenceTransformer)
+    rag_bpg_ollama.chromadb = types.SimpleNamespace(PersistentClient=FakeChromaClient)
+    rag_bpg_ollama.SentenceTransformer = FakeEmbedder
+    try:
+        rag = RAGSystemBPG(config=RAGConfig(**settings))
+    finally:
+        rag_bpg_ollama.chromadb, rag_bpg_ollama.SentenceTransformer = saved
+    rag.ollama_client.session = session
+    return rag
+
+
+def test_open_circuit_skips_ollama():
+    """Test: Con el circuito abierto no se llama a Ollama: se responde desde caché o extractivo"""
+    print("\n🧪 TEST 1: Circuito abierto")
+    print("-" * 50)
+
+    session = FakeOllama()
+    with tempfile.TemporaryDirectory() as directory:
+        rag = _make_rag(directory, session)
+        try:
+            first = rag.query(QUESTION, verbose=False)
+            assert first['answer'] == ANSWER and not first.get('fallback_reason')
+
+            # Dos fallas seguidas abren el circuito
+            session.mode = "error"
+            for question in ("¿Cada cuánto se limpian los bebederos?", "¿Cuánta sombra necesitan los corrales?"):
+                failed = rag.query(question, verbose=False)
+                assert failed['extractive'] is True
+            assert rag.circuit_breaker.state == OPEN
+            calls = session.calls
+
+            cached = rag.query(QUESTION, verbose=False)
+            assert cached['cached'] is True
+            assert cached['answer'] == ANSWER
+            assert cached['fallback_reason'].startswith("Circuito abierto")
+
+            extractive = rag.query("¿Cómo debe ser el agua de bebida?", verbose=False)
+            assert extractive['extractive'] is True
+            assert extractive['fallback_reason'].startswith("Circuito abierto")
+
+            assert session.calls == calls
+            assert rag.metrics.errors.value(error_class="circuit_open") == 2
+        finally:
+            rag.shutdown()
+
+    print("✅ Caché y modo extractivo sin llamar a Ollama")
+
+
+def test_deadline_returns_degraded_answer():
+    """Test: Al vencer el deadline se responde en modo degradado, también con hedging"""
+    print("\n🧪 TEST 2: Deadline con y sin hedging")
+    print("-" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        session = FakeOllama(mode="stall")
+        rag = _make_rag(directory, session)
+        try:
+            result = rag.query(QUESTION, verbose=False, timeout=0.2)
+            assert result['extractive'] is True
+            assert result['fallback_reason'] == "Tiempo límite de la consulta excedido"
+            assert session.streams[0].closed.is_set()
+            assert rag.circuit_breaker.snapshot()['failures'] == 1
+
+            # Pool con hedging: el deadline corta el primario y el duplicado
+            sessions = [FakeOllama(mode="stall"), FakeOllama(mode="stall")]
+            rag.ollama_client = OllamaPool(
+                [PoolBackend(OllamaClient(f"http://backend{i}:11434", "llama3.1:8b", session=s))
+                 for i, s in enumerate(sessions)],
+                hedge=True,
+                hedge_initial_delay=0.05
+            )
+            hedged = rag.query("¿Cómo debe ser el agua de bebida?", verbose=False, timeout=0.3)
+            assert hedged['extractive'] is True
+            assert hedged['fallback_reason'] == "Tiempo límite de la consulta excedido"
+            assert [len(s.streams) for s in sessions] == [1, 1]
+            assert all(s.streams[0].closed.is_set() for s in sessions)
+        finally:
+            rag.shutdown()
+
+    print("✅ Respuesta degradada al vencer el deadline")
+
+
+def test_breaker_counts_errors_not_cancellations():
+    """Test: Un error de Ollama cuenta como falla del breaker; la cancelación del cliente no"""
+    print("\n🧪 TEST 3: Fallas vs cancelaciones")
+    print("-" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        session = FakeOllama(mode="error")
+        rag = _make_rag(directory, session, circuit_failure_threshold=5)
+        try:
+            result = rag.query(QUESTION, verbose=False)
+            assert result['extractive'] is True
+            assert rag.circuit_breaker.snapshot()['failures'] == 1
+            assert rag.metrics.errors.value(error_class="ollama_http") == 1
+
+            session.mode = "stall"
+            token = CancelToken()
+            threading.Timer(0.1, token.cancel, kwargs={'reason': "client_disconnected"}).start()
+            try:
+                rag.query("¿Cómo debe ser el agua de bebida?", verbose=False, cancel=token)
+                assert False, "Debería haberse cancelado"
+            except GenerationCancelled as e:
+                assert e.reason == "client_disconnected"
+            assert session.streams[0].closed.is_set()
+            assert rag.circuit_breaker.snapshot()['failures'] == 1
+            assert rag.circuit_breaker.consecutive_failures == 1
+        finally:
+            rag.shutdown()
+
+    print("✅ Solo los errores de Ollama abren el circuito")
+
+
+def test_stream_rejection_retries_once():
+    """Test: Un stream abortado se reintenta una vez con streaming_retry_strategy"""
+    print("\n🧪 TEST 4: Reintento tras abortar el stream")
+    print("-" * 50)
+
+    concise = PromptFactory.get_strategy_by_name("concise")
+    standard = PromptFactory.get_strategy_by_name("standard")
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Primer intento rechazado, el reintento responde bien
+        session = FakeOllama(replies=[CODE_REPLY])
+        rag = _make_rag(directory, session, enable_streaming_validation=True,
+                        streaming_retry_strategy="concise")
+        try:
+            result = rag.query(QUESTION, verbose=False)
+            assert session.calls == 2
+            assert session.payloads[0]['prompt'].startswith(standard.intro)
+            assert session.payloads[1]['prompt'].startswith(concise.intro)
+            assert concise.instructions in session.payloads[1]['prompt']
+            assert result['answer'] == ANSWER
+            assert result['strategy'] == concise.name
+            assert [r['strategy'] for r in result['stream_rejections']] == [standard.name]
+            assert result['stream_rejections'][0]['check'] == "no_code_blocks"
+            assert session.streams[0].closed.is_set()
+            assert 'llm_rejected' in result['timings']
+            # Ollama respondió bien: abortar no es una falla
+            assert rag.circuit_breaker.snapshot()['failures'] == 0
+
+            # Los dos intentos rechazados: no hay un segundo reintento
+            session.replies = [CODE_REPLY, CODE_REPLY]
+            session.calls = 0
+            # Sin coalescer, el token de la consulta llega tal cual a generate_answer
+            rag.config.enable_coalescing = False
+            token = CancelToken()
+            rejected = rag.query("¿Cómo debe ser el agua de bebida?", verbose=False, cancel=token)
+            assert session.calls == 2
+            # Los tokens hijo de cada intento no quedan colgados del token de la consulta
+            assert token._callbacks == []
+            assert rejected['extractive'] is True
+            assert rejected['fallback_reason'] == "Respuesta descartada durante la generación (no_code_blocks)"
+            assert [r['strategy'] for r in rejected['stream_rejections']] == [standard.name, concise.name]
+            assert rag.metrics.stream_rejections.value(check="no_code_blocks", strategy=concise.name) == 1
+            assert rag.metrics.stream_rejections.value(check="no_code_blocks", strategy=standard.name) == 2
+        finally:
+            rag.shutdown()
+
+    print(f"✅ Un reintento con '{concise.name}', luego modo degradado")
+
+
+def _run_concurrently(rag, session, calls):
+    """Lanzar las consultas a la vez y liberar Ollama cuando todas entraron"""
+    results = [None] * len(calls)
+
+    def run(position, kwargs):
+        results[position] = rag.query(verbose=False, **kwargs)
+
+    stats_before = rag.single_flight.get_stats()
+    threads = [threading.Thread(target=run, args=item) for item in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        stats = rag.single_flight.get_stats()
+        joined = (stats['executions'] - stats_before['executions']) + (stats['coalesced'] - stats_before['coalesced'])
+        if joined == len(calls):
+            break
+        time.sleep(0.01)
+    session.release.set()
+    for thread in threads:
+        thread.join(5)
+    session.release.clear()
+    return results
+
+
+def test_single_flight_key():
+    """Test: Solo se comparten consultas con la misma pregunta normalizada y los mismos parámetros"""
+    print("\n🧪 TEST 5: Clave de consultas compartidas")
+    print("-" * 50)
+
+    session = GatedOllama()
+    with tempfile.TemporaryDirectory() as directory:
+        rag = _make_rag(directory, session)
+        try:
+            # Mayúsculas, tildes, signos y espacios no cambian la clave
+            same = _run_concurrently(rag, session, [
+                {'pregunta': "¿Qué pendiente debe tener la rampa?"},
+                {'pregunta': "¿qué PENDIENTE debe tener   la rampa?"},
+                {'pregunta': "  que pendiente debe tener la rampa  "},
+            ])
+            assert session.calls == 1
+            assert sorted(r['coalesced'] for r in same) == [False, True, True]
+            assert all(r['answer'] == ANSWER for r in same)
+
+            # Otro k u otra estrategia: generación propia
+            session.calls = 0
+            different = _run_concurrently(rag, session, [
+                {'pregunta': "¿Qué pendiente debe tener la rampa?", 'k': 2},
+                {'pregunta': "¿Qué pendiente debe tener la rampa?", 'k': 3},
+                {'pregunta': "¿Qué pendiente debe tener la rampa?", 'k': 3, 'strategy': "concise"},
+            ])
+            assert session.calls == 3
+            assert not any(r['coalesced'] for r in different)
+            assert [r['k_used'] for r in different] == [2, 3, 3]
+            assert rag.metrics.coalesced.value() == 2
+        finally:
+            rag.shutdown()
+
+    print("✅ 3 consultas equivalentes -> 1 generación; parámetros distintos -> 3")
+
+
+def test_coalesced_deadline_returns_degraded_answer():
+    """Test: Un seguidor cuyo deadline vence antes que el líder responde en modo degradado"""
+    print("\n🧪 TEST 6: Deadline de una consulta compartida")
+    print("-" * 50)
+
+    session = GatedOllama()
+    with tempfile.TemporaryDirectory() as directory:
+        rag = _make_rag(directory, session)
+        try:
+            leader = {}
+            worker = threading.Thread(
+                target=lambda: leader.update(rag.query(QUESTION, verbose=False))
+            )
+            worker.start()
+            while rag.single_flight.in_flight() == 0:
+                time.sleep(0.01)
+
+            follower = rag.query(QUESTION, verbose=False, timeout=0.2)
+            assert follower['extractive'] is True
+            assert follower['fallback_reason'] == "Tiempo límite de la consulta excedido"
+            assert follower['coalesced'] is False
+            assert rag.single_flight.get_stats()['coalesced'] == 1
+
+            # El líder sigue y responde con Ollama
+            session.release.set()
+            worker.join(5)
+            assert leader['answer'] == ANSWER
+            assert session.calls == 1
+        finally:
+            session.release.set()
+            rag.shutdown()
+
+    print("✅ Seguidor vencido -> respuesta extractiva, sin 504")
+
+
+def test_timings_reach_result_and_api():
+    """Test: Los tiempos por etapa llegan al resultado, a la respuesta REST y a la línea del CLI"""
+    print("\n🧪 TEST 7: Tiempos por etapa")
+    print("-" * 50)
+
+    llm_stages = {'embedding', 'vector_search', 'context_assembly', 'prompt_build',
+                  'llm', 'llm_load', 'llm_prefill', 'llm_decode', 'validation'}
+    session = FakeOllama()
+    with tempfile.TemporaryDirectory() as directory:
+        rag = _make_rag(directory, session, enable_validation=True)
+        try:
+            result = rag.query(QUESTION, verbose=False)
+            assert set(result['timings']) == llm_stages
+            assert result['timings']['llm_prefill'] == 0.2
+            assert result['timings']['llm_decode'] == 0.4
+            assert all(seconds >= 0 for seconds in result['timings'].values())
+
+            # CLI: una línea con todas las etapas en milisegundos
+            line = RAGSystemBPG._format_timings(result['timings'])
+            assert line.count("ms") == len(llm_stages)
+            assert "llm_prefill 200ms" in line
+
+            # API REST (/api/v1/query, con deadline y streaming)
+            app = FastAPI()
+            app.include_router(endpoints.router, prefix="/api/v1")
+            endpoints.set_rag_system(rag)
+            try:
+                response = TestClient(app).post("/api/v1/query", json={'query': "¿Cómo debe ser el agua de bebida?"})
+            finally:
+                endpoints.set_rag_system(None)
+            assert response.status_code == 200
+            body = response.json()
+            assert body['success'] is True
+            assert set(body['timings']) == llm_stages
+            assert body['token_usage']['prompt_seconds'] == body['timings']['llm_prefill']
+
+            # Modo degradado: la etapa del LLM se reemplaza por la extracción
+            session.mode = "error"
+            degraded = rag.query("¿Cuánta sombra necesitan los corrales?", verbose=False)
+            assert set(degraded['timings']) == {
+                'embedding', 'vector_search', 'context_assembly', 'prompt_build', 'extractive'
+            }
+        finally:
+            rag.shutdown()
+
+    print(f"✅ Etapas: {line}")
+
+
+def test_concise_prompt_gets_smallest_num_ctx():
+    """Test: Con la configuración por defecto un prompt Concise corto usa el bucket más chico"""
+    print("\n🧪 TEST 8: num_ctx de un prompt corto")
+    print("-" * 50)
+
+    session = FakeOllama()
+    with tempfile.TemporaryDirectory() as directory:
+        rag = _make_rag(directory, session)
+        try:
+            assert rag._loaded_num_ctx() == min(RAGConfig().num_ctx_buckets) == 2048
+            result = rag.query(QUESTION, verbose=False, strategy="concise")
+            assert result['num_ctx'] == 2048
+            assert session.payloads[-1]['options']['num_ctx'] == 2048
+            assert rag._loaded_num_ctx() == 2048
+        finally:
+            rag.shutdown()
+
+    print(f"✅ num_ctx {result['num_ctx']} para ~{result['prompt_tokens_est']} tokens de prompt")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DE ORQUESTACIÓN DEL SISTEMA RAG")
+    print("="*60)
+
+    try:
+        test_open_circuit_skips_ollama()
+        test_deadline_returns_degraded_answer()
+        test_breaker_counts_errors_not_cancellations()
+        test_stream_rejection_retries_once()
+        test_single_flight_key()
+        test_coalesced_deadline_returns_degraded_answer()
+        test_timings_reach_result_and_api()
+        test_concise_prompt_gets_smallest_num_ctx()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DE ORQUESTACIÓN PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,84 @@
+"""
+Tests para el benchmark de retrieval con el set dorado
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.retrieval_eval import (
+    ExactIndex, LexicalIndex, evaluate, load_chunks, load_golden,
+    recall_at_k, reciprocal_rank
+)
+
+
+def test_metrics():
+    """Test: recall@k y reciprocal rank"""
+    print("\n🧪 TEST 1: Métricas")
+    print("-" * 50)
+
+    retrieved = ['c3', 'c1', 'c7', 'c2']
+    relevant = ['c1', 'c2']
+    assert recall_at_k(retrieved, relevant, 1) == 0.0
+    assert recall_at_k(retrieved, relevant, 2) == 0.5
+    assert recall_at_k(retrieved, relevant, 4) == 1.0
+    assert reciprocal_rank(retrieved, relevant) == 0.5
+    assert reciprocal_rank(retrieved, ['c9']) == 0.0
+
+    # chunk_id con tildes descompuestas (NFD) coinciden con su forma NFC
+    assert recall_at_k(['GUÍA_1'], ['GUÍA_1'], 1) == 1.0
+
+    print("✅ Métricas OK")
+
+
+def test_golden_set_and_backends():
+    """Test: El set dorado cita chunks existentes y los backends se evalúan igual"""
+    print("\n🧪 TEST 2: Set dorado y backends")
+    print("-" * 50)
+
+    chunks = load_chunks()
+    golden = load_golden(chunks=chunks)
+    assert len(golden) >= 20
+
+    lexical = evaluate(LexicalIndex(chunks).search, golden, ks=(1, 5, 10))
+    assert set(lexical['recall']) == {1, 5, 10}
+    assert lexical['recall'][1] <= lexical['recall'][5] <= lexical['recall'][10]
+    assert lexical['latency']['count'] == len(golden)
+    print(f"   lexical: R@5={lexical['recall'][5]}, MRR={lexical['mrr']}")
+
+    # Fuerza bruta con embeddings sintéticos: cada pregunta apunta a su primer relevante
+    ids = [c['chunk_id'] for c in chunks]
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(len(ids), 16))
+    embeddings = [matrix[ids.index(item['relevant'][0])] for item in golden]
+    exact = evaluate(ExactIndex(ids, matrix).search, golden, ks=(1,), embeddings=embeddings)
+    assert exact['mrr'] == 1.0
+    assert exact['misses'] == []
+
+    print("✅ Set dorado y backends OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DEL BENCHMARK DE RETRIEVAL")
+    print("="*60)
+
+    try:
+        test_metrics()
+        test_golden_set_and_backends()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DEL BENCHMARK DE RETRIEVAL PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,103 @@
+"""
+Tests para la coalescencia de consultas idénticas en curso (single-flight)
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.single_flight import SingleFlight
+
+
+def _run_concurrently(flight, key, fn, n):
+    """Lanzar n llamadas concurrentes con la misma clave"""
+    results = [None] * n
+    errors = [None] * n
+
+    def worker(i):
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_duplicates_share_one_execution():
+    """Test: Llamadas concurrentes con la misma clave ejecutan una sola vez"""
+    print("\n🧪 TEST 1: Coalescencia")
+    print("-" * 50)
+
+    flight = SingleFlight()
+    executions = []
+
+    def slow_query(token):
+        executions.append(1)
+        time.sleep(0.1)
+        return {'answer': 'respuesta'}
+
+    results, errors = _run_concurrently(flight, ("que es bpg", 5), slow_query, 10)
+
+    assert len(executions) == 1
+    assert all(e is None for e in errors)
+    assert all(r[0]['answer'] == 'respuesta' for r in results)
+    assert sum(1 for r in results if r[1]) == 9
+    stats = flight.get_stats()
+    assert stats['executions'] == 1 and stats['coalesced'] == 9 and stats['in_flight'] == 0
+
+    # Terminado el cómputo, la misma clave vuelve a ejecutarse
+    flight.do(("que es bpg", 5), slow_query)
+    assert len(executions) == 2
+
+    print(f"✅ 10 llamadas, {len(executions) - 1} ejecución")
+
+
+def test_different_keys_and_errors():
+    """Test: Claves distintas no se mezclan y los errores llegan a todos"""
+    print("\n🧪 TEST 2: Claves distintas y errores")
+    print("-" * 50)
+
+    flight = SingleFlight()
+    assert flight.do("a", lambda token: 1) == (1, False)
+    assert flight.do("b", lambda token: 2) == (2, False)
+
+    def failing(token):
+        time.sleep(0.05)
+        raise RuntimeError("Ollama caído")
+
+    _, errors = _run_concurrently(flight, "c", failing, 3)
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert flight.in_flight() == 0
+
+    print("✅ Claves y errores OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DE SINGLE-FLIGHT")
+    print("="*60)
+
+    try:
+        test_duplicates_share_one_execution()
+        test_different_keys_and_errors()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DE SINGLE-FLIGHT PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,140 @@
+"""
+Tests para la validación incremental sobre el stream de Ollama
+"""
+
+import sys
+import os
+import json
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.cancellation import CancelToken, GenerationCancelled, CLIENT_DISCONNECTED, INVALID_OUTPUT
+from utils.ollama_client import OllamaClient
+from utils.streaming_validator import StreamingValidator
+from utils.validators import ResponseValidator
+
+
+class TokenStream:
+    """Respuesta NDJSON que registra cuántos fragmentos se leyeron"""
+
+    def __init__(self, tokens):
+        self.status_code = 200
+        self.tokens = tokens
+        self.read = 0
+        self.closed = False
+
+    def iter_lines(self):
+        for token in self.tokens:
+            self.read += 1
+            yield json.dumps({'response': token, 'done': False}).encode()
+        yield json.dumps({'response': '', 'done': True, 'load_duration': 0}).encode()
+
+    def close(self):
+        self.closed = True
+
+
+class StreamSession:
+    def __init__(self, response):
+        self.response = response
+
+    def post(self, url, json=None, timeout=None, stream=False):
+        return self.response
+
+
+def test_watch_detects_split_phrases():
+    """Test: Frases partidas entre fragmentos, ventana de caracteres y motivo de cancelación"""
+    print("\n🧪 TEST 1: Detección incremental")
+    print("-" * 50)
+
+    validator = StreamingValidator(max_chars=200)
+
+    token = CancelToken()
+    watch = validator.watch(token)
+    pieces = ["Según las guías:\n\nFORMATO DE ", "RESP", "UESTA: usar viñetas"]
+    for piece in pieces + [" y después más texto"]:
+        watch.feed(piece)
+    assert watch.violation == {'check': 'no_instructions_leaked', 'chars': len("".join(pieces))}
+    assert token.cancelled and token.reason == INVALID_OUTPUT
+
+    # Mismo criterio que ResponseValidator
+    for text, check in [("Ejemplo:\n```python", 'no_code_blocks'), ("Típicamente se vacuna", 'not_hallucinating')]:
+        watch = validator.watch(CancelToken())
+        for i in range(0, len(text), 3):
+            watch.feed(text[i:i + 3])
+        assert watch.violation['check'] == check
+        assert not ResponseValidator().validate_response(text, "", "")['validations'][check]
+
+    clean = validator.watch(CancelToken())
+    clean.feed("• La rampa debe tener una pendiente máxima de 20°.")
+    assert clean.violation is None and not clean.cancel.cancelled
+
+    # Pasada la ventana no se revisa (lo ve el validador final)
+    late = validator.watch(CancelToken())
+    late.feed("x" * 200)
+    late.feed(" creo que")
+    assert late.violation is None
+
+    print("✅ Detección incremental OK")
+
+
+def test_child_token_and_client_abort():
+    """Test: El token hijo aborta solo la generación y corta el stream temprano"""
+    print("\n🧪 TEST 2: Cancelación de la generación")
+    print("-" * 50)
+
+    parent = CancelToken()
+    child = parent.child()
+    child.cancel(INVALID_OUTPUT)
+    assert not parent.cancelled
+    # close() quita el callback del padre: una consulta larga no acumula hijos
+    child.close()
+    for _ in range(3):
+        parent.child().close()
+    assert parent._callbacks == []
+    other = parent.child()
+    parent.cancel(CLIENT_DISCONNECTED)
+    assert other.cancelled and other.reason == CLIENT_DISCONNECTED
+
+    tokens = ["INSTRUCCIONES:", " respondé", " en", " viñetas"] + [" palabra"] * 200
+    stream = TokenStream(tokens)
+    client = OllamaClient("http://fake:11434", "m", session=StreamSession(stream))
+    token = CancelToken()
+    watch = StreamingValidator().watch(token)
+    try:
+        client.generate("hola", cancel=token, on_token=watch.feed)
+        assert False, "Debería haberse cancelado"
+    except GenerationCancelled as e:
+        assert e.reason == INVALID_OUTPUT
+    assert stream.closed
+    assert stream.read < 5, "se siguió leyendo el stream después de la violación"
+
+    # Sin violaciones on_token recibe todo el texto
+    pieces = []
+    client = OllamaClient("http://fake:11434", "m", session=StreamSession(TokenStream(["La ", "rampa"])))
+    result = client.generate("hola", on_token=pieces.append)
+    assert pieces == ["La ", "rampa"] and result['response'] == "La rampa"
+
+    print(f"✅ Stream abortado tras {stream.read} de {len(tokens)} fragmentos")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DE VALIDACIÓN EN STREAMING")
+    print("="*60)
+
+    try:
+        test_watch_detects_split_phrases()
+        test_child_token_and_client_abort()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DE VALIDACIÓN EN STREAMING PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,85 @@
+"""
+Tests para el conteo de tokens y throughput de Ollama
+"""
+
+import sys
+import os
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.token_usage import TokenUsageStats, token_usage
+
+
+def _ollama_result(prompt_tokens, prompt_ns, generated_tokens, generated_ns):
+    return {
+        'response': 'ok',
+        'prompt_eval_count': prompt_tokens,
+        'prompt_eval_duration': prompt_ns,
+        'eval_count': generated_tokens,
+        'eval_duration': generated_ns
+    }
+
+
+def test_token_usage_rates():
+    """Test: Tokens/segundo de prefill y decode"""
+    print("\n🧪 TEST 1: Throughput por consulta")
+    print("-" * 50)
+
+    usage = token_usage(_ollama_result(1000, 500_000_000, 100, 4_000_000_000))
+
+    assert usage['prompt_eval_count'] == 1000
+    assert usage['prompt_eval_seconds'] == 0.5
+    assert usage['prompt_tokens_per_sec'] == 2000.0
+    assert usage['generated_tokens_per_sec'] == 25.0
+
+    # Prompt cacheado por Ollama: sin conteo ni duración de prefill
+    usage = token_usage({'eval_count': 10, 'eval_duration': 1_000_000_000})
+    assert usage['prompt_eval_count'] == 0
+    assert usage['prompt_tokens_per_sec'] is None
+
+    print("✅ Throughput OK")
+
+
+def test_stats_by_strategy():
+    """Test: Acumulado general y por estrategia"""
+    print("\n🧪 TEST 2: Estadísticas acumuladas")
+    print("-" * 50)
+
+    stats = TokenUsageStats()
+    stats.record("Optimized", token_usage(_ollama_result(800, 400_000_000, 100, 2_000_000_000)))
+    stats.record("Optimized", token_usage(_ollama_result(1200, 600_000_000, 300, 6_000_000_000)))
+    stats.record("Technical", token_usage(_ollama_result(2000, 1_000_000_000, 50, 1_000_000_000)))
+
+    summary = stats.get_stats()
+    optimized = summary['by_strategy']['Optimized']
+
+    assert summary['generations'] == 3
+    assert summary['prompt_tokens'] == 4000
+    assert optimized['avg_prompt_tokens'] == 1000.0
+    assert optimized['generated_tokens_per_sec'] == 50.0
+    assert summary['by_strategy']['Technical']['avg_generated_tokens'] == 50.0
+
+    print(f"✅ Estadísticas OK ({summary['generated_tokens_per_sec']} tok/s)")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DE USO DE TOKENS")
+    print("="*60)
+
+    try:
+        test_token_usage_rates()
+        test_stats_by_strategy()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DE USO DE TOKENS PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -11,7 +11,7 @@ project_root = os.path.dirname(script_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from utils.validators import ResponseValidator, ValidationReport
+from utils.validators import PhraseMatcher, ResponseValidator, ValidationReport, contains_word
 
 
 def test_validator_good_response():
@@ -161,6 +161,31 @@ def test_validator_integration_with_config():
         raise
 
 
+def test_phrase_matcher_single_pass():
+    """Test: Frases de todas las listas detectadas en una sola pasada"""
+    print("\n🧪 TEST 7: Patrón único de frases")
+    print("-" * 50)
+    
+    validator = ResponseValidator(strict_mode=True)
+    
+    # Frases superpuestas de dos listas distintas
+    analysis = validator.analyze("Si la info no está en los manuales, decilo. Tal vez.")
+    assert analysis.phrases == {'instructions', 'fallback', 'vague'}
+    
+    # Una frase que es prefijo de otra marca las dos categorías
+    matcher = PhraseMatcher({'corta': ['no tengo'], 'larga': ['no tengo datos']})
+    assert matcher.find("hoy no tengo datos") == {'corta', 'larga'}
+    assert matcher.find("no tengo") == {'corta'}
+    assert matcher.find("nada") == set()
+    
+    # Palabra completa en el contexto, igual que \\b...\\b
+    assert contains_word("el agua de bebida", "bebida")
+    assert not contains_word("bebidas frescas", "bebida")
+    assert contains_word("bebidas y bebida_ x bebida.", "bebida")
+    
+    print("✅ Patrón único OK")
+
+
 if __name__ == "__main__":
     print("\n" + "="*60)
     print("🧪 TESTS DE VALIDADORES")
@@ -173,6 +198,7 @@ if __name__ == "__main__":
         test_validator_fallback_message()
         test_validator_print_report()
         test_validator_integration_with_config()
+        test_phrase_matcher_single_pass()
         
         print("\n" + "="*60)
         print("✅ TODOS LOS TESTS DE VALIDADORES PASARON")
@@ -0,0 +1,115 @@
+"""
+Tests para el índice de vocabulario por chunk
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Agregar la raíz del proyecto al path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.context_builder import ContextBuilder, join_context
+from utils.validators import ResponseValidator, SIGNIFICANT_WORD
+from utils.vocabulary_index import VocabularyIndex, word_frequencies
+
+
+CHUNKS_FILE = os.path.join(project_root, "data", "processed", "chunks.json")
+
+
+def _load_chunks():
+    with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _docs(chunks, indices):
+    """Convertir chunks reales al formato de retrieve_documents"""
+    return [
+        {
+            'rank': rank,
+            'chunk_id': chunks[i]['chunk_id'],
+            'text': chunks[i]['text'],
+            'similarity': round(0.9 - rank * 0.05, 4),
+            'metadata': {
+                'source': chunks[i]['source'],
+                'chunk_number': chunks[i]['chunk_number']
+            }
+        }
+        for rank, i in enumerate(indices, 1)
+    ]
+
+
+def test_build_and_persist():
+    """Test: Frecuencias por chunk y persistencia"""
+    print("\n🧪 TEST 1: Construcción y persistencia")
+    print("-" * 50)
+
+    assert word_frequencies("Vacunas, vacunas y VACUNAS del ganado") == {'vacunas': 3, 'ganado': 1}
+
+    chunks = _load_chunks()
+    index = VocabularyIndex.build(chunks)
+    assert len(index) == len(chunks)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(tmp)
+        loaded = VocabularyIndex.load(tmp)
+    assert loaded.frequencies == index.frequencies
+
+    first, second = chunks[0]['chunk_id'], chunks[1]['chunk_id']
+    assert index.words_for([first, second]) == index.words[first] | index.words[second]
+    assert index.words_for([first, 'no_existe']) is None
+
+    print(f"✅ Vocabulario de {len(index)} chunks OK")
+
+
+def test_context_words_match_context():
+    """Test: La unión de vocabularios coincide con tokenizar el contexto armado"""
+    print("\n🧪 TEST 2: Vocabulario del contexto")
+    print("-" * 50)
+
+    chunks = _load_chunks()
+    index = VocabularyIndex.build(chunks)
+    validator = ResponseValidator()
+
+    # Chunks consecutivos (se fusionan) más chunks sueltos; con presupuesto
+    # chico el último pasaje queda truncado
+    for budget in (8000, 900):
+        docs, stats = ContextBuilder(token_budget=budget).build(_docs(chunks, [3, 4, 5, 20, 41]))
+        context = join_context(docs)
+        context_words = index.context_words(docs)
+        assert context_words == set(SIGNIFICANT_WORD.findall(context.lower()))
+
+        # La validación da lo mismo con y sin vocabulario precalculado
+        for chunk in chunks[:40]:
+            response = chunk['text'][:600]
+            scanned = validator.validate_response(response, context, "¿Cómo vacunar?")
+            indexed = validator.validate_response(
+                response, context, "¿Cómo vacunar?", context_words=context_words
+            )
+            assert scanned == indexed
+        print(f"   presupuesto {budget}: {len(docs)} pasajes, {stats['truncated_passages']} truncados")
+
+    print("✅ Vocabulario del contexto OK")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🧪 TESTS DEL ÍNDICE DE VOCABULARIO")
+    print("="*60)
+
+    try:
+        test_build_and_persist()
+        test_context_words_match_context()
+
+        print("\n" + "="*60)
+        print("✅ TODOS LOS TESTS DEL ÍNDICE DE VOCABULARIO PASARON")
+        print("="*60 + "\n")
+
+    except Exception as e:
+        print(f"\n❌ TESTS FALLARON: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,76 @@
+"""
+Caché de respuestas generadas por el LLM
+Se consulta cuando Ollama no está disponible (circuito abierto o falla)
+para devolver la última respuesta buena a la misma pregunta
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import re
+import threading
+import time
+import unicodedata
+
+
+def normalize_query(query: str) -> str:
+    """Normalizar pregunta: minúsculas, sin tildes, signos ni espacios repetidos"""
+    text = unicodedata.normalize('NFKD', query.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+class AnswerCache:
+    """
+    Caché LRU con vencimiento, segura entre hilos
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 86400):
+        """
+        Args:
+            max_entries: Máximo de respuestas guardadas
+            ttl: Segundos de validez de cada respuesta
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(query: str, strategy: str) -> Tuple[str, str]:
+        return normalize_query(query), strategy.lower()
+
+    def get(self, query: str, strategy: str) -> Optional[Dict]:
+        """Respuesta guardada para (query, estrategia), o None si no hay o venció"""
+        key = self._key(query, strategy)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, query: str, strategy: str, result: Dict):
+        """Guardar respuesta exitosa"""
+        if self.max_entries <= 0:
+            return
+        key = self._key(query, strategy)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> Dict:
+        """Tamaño y aciertos de la caché"""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
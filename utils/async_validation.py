@@ -0,0 +1,197 @@
+"""
+Validación de respuestas en segundo plano
+generate_answer encola la validación y responde sin esperarla; hilos
+dedicados corren el ResponseValidator y guardan el resultado, que se
+consulta después por su validation_id (GET /api/v1/validation/{id})
+
+La cola y los resultados tienen límite: con la cola llena la validación
+se omite, y los resultados se descartan al vencer su TTL o al superar
+max_results (los más viejos primero)
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import queue
+import threading
+import time
+import uuid
+
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "error"
+
+
+class AsyncValidator:
+    """
+    Cola acotada de validaciones atendida por hilos, con los resultados recientes en memoria
+    """
+
+    def __init__(
+        self,
+        validator,
+        workers: int = 1,
+        max_results: int = 1000,
+        max_pending: int = 1000,
+        result_ttl: float = 3600.0,
+        on_result: Optional[Callable[[Dict, Dict], None]] = None
+    ):
+        """
+        Args:
+            validator: ResponseValidator que hace el trabajo
+            workers: Hilos que atienden la cola
+            max_results: Validaciones conservadas para consulta (se descartan las más viejas)
+            max_pending: Validaciones en cola; con la cola llena submit() las omite
+            result_ttl: Segundos que se conserva cada validación desde que se encoló
+            on_result: Callback(registro, labels) al terminar cada validación (métricas)
+        """
+        self.validator = validator
+        self.workers = workers
+        self.max_results = max_results
+        self.result_ttl = result_ttl
+        self.on_result = on_result
+        self.skipped = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_pending)
+        # validation_id -> (momento en que se encoló, registro), en orden de llegada
+        self._records: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+
+    def submit(
+        self,
+        response: str,
+        context: str,
+        query: str,
+        context_words: Optional[Set[str]] = None,
+        labels: Optional[Dict] = None
+    ) -> Optional[str]:
+        """
+        Encolar una validación (no bloquea)
+
+        Args:
+            labels: Datos de la consulta que se pasan a on_result (ej: estrategia)
+
+        Returns:
+            validation_id para consultar el resultado, o None si la cola
+            está llena y la validación se omitió
+        """
+        validation_id = uuid.uuid4().hex
+        record = {
+            'validation_id': validation_id,
+            'status': PENDING,
+            'validation': None,
+            'error': None,
+            'submitted_at': datetime.now().isoformat(),
+            'completed_at': None,
+            'seconds': None
+        }
+        with self._lock:
+            self._purge()
+            # Se registra antes de encolar: un hilo puede terminarla enseguida
+            self._records[validation_id] = (time.monotonic(), record)
+            while len(self._records) > self.max_results:
+                self._records.popitem(last=False)
+        try:
+            self._queue.put_nowait((validation_id, response, context, query, context_words, labels or {}))
+        except queue.Full:
+            with self._lock:
+                self._records.pop(validation_id, None)
+                self.skipped += 1
+            return None
+        return validation_id
+
+    def get(self, validation_id: str) -> Optional[Dict]:
+        """Estado de una validación, o None si no existe o ya se descartó"""
+        with self._lock:
+            self._purge()
+            entry = self._records.get(validation_id)
+            return dict(entry[1]) if entry else None
+
+    def _purge(self):
+        """Descartar las validaciones con el TTL vencido (llamar con el lock tomado)"""
+        expired_before = time.monotonic() - self.result_ttl
+        while self._records:
+            submitted, _ = next(iter(self._records.values()))
+            if submitted > expired_before:
+                break
+            self._records.popitem(last=False)
+
+    def wait(self, validation_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Esperar a que la validación termine (devuelve el estado aunque siga pendiente)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._done:
+            while True:
+                entry = self._records.get(validation_id)
+                record = entry[1] if entry else None
+                if record is None or record['status'] != PENDING:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._done.wait(remaining)
+            return dict(record) if record else None
+
+    def pending(self) -> int:
+        """Validaciones en cola o en curso"""
+        return self._queue.unfinished_tasks
+
+    def start(self):
+        """Iniciar los hilos (idempotente)"""
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._threads = [
+            threading.Thread(target=self._run, name=f"validation-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Detener los hilos después de procesar lo ya encolado"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._validate(*item)
+            finally:
+                self._queue.task_done()
+
+    def _validate(self, validation_id, response, context, query, context_words, labels):
+        start = time.perf_counter()
+        try:
+            result = self.validator.validate_response(
+                response=response,
+                context=context,
+                query=query,
+                context_words=context_words
+            )
+            update = {'status': DONE, 'validation': result}
+        except Exception as e:
+            update = {'status': FAILED, 'error': str(e)}
+        update['validation_id'] = validation_id
+        update['seconds'] = round(time.perf_counter() - start, 6)
+        update['completed_at'] = datetime.now().isoformat()
+
+        with self._done:
+            entry = self._records.get(validation_id)
+            if entry is not None:
+                entry[1].update(update)
+                update = dict(entry[1])
+            self._done.notify_all()
+
+        # Las métricas se alimentan aunque el registro ya se haya descartado
+        if self.on_result:
+            try:
+                self.on_result(update, labels)
+            except Exception as e:
+                print(f"⚠️  Error registrando validación {validation_id}: {e}")
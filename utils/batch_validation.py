@@ -0,0 +1,159 @@
+"""
+Validación de muchas respuestas a la vez (evaluaciones offline)
+Valida triples (response, context, query) con un único ResponseValidator
+por proceso (patrones compilados una vez) y tokeniza una sola vez cada
+contexto repetido; opcionalmente reparte el trabajo en varios procesos
+"""
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import json
+import multiprocessing
+
+from utils.validators import ResponseValidator, SIGNIFICANT_WORD
+
+
+# Ítems por tarea cuando se valida en varios procesos
+DEFAULT_CHUNK_SIZE = 256
+
+# Validador de cada proceso del pool (lo crea _init_worker)
+_worker_validator: Optional[ResponseValidator] = None
+
+
+def _validate_items(validator: ResponseValidator, items: Sequence[Dict]) -> List[Dict]:
+    """
+    Validar ítems compartiendo el vocabulario de los contextos repetidos
+
+    Un contexto que aparece una sola vez se recorre con el corte temprano
+    del validador; tokenizarlo entero solo conviene si se reutiliza.
+    """
+    repeated = {
+        context for context, count in Counter(item.get('context', '') for item in items).items()
+        if count > 1
+    }
+    vocabulary: Dict[str, set] = {}
+
+    results = []
+    for index, item in enumerate(items):
+        context = item.get('context', '')
+        context_words = None
+        if context in repeated:
+            context_words = vocabulary.get(context)
+            if context_words is None:
+                context_words = vocabulary[context] = set(SIGNIFICANT_WORD.findall(context.lower()))
+        validation = validator.validate_response(
+            item['response'], context, item.get('query', ''), context_words=context_words
+        )
+        results.append({'id': item.get('id', index), **validation})
+    return results
+
+
+def _init_worker(min_length: int, max_length: int, strict_mode: bool):
+    global _worker_validator
+    _worker_validator = ResponseValidator(min_length=min_length, max_length=max_length, strict_mode=strict_mode)
+
+
+def _validate_chunk(items: Sequence[Dict]) -> List[Dict]:
+    return _validate_items(_worker_validator, items)
+
+
+def validate_batch(
+    items: Sequence[Dict],
+    min_length: int = 50,
+    max_length: int = 2000,
+    strict_mode: bool = False,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> List[Dict]:
+    """
+    Validar muchas respuestas
+
+    Args:
+        items: Dicts con 'response', 'context' y 'query' (y opcionalmente 'id')
+        min_length, max_length, strict_mode: Parámetros de ResponseValidator
+        workers: Procesos en paralelo (1 = en este proceso)
+        chunk_size: Ítems por tarea en el pool
+
+    Returns:
+        Por ítem y en el mismo orden: 'id' (o su posición) más el resultado
+        de validate_response
+    """
+    if workers <= 1 or len(items) <= chunk_size:
+        validator = ResponseValidator(min_length=min_length, max_length=max_length, strict_mode=strict_mode)
+        return _validate_items(validator, items)
+
+    # Los ids por defecto son la posición en el lote completo, no en el chunk
+    items = [item if 'id' in item else {**item, 'id': index} for index, item in enumerate(items)]
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+    # 'spawn' como en benchmarks/chunking_sweep.py: no hereda el estado del proceso padre
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(min_length, max_length, strict_mode)
+    ) as pool:
+        return [result for chunk in pool.map(_validate_chunk, chunks) for result in chunk]
+
+
+# ==================== RESUMEN Y SALIDA ====================
+
+def to_columns(results: Sequence[Dict]) -> Dict[str, List]:
+    """Resultados por ítem en columnas: id, is_valid, score, un booleano por chequeo y recommendations"""
+    checks = list(results[0]['validations']) if results else []
+    columns: Dict[str, List] = {'id': [], 'is_valid': [], 'score': []}
+    columns.update({check: [] for check in checks})
+    columns['recommendations'] = []
+    for result in results:
+        columns['id'].append(result['id'])
+        columns['is_valid'].append(result['is_valid'])
+        columns['score'].append(result['score'])
+        for check in checks:
+            columns[check].append(result['validations'][check])
+        columns['recommendations'].append(result['recommendations'])
+    return columns
+
+
+def summarize(results: Sequence[Dict]) -> Dict:
+    """Tasa de aprobación de cada chequeo, proporción de respuestas válidas y score promedio"""
+    columns = to_columns(results)
+    total = len(results)
+    checks = [name for name in columns if name not in ('id', 'is_valid', 'score', 'recommendations')]
+    return {
+        'items': total,
+        'valid_rate': round(sum(columns['is_valid']) / total, 4) if total else 0.0,
+        'mean_score': round(sum(columns['score']) / total, 4) if total else 0.0,
+        'pass_rate': {check: round(sum(columns[check]) / total, 4) for check in checks}
+    }
+
+
+def write_jsonl(results: Sequence[Dict], path: Path):
+    """Un resultado por línea"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def write_parquet(results: Sequence[Dict], path: Path):
+    """
+    Resultados en columnas (un booleano por chequeo)
+
+    Raises:
+        ImportError: Si pyarrow no está instalado
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow no instalado: pip install pyarrow (o usar JSONL)")
+
+    columns = to_columns(results)
+    # Los ids pueden mezclar tipos según la fuente: se guardan como texto
+    columns['id'] = [str(value) for value in columns['id']]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.table(columns), path)
@@ -0,0 +1,121 @@
+"""
+Cancelación y deadlines de consultas
+Un CancelToken viaja por retrieval y generación; lo cancela el cliente al
+desconectarse o un Deadline al vencer, y corta el stream de Ollama en curso
+"""
+
+from typing import Callable, List, Optional
+import threading
+import time
+
+
+# Motivos de cancelación
+CLIENT_DISCONNECTED = "client_disconnected"
+DEADLINE_EXCEEDED = "deadline_exceeded"
+INVALID_OUTPUT = "invalid_output"
+
+
+class GenerationCancelled(Exception):
+    """La generación se canceló antes de terminar (no es una falla de Ollama)"""
+
+    def __init__(self, reason: Optional[str] = None):
+        self.reason = reason
+        super().__init__(f"Generación cancelada ({reason})" if reason else "Generación cancelada")
+
+
+class CancelToken:
+    """
+    Señal de cancelación compartida entre hilos
+    Al cancelar ejecuta los callbacks registrados (ej: cortar el stream HTTP)
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self._detach: Optional[Callable[[], None]] = None
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: Optional[str] = None):
+        """Cancelar (idempotente) y ejecutar los callbacks pendientes"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def register(self, callback: Callable[[], None]):
+        """Registrar callback; si ya estaba cancelado se ejecuta en el momento"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def unregister(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def child(self) -> 'CancelToken':
+        """
+        Token que se cancela junto con este (mismo motivo) pero también puede cancelarse solo
+        Llamar a close() cuando ya no se usa para no dejar su callback en el padre
+        """
+        child = CancelToken()
+        propagate = lambda: child.cancel(self.reason)
+        child._detach = lambda: self.unregister(propagate)
+        self.register(propagate)
+        return child
+
+    def close(self):
+        """Desengancharse del token padre (no hace nada si no es un token hijo)"""
+        detach, self._detach = self._detach, None
+        if detach:
+            detach()
+
+    def raise_if_cancelled(self):
+        """Lanzar GenerationCancelled si el token ya fue cancelado"""
+        if self.cancelled:
+            raise GenerationCancelled(self.reason)
+
+
+class Deadline:
+    """
+    Tiempo límite de una consulta: al vencer cancela el token con DEADLINE_EXCEEDED
+    """
+
+    def __init__(self, seconds: float, token: CancelToken):
+        """
+        Args:
+            seconds: Segundos disponibles desde ahora
+            token: Token a cancelar al vencer
+        """
+        self.seconds = seconds
+        self.token = token
+        self.expires_at = time.monotonic() + seconds
+        self._timer = threading.Timer(seconds, token.cancel, kwargs={'reason': DEADLINE_EXCEEDED})
+        self._timer.daemon = True
+        self._timer.start()
+
+    def remaining(self) -> float:
+        """Segundos restantes (0 si ya venció)"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() == 0.0
+
+    def clear(self):
+        """Desactivar el timer (la consulta terminó a tiempo)"""
+        self._timer.cancel()
@@ -0,0 +1,184 @@
+"""
+Circuit breaker para las llamadas de generación a Ollama
+Después de varias fallas (o respuestas demasiado lentas) seguidas deja de
+enviar requests, sondea Ollama en segundo plano y deja pasar un request de
+prueba cuando vuelve a responder
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, Optional
+import threading
+import time
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de tres estados (closed → open → half_open → closed)
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 60.0,
+        probe_interval: float = 15.0,
+        probe: Optional[Callable[[], bool]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Inicializar breaker
+
+        Args:
+            failure_threshold: Fallas consecutivas que abren el circuito
+            slow_call_seconds: Latencia a partir de la cual un llamado exitoso cuenta como falla
+            probe_interval: Segundos entre sondeos mientras el circuito está abierto
+            probe: Función que devuelve True si el servicio responde (ej: GET /api/tags)
+            clock: Reloj monotónico (inyectable para tests)
+        """
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.probe_interval = probe_interval
+        self.probe = probe
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._probe_thread: Optional[threading.Thread] = None
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+        self._opened_at: Optional[float] = None
+        self.stats = {
+            'successes': 0,
+            'failures': 0,
+            'slow_calls': 0,
+            'rejected': 0,
+            'times_opened': 0,
+            'latency_avg': None,
+            'last_failure': None,
+            'last_opened': None
+        }
+
+    # ==================== CONTROL DE PASO ====================
+
+    def allow_request(self) -> bool:
+        """
+        Decidir si un request puede llamar a Ollama
+
+        En half_open deja pasar un único request de prueba a la vez.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.stats['rejected'] += 1
+            return False
+
+    def record_success(self, latency: float):
+        """Registrar llamado exitoso (los llamados lentos cuentan como falla)"""
+        if latency >= self.slow_call_seconds:
+            with self._lock:
+                self.stats['slow_calls'] += 1
+            self.record_failure(latency)
+            return
+
+        with self._lock:
+            self._update_latency(latency)
+            self.stats['successes'] += 1
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+            self.state = CLOSED
+            self._opened_at = None
+
+    def record_cancelled(self):
+        """Llamado cancelado por el cliente: no cuenta, solo libera el request de prueba"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self, latency: Optional[float] = None):
+        """Registrar falla; abre el circuito al llegar al umbral o si falla la prueba"""
+        with self._lock:
+            if latency is not None:
+                self._update_latency(latency)
+            self.stats['failures'] += 1
+            self.stats['last_failure'] = datetime.now().isoformat()
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+
+            should_open = (
+                self.state == HALF_OPEN
+                or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold)
+            )
+            if should_open:
+                self._open()
+
+        if should_open:
+            self._start_probe()
+
+    def _open(self):
+        """Pasar a open (llamar con el lock tomado)"""
+        self.state = OPEN
+        self._opened_at = self.clock()
+        self.stats['times_opened'] += 1
+        self.stats['last_opened'] = datetime.now().isoformat()
+
+    def _update_latency(self, latency: float):
+        """Promedio móvil exponencial de la latencia (llamar con el lock tomado)"""
+        previous = self.stats['latency_avg']
+        self.stats['latency_avg'] = latency if previous is None else 0.8 * previous + 0.2 * latency
+
+    # ==================== SONDEO EN SEGUNDO PLANO ====================
+
+    def _start_probe(self):
+        """Lanzar hilo de sondeo mientras el circuito esté abierto (idempotente)"""
+        if self.probe is None:
+            return
+        if self._probe_thread and self._probe_thread.is_alive():
+            return
+        self._stop.clear()
+        self._probe_thread = threading.Thread(
+            target=self._run_probe, name="ollama-circuit-probe", daemon=True
+        )
+        self._probe_thread.start()
+
+    def _run_probe(self):
+        while not self._stop.wait(self.probe_interval):
+            try:
+                healthy = self.probe()
+            except Exception:
+                healthy = False
+            if healthy:
+                with self._lock:
+                    if self.state == OPEN:
+                        self.state = HALF_OPEN
+                return
+
+    def stop(self):
+        """Detener el hilo de sondeo"""
+        self._stop.set()
+        if self._probe_thread:
+            self._probe_thread.join(timeout=5)
+            self._probe_thread = None
+
+    # ==================== ESTADO ====================
+
+    def snapshot(self) -> Dict:
+        """Estado actual del breaker (para /health y /stats)"""
+        with self._lock:
+            open_for = None
+            if self._opened_at is not None:
+                open_for = round(self.clock() - self._opened_at, 1)
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'open_for_seconds': open_for,
+                **self.stats
+            }
@@ -0,0 +1,107 @@
+"""
+Compresión contextual a nivel de oración
+Conserva solo las oraciones de los chunks recuperados más cercanas a la
+query (más sus vecinas), usando los embeddings del índice de oraciones
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from utils.sentence_index import SentenceIndex
+
+
+# Marca entre grupos de oraciones no contiguas
+GAP_MARK = " [...] "
+
+
+class SentenceCompressor:
+    """
+    Compresor de contexto basado en similitud oración-query
+    """
+
+    def __init__(self, index: SentenceIndex, top_sentences: int = 8, neighbors: int = 1):
+        """
+        Inicializar compresor
+
+        Args:
+            index: Índice de oraciones precalculado
+            top_sentences: Oraciones más similares a conservar (entre todos los chunks)
+            neighbors: Oraciones vecinas a conservar a cada lado de una seleccionada
+        """
+        self.index = index
+        self.top_sentences = top_sentences
+        self.neighbors = neighbors
+
+    def compress(self, docs: List[Dict], query_embedding) -> Tuple[List[Dict], Dict]:
+        """
+        Comprimir documentos recuperados
+
+        Los documentos sin chunk_id indexado se devuelven sin cambios.
+
+        Args:
+            docs: Documentos de retrieve_documents (con 'chunk_id')
+            query_embedding: Embedding de la query
+
+        Returns:
+            (documentos comprimidos en el mismo orden, estadísticas)
+        """
+        chunk_ids = [doc.get('chunk_id') for doc in docs if doc.get('chunk_id') in self.index]
+        rows, scores = self.index.score(chunk_ids, query_embedding)
+
+        # Top-N global + vecinas dentro del mismo chunk
+        keep = set()
+        seen_texts = set()
+        for position in np.argsort(-scores):
+            if len(seen_texts) >= self.top_sentences:
+                break
+            row = int(rows[position])
+            # Las oraciones repetidas por el overlap del chunker cuentan una sola vez
+            text = self.index.sentences[row]
+            if text in seen_texts:
+                continue
+            seen_texts.add(text)
+            chunk_rows = self.index.rows_for(self.index.chunk_ids[row])
+            for neighbor in range(row - self.neighbors, row + self.neighbors + 1):
+                if neighbor in chunk_rows:
+                    keep.add(neighbor)
+
+        compressed = []
+        chars_before = 0
+        chars_after = 0
+        emitted = set()
+        for doc in docs:
+            chars_before += len(doc['text'])
+            chunk_id = doc.get('chunk_id')
+            if chunk_id not in self.index:
+                compressed.append(doc)
+                chars_after += len(doc['text'])
+                continue
+
+            groups = []
+            previous = None
+            for row in self.index.rows_for(chunk_id):
+                text = self.index.sentences[row]
+                if row not in keep or text in emitted:
+                    continue
+                emitted.add(text)
+                if previous is not None and row == previous + 1:
+                    groups[-1].append(text)
+                else:
+                    groups.append([text])
+                previous = row
+
+            if not groups:
+                continue
+            text = GAP_MARK.join(' '.join(group) for group in groups)
+            compressed.append({**doc, 'text': text, 'compressed': True})
+            chars_after += len(text)
+
+        stats = {
+            'sentences_scored': int(rows.size),
+            'sentences_kept': len(emitted),
+            'chars_before': chars_before,
+            'chars_after': chars_after,
+            'compression_ratio': round(chars_before / chars_after, 2) if chars_after else None
+        }
+        return compressed, stats
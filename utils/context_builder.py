@@ -0,0 +1,199 @@
+"""
+Armado del contexto para el prompt con presupuesto de tokens
+Elimina el texto repetido por el overlap del chunker, fusiona chunks
+consecutivos de la misma fuente y llena el presupuesto por relevancia
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.context_window import estimate_tokens, truncate_doc
+
+
+# Máximo de palabras a revisar al buscar overlap entre chunks consecutivos
+MAX_OVERLAP_WORDS = 200
+
+# Separador entre pasajes del bloque de contexto
+PASSAGE_SEPARATOR = "\n\n---\n\n"
+
+
+def format_context_doc(doc: Dict) -> str:
+    """Formatear un documento recuperado tal como se inserta en el prompt"""
+    return f"Fragmento {doc['rank']} (Similaridad: {doc['similarity']}):\n{doc['text']}"
+
+
+def join_context(docs: List[Dict]) -> str:
+    """Unir documentos recuperados en el bloque de contexto del prompt"""
+    return PASSAGE_SEPARATOR.join(format_context_doc(doc) for doc in docs)
+
+
+def find_overlap(previous: str, following: str, max_words: int = MAX_OVERLAP_WORDS) -> int:
+    """
+    Encontrar cuántas palabras del final de `previous` repite el inicio de `following`
+
+    Args:
+        previous: Texto del chunk anterior
+        following: Texto del chunk siguiente
+        max_words: Máximo de palabras de overlap a considerar
+
+    Returns:
+        Cantidad de palabras repetidas (0 si no hay overlap)
+    """
+    prev_words = previous.split()
+    next_words = following.split()
+    if not prev_words or not next_words:
+        return 0
+
+    start = max(0, len(prev_words) - max_words)
+    first = next_words[0]
+    # El primer candidato desde la izquierda da el overlap más largo
+    for j in range(start, len(prev_words)):
+        if prev_words[j] != first:
+            continue
+        tail = prev_words[j:]
+        if next_words[:len(tail)] == tail:
+            return len(tail)
+    return 0
+
+
+def _chunk_position(doc: Dict) -> Optional[Tuple[str, int]]:
+    """(source, chunk_number) del documento, o None si no tiene metadata"""
+    metadata = doc.get('metadata') or {}
+    source = metadata.get('source')
+    number = metadata.get('chunk_number')
+    if source is None or number is None:
+        return None
+    return source, int(number)
+
+
+class ContextBuilder:
+    """
+    Constructor de contexto con de-duplicación de overlap y presupuesto de tokens
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 4000,
+        format_doc: Optional[Callable[[Dict], str]] = None,
+        merge_adjacent: bool = True
+    ):
+        """
+        Inicializar constructor
+
+        Args:
+            token_budget: Tokens máximos del contexto
+            format_doc: Función que formatea un documento tal como va al prompt
+            merge_adjacent: Fusionar chunks consecutivos de la misma fuente
+        """
+        self.token_budget = token_budget
+        self.format_doc = format_doc or (lambda doc: doc['text'])
+        self.merge_adjacent = merge_adjacent
+
+    def build(self, docs: List[Dict]) -> Tuple[List[Dict], Dict]:
+        """
+        Armar pasajes para el prompt
+
+        Args:
+            docs: Documentos recuperados, ordenados por relevancia
+
+        Returns:
+            (pasajes ordenados por relevancia, estadísticas de tokens)
+        """
+        tokens_before = sum(estimate_tokens(self.format_doc(doc)) for doc in docs)
+
+        passages, overlap_removed, merged = (
+            self._merge(docs) if self.merge_adjacent else (list(docs), 0, 0)
+        )
+
+        selected = []
+        used = 0
+        dropped = 0
+        truncated = 0
+        for passage in passages:
+            tokens = estimate_tokens(self.format_doc(passage))
+            if used + tokens > self.token_budget:
+                # Truncar en lugar de descartar si queda espacio útil
+                # (un pasaje fusionado puede superar el presupuesto por sí solo)
+                passage = truncate_doc(passage, self.token_budget - used, self.format_doc)
+                if passage is None:
+                    dropped += 1
+                    continue
+                truncated += 1
+                tokens = estimate_tokens(self.format_doc(passage))
+            selected.append(passage)
+            used += tokens
+
+        stats = {
+            'tokens_before': tokens_before,
+            'tokens_after': used,
+            'tokens_saved': tokens_before - used,
+            'overlap_words_removed': overlap_removed,
+            'merged_chunks': merged,
+            'truncated_passages': truncated,
+            'dropped_passages': dropped
+        }
+        return selected, stats
+
+    def _merge(self, docs: List[Dict]) -> Tuple[List[Dict], int, int]:
+        """
+        Fusionar chunks consecutivos (misma fuente, chunk_number contiguo)
+
+        Returns:
+            (pasajes, palabras de overlap eliminadas, chunks fusionados)
+        """
+        by_position = {}
+        for doc in docs:
+            position = _chunk_position(doc)
+            if position is not None:
+                by_position[position] = doc
+
+        consumed = set()
+        passages = []
+        overlap_removed = 0
+        merged = 0
+
+        for doc in docs:
+            position = _chunk_position(doc)
+            if position is None:
+                passages.append(doc)
+                continue
+            if position in consumed:
+                continue
+
+            # Retroceder hasta el inicio de la racha de chunks consecutivos
+            source, number = position
+            while (source, number - 1) in by_position and (source, number - 1) not in consumed:
+                number -= 1
+
+            run = []
+            while (source, number) in by_position and (source, number) not in consumed:
+                run.append(by_position[(source, number)])
+                consumed.add((source, number))
+                number += 1
+
+            if len(run) == 1:
+                passages.append(doc)
+                continue
+
+            text = run[0]['text']
+            for following in run[1:]:
+                overlap = find_overlap(text, following['text'])
+                overlap_removed += overlap
+                remainder = following['text'].split()[overlap:]
+                if remainder:
+                    text = f"{text} {' '.join(remainder)}"
+            merged += len(run) - 1
+
+            best = min(run, key=lambda d: d.get('rank', 0))
+            passages.append({
+                **best,
+                'text': text,
+                'similarity': max(d.get('similarity', 0) for d in run),
+                'metadata': {
+                    **best.get('metadata', {}),
+                    'chunk_numbers': [_chunk_position(d)[1] for d in run]
+                },
+                'merged_ranks': [d.get('rank') for d in run],
+                'merged_chunk_ids': [d.get('chunk_id') for d in run]
+            })
+
+        return passages, overlap_removed, merged
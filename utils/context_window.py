@@ -0,0 +1,156 @@
+"""
+Dimensionamiento de la ventana de contexto (num_ctx) de Ollama
+Estima tokens del prompt y elige el bucket más chico que entra,
+recortando el contexto de forma controlada si no entra en ninguno
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import math
+import threading
+
+
+# Promedio conservador para español con tokenizadores tipo Llama
+CHARS_PER_TOKEN = 3.5
+
+# Buckets de num_ctx (potencias de 2 para reutilizar asignaciones del KV cache)
+DEFAULT_NUM_CTX_BUCKETS = (2048, 4096, 8192)
+
+# Margen para tokens especiales y plantilla del modelo
+DEFAULT_SAFETY_MARGIN = 64
+
+# Si al último documento le quedan menos tokens que esto, se descarta en lugar de truncarlo
+MIN_TRUNCATED_DOC_TOKENS = 50
+
+# Marca que se agrega al final de un documento truncado
+TRUNCATION_MARK = " [...]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimar cantidad de tokens de un texto (sin tokenizador real)"""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def select_num_ctx(
+    prompt_tokens: int,
+    num_predict: int,
+    buckets: Sequence[int] = DEFAULT_NUM_CTX_BUCKETS,
+    margin: int = DEFAULT_SAFETY_MARGIN
+) -> int:
+    """
+    Elegir el bucket de num_ctx más chico que entra prompt + respuesta
+
+    Args:
+        prompt_tokens: Tokens estimados del prompt
+        num_predict: Tokens máximos de la respuesta
+        buckets: Tamaños de contexto permitidos
+        margin: Margen de seguridad
+
+    Returns:
+        num_ctx elegido (el bucket más grande si ninguno alcanza)
+    """
+    needed = prompt_tokens + num_predict + margin
+    ordered = sorted(buckets)
+    for size in ordered:
+        if size >= needed:
+            return size
+    return ordered[-1]
+
+
+class NumCtxSelector:
+    """
+    num_ctx de cada consulta y el último enviado a Ollama
+
+    Por defecto cada consulta usa el bucket más chico que entra. current es
+    el último num_ctx enviado: el pre-calentamiento y el keeper lo reusan
+    para no forzar una recarga del modelo (Ollama recarga al cambiar num_ctx).
+    Con sticky el valor solo crece: se evitan recargas a costa de un KV cache
+    más grande para los prompts cortos.
+    """
+
+    def __init__(
+        self,
+        buckets: Sequence[int] = DEFAULT_NUM_CTX_BUCKETS,
+        initial: Optional[int] = None,
+        margin: int = DEFAULT_SAFETY_MARGIN,
+        sticky: bool = False
+    ):
+        """
+        Args:
+            buckets: Tamaños de contexto permitidos
+            initial: num_ctx con el que se carga el modelo (por defecto el bucket más chico)
+            margin: Margen de seguridad
+            sticky: No volver a un bucket menor que el ya cargado
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.margin = margin
+        self.sticky = sticky
+        self.current = initial if initial is not None else self.buckets[0]
+        self._lock = threading.Lock()
+
+    def select(self, prompt_tokens: int, num_predict: int) -> int:
+        """num_ctx para una consulta: el bucket que necesita (o el cargado, si es mayor y sticky)"""
+        needed = select_num_ctx(prompt_tokens, num_predict, self.buckets, self.margin)
+        with self._lock:
+            if needed > self.current or not self.sticky:
+                self.current = needed
+            return self.current
+
+
+def truncate_doc(
+    doc: Dict,
+    token_budget: int,
+    format_doc: Callable[[Dict], str]
+) -> Optional[Dict]:
+    """
+    Truncar el texto de un documento por palabras para que entre en el presupuesto
+
+    Returns:
+        Copia truncada del documento, o None si el espacio no alcanza
+    """
+    if token_budget < MIN_TRUNCATED_DOC_TOKENS:
+        return None
+    overhead = estimate_tokens(format_doc(doc)) - estimate_tokens(doc['text'])
+    max_chars = int((token_budget - overhead) * CHARS_PER_TOKEN) - len(TRUNCATION_MARK)
+    truncated = doc['text'][:max(max_chars, 0)].rsplit(' ', 1)[0]
+    if not truncated:
+        return None
+    return {**doc, 'text': truncated + TRUNCATION_MARK, 'truncated': True}
+
+
+def trim_docs_to_budget(
+    docs: List[Dict],
+    token_budget: int,
+    format_doc: Callable[[Dict], str]
+) -> Tuple[List[Dict], int]:
+    """
+    Recortar documentos (en orden de relevancia) para que entren en el presupuesto
+
+    Se conservan los documentos de mayor rank; el primero que no entra se
+    trunca por palabras si le queda espacio útil y el resto se descarta.
+
+    Args:
+        docs: Documentos ordenados por relevancia
+        token_budget: Tokens disponibles para el contexto
+        format_doc: Función que formatea un documento tal como va al prompt
+
+    Returns:
+        (documentos conservados, cantidad de documentos recortados o descartados)
+    """
+    kept = []
+    used = 0
+
+    for i, doc in enumerate(docs):
+        doc_tokens = estimate_tokens(format_doc(doc))
+        if used + doc_tokens <= token_budget:
+            kept.append(doc)
+            used += doc_tokens
+            continue
+
+        truncated = truncate_doc(doc, token_budget - used, format_doc)
+        if truncated:
+            kept.append(truncated)
+        return kept, len(docs) - i
+
+    return kept, 0
@@ -0,0 +1,96 @@
+"""
+Modo de respuesta extractiva (sin LLM)
+Selecciona las oraciones de los chunks recuperados más cercanas a la query
+usando el índice de oraciones precalculado y las devuelve como viñetas con cita
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.sentence_index import SentenceIndex
+
+
+# Nombre de estrategia que activa el modo extractivo
+EXTRACTIVE_STRATEGY = "extractive"
+
+NO_INFO_MESSAGE = (
+    "No encuentro esa información específica en los manuales BPG disponibles. "
+    "Te recomiendo consultar con un técnico especializado."
+)
+
+
+class ExtractiveAnswerer:
+    """
+    Generador de respuestas extractivas a partir de oraciones de los manuales
+    """
+
+    def __init__(
+        self,
+        index: SentenceIndex,
+        max_sentences: int = 5,
+        min_words: int = 4,
+        min_score: float = 0.2
+    ):
+        """
+        Inicializar generador
+
+        Args:
+            index: Índice de oraciones precalculado
+            max_sentences: Máximo de viñetas en la respuesta
+            min_words: Largo mínimo de una oración para ser elegible
+            min_score: Similitud mínima con la query
+        """
+        self.index = index
+        self.max_sentences = max_sentences
+        self.min_words = min_words
+        self.min_score = min_score
+
+    def answer(self, docs: List[Dict], query_embedding) -> Dict:
+        """
+        Armar respuesta extractiva
+
+        Args:
+            docs: Documentos recuperados (con 'chunk_id' y 'metadata')
+            query_embedding: Embedding de la query
+
+        Returns:
+            Dict con 'answer' (viñetas con cita) y 'sentences' seleccionadas
+        """
+        docs_by_chunk = {doc.get('chunk_id'): doc for doc in docs}
+        chunk_ids = [chunk_id for chunk_id in docs_by_chunk if chunk_id in self.index]
+        rows, scores = self.index.score(chunk_ids, query_embedding)
+
+        selected = []
+        seen = set()
+        for position in np.argsort(-scores):
+            if len(selected) >= self.max_sentences or scores[position] < self.min_score:
+                break
+            row = int(rows[position])
+            text = ' '.join(self.index.sentences[row].split())
+            if len(text.split()) < self.min_words or text in seen:
+                continue
+            seen.add(text)
+            doc = docs_by_chunk[self.index.chunk_ids[row]]
+            selected.append({
+                'text': text,
+                'score': round(float(scores[position]), 4),
+                'citation': self._citation(doc)
+            })
+
+        if not selected:
+            return {'answer': NO_INFO_MESSAGE, 'sentences': []}
+
+        bullets = "\n".join(f"• {s['text']} ({s['citation']})" for s in selected)
+        return {
+            'answer': f"Según los manuales BPG:\n\n{bullets}",
+            'sentences': selected
+        }
+
+    @staticmethod
+    def _citation(doc: Dict) -> str:
+        """Cita corta: fuente y número de fragmento"""
+        metadata: Optional[Dict] = doc.get('metadata') or {}
+        source = metadata.get('source', 'Manual BPG')
+        number = metadata.get('chunk_number')
+        return f"{source}, fragmento {number}" if number is not None else source
@@ -0,0 +1,102 @@
+"""
+Monitor de salud en segundo plano
+Verifica los componentes (Ollama, ChromaDB) cada cierto intervalo y guarda
+una foto del estado; los endpoints de liveness/readiness responden desde
+esa foto sin hacer llamadas de red
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, Optional
+import threading
+import time
+
+
+class HealthMonitor:
+    """
+    Refresca el estado de los componentes en un hilo y lo sirve desde caché
+    """
+
+    def __init__(
+        self,
+        check: Callable[[], Dict],
+        interval: float = 10.0,
+        max_age: float = 30.0
+    ):
+        """
+        Args:
+            check: Función que verifica los componentes; debe incluir la clave 'ready'
+            interval: Segundos entre verificaciones
+            max_age: Antigüedad máxima de la foto para considerarla válida
+        """
+        self.check = check
+        self.interval = interval
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Dict] = None
+        self._checked_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> Dict:
+        """Verificar los componentes ahora y actualizar la foto"""
+        try:
+            snapshot = self.check()
+        except Exception as e:
+            snapshot = {'ready': False, 'error': str(e)}
+        snapshot['timestamp'] = datetime.now().isoformat()
+        with self._lock:
+            self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+        return snapshot
+
+    def snapshot(self) -> Dict:
+        """
+        Última foto del estado con su antigüedad ('age_seconds')
+
+        Nunca verifica en el momento (se llama desde handlers async): hasta
+        que el hilo tenga su primer resultado devuelve un estado 'starting'
+        no listo. Si la foto es más vieja que max_age (hilo detenido o
+        trabado) se marca como no lista.
+        """
+        with self._lock:
+            snapshot, checked_at = self._snapshot, self._checked_at
+        if snapshot is None:
+            return {
+                'ready': False,
+                'starting': True,
+                'timestamp': datetime.now().isoformat(),
+                'age_seconds': None,
+                'stale': False
+            }
+
+        age = time.monotonic() - checked_at
+        result = dict(snapshot)
+        result['age_seconds'] = round(age, 3)
+        result['stale'] = age > self.max_age
+        if result['stale']:
+            result['ready'] = False
+        return result
+
+    def is_ready(self) -> bool:
+        return self.snapshot()['ready']
+
+    def start(self):
+        """Iniciar el hilo (idempotente); la primera verificación es inmediata"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detener el hilo"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            self.refresh()
+            if self._stop.wait(self.interval):
+                return
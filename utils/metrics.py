@@ -0,0 +1,311 @@
+"""
+Métricas en formato Prometheus (texto 0.0.4)
+Contadores, gauges e histogramas con labels, seguros entre hilos y baratos
+de actualizar (un lock y una búsqueda binaria por observación)
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+import threading
+
+
+# Buckets de latencia (segundos): de milisegundos (embedding) a minutos (Ollama en frío)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Buckets del score de validación (fracción de chequeos aprobados)
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base: nombre, ayuda, labels y valores por combinación de labels"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels esperados {self.labelnames}, recibidos {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key: Tuple[str, ...], value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Contador monotónico"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Valor que sube y baja"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    """Histograma acumulativo con buckets fijos"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def _render_sample(self, key: Tuple[str, ...], state) -> List[str]:
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas exportables juntas
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Texto en formato de exposición de Prometheus"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class RAGMetrics:
+    """
+    Métricas del pipeline RAG (una instancia por RAGSystemBPG)
+    """
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        registry = self.registry
+
+        self.stage_seconds = registry.histogram(
+            "rag_bpg_stage_duration_seconds",
+            "Duración de cada etapa de la consulta",
+            ("stage", "strategy", "model")
+        )
+        self.query_seconds = registry.histogram(
+            "rag_bpg_query_duration_seconds",
+            "Duración total de la consulta",
+            ("strategy", "model", "outcome")
+        )
+        self.queries = registry.counter(
+            "rag_bpg_queries_total",
+            "Consultas respondidas por resultado (success, degraded, error)",
+            ("strategy", "model", "outcome")
+        )
+        self.queries_in_progress = registry.gauge(
+            "rag_bpg_queries_in_progress",
+            "Consultas en curso"
+        )
+        self.ollama_in_progress = registry.gauge(
+            "rag_bpg_ollama_requests_in_progress",
+            "Generaciones esperando o corriendo en Ollama (profundidad de cola)"
+        )
+        self.tokens = registry.counter(
+            "rag_bpg_ollama_tokens_total",
+            "Tokens procesados por Ollama (kind=prompt|generated)",
+            ("kind", "strategy", "model")
+        )
+        self.cold_loads = registry.counter(
+            "rag_bpg_ollama_cold_loads_total",
+            "Generaciones que incluyeron carga del modelo",
+            ("model",)
+        )
+        self.hedge_requests = registry.counter(
+            "rag_bpg_ollama_hedge_requests_total",
+            "Generaciones enviadas al pool con hedging activo"
+        )
+        self.hedges = registry.counter(
+            "rag_bpg_ollama_hedges_total",
+            "Generaciones duplicadas en otro backend por falta de primer token"
+        )
+        self.hedge_wins = registry.counter(
+            "rag_bpg_ollama_hedge_wins_total",
+            "Generaciones duplicadas en las que respondió el backend secundario"
+        )
+        self.errors = registry.counter(
+            "rag_bpg_errors_total",
+            "Errores de generación por clase",
+            ("error_class",)
+        )
+        self.degraded = registry.counter(
+            "rag_bpg_degraded_answers_total",
+            "Respuestas sin LLM por modo (cache, extractive, none)",
+            ("mode",)
+        )
+        self.answer_cache = registry.counter(
+            "rag_bpg_answer_cache_lookups_total",
+            "Consultas a la caché de respuestas (result=hit|miss)",
+            ("result",)
+        )
+        self.coalesced = registry.counter(
+            "rag_bpg_coalesced_queries_total",
+            "Consultas que compartieron el resultado de una idéntica en curso"
+        )
+        self.validations = registry.counter(
+            "rag_bpg_validations_total",
+            "Respuestas validadas por resultado (valid, invalid, error, skipped)",
+            ("strategy", "result")
+        )
+        self.validation_score = registry.histogram(
+            "rag_bpg_validation_score",
+            "Score de validación de las respuestas",
+            ("strategy",),
+            buckets=SCORE_BUCKETS
+        )
+        self.validation_checks_failed = registry.counter(
+            "rag_bpg_validation_checks_failed_total",
+            "Chequeos de validación no aprobados",
+            ("check",)
+        )
+        self.stream_rejections = registry.counter(
+            "rag_bpg_stream_rejections_total",
+            "Generaciones abortadas por el validador de streaming, por chequeo",
+            ("check", "strategy")
+        )
+        self.validations_pending = registry.gauge(
+            "rag_bpg_validations_pending",
+            "Validaciones en segundo plano en cola o en curso"
+        )
+
+    def observe_stages(self, timings: Dict[str, float], strategy: str, model: str):
+        """Registrar las duraciones por etapa de una consulta"""
+        for stage, seconds in timings.items():
+            if seconds is not None:
+                self.stage_seconds.observe(seconds, stage=stage, strategy=strategy, model=model)
+
+    def observe_validation(self, validation: Optional[Dict], strategy: str):
+        """Registrar el resultado de una validación (None = el validador falló)"""
+        if validation is None:
+            self.validations.inc(strategy=strategy, result="error")
+            return
+        self.validations.inc(strategy=strategy, result="valid" if validation['is_valid'] else "invalid")
+        self.validation_score.observe(validation['score'], strategy=strategy)
+        for check, passed in validation['validations'].items():
+            if not passed:
+                self.validation_checks_failed.inc(check=check)
+
+    def observe_hedge(self, event: str):
+        """Registrar un evento de hedging del pool Ollama (ver OllamaPool.hedge_stats)"""
+        counter = {
+            'requests': self.hedge_requests,
+            'hedges_sent': self.hedges,
+            'hedge_wins': self.hedge_wins
+        }.get(event)
+        if counter is not None:
+            counter.inc()
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -0,0 +1,377 @@
+"""
+Cliente HTTP para la API de Ollama
+Centraliza las llamadas de generación, el manejo de keep_alive y el
+pre-calentamiento del modelo para evitar cargas en frío
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import threading
+import time
+
+import requests
+
+from utils.cancellation import CancelToken, GenerationCancelled
+
+
+class OllamaError(Exception):
+    """Error devuelto por Ollama (status HTTP distinto de 200)"""
+
+    def __init__(self, status_code: int, message: str = ""):
+        self.status_code = status_code
+        super().__init__(message or f"Error de Ollama (status {status_code})")
+
+
+def _abort_response(response):
+    """Cortar un stream en curso, interrumpiendo una lectura bloqueada en otro hilo"""
+    shutdown = getattr(getattr(response, 'raw', None), 'shutdown', None)
+    if shutdown:
+        shutdown()
+    response.close()
+
+
+class OllamaClient:
+    """
+    Cliente para Ollama con sesión HTTP persistente
+    Envía keep_alive en cada request y registra las cargas en frío del modelo
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        timeout: int = 120,
+        keep_alive: str = "30m",
+        cold_load_threshold: float = 1.0,
+        session: Optional[requests.Session] = None
+    ):
+        """
+        Inicializar cliente
+
+        Args:
+            base_url: URL base de Ollama
+            model: Modelo a usar en las generaciones
+            timeout: Timeout de cada request (segundos)
+            keep_alive: Tiempo que Ollama mantiene el modelo en memoria ("30m", "-1", etc.)
+            cold_load_threshold: Segundos de carga a partir de los cuales se cuenta como carga en frío
+            session: Sesión HTTP a reutilizar (por defecto crea una nueva)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.cold_load_threshold = cold_load_threshold
+        self.session = session or requests.Session()
+
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'warmups': 0,
+            'cold_loads': 0,
+            'total_load_time': 0.0,
+            'last_cold_load': None
+        }
+
+    def generate(
+        self,
+        prompt: str,
+        options: Optional[Dict] = None,
+        keep_alive: Optional[str] = None,
+        cancel: Optional[CancelToken] = None,
+        on_first_token: Optional[Callable[[float], None]] = None,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """
+        Generar respuesta con /api/generate
+
+        Sin cancel ni callbacks hace un request no streaming; con alguno de
+        ellos usa streaming para observar los tokens y poder abortar.
+
+        Args:
+            prompt: Prompt completo
+            options: Opciones de Ollama (temperature, num_predict, ...)
+            keep_alive: Sobrescribe el keep_alive configurado
+            cancel: Token para abortar la generación en curso
+            on_first_token: Callback con los segundos hasta el primer token
+            on_token: Callback con cada fragmento de texto generado
+
+        Returns:
+            JSON de Ollama con 'load_duration_s' y 'cold_load' agregados
+
+        Raises:
+            OllamaError: Si Ollama responde con status distinto de 200
+            GenerationCancelled: Si se canceló con el token
+        """
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": keep_alive if keep_alive is not None else self.keep_alive,
+            "options": options or {}
+        }
+        result = self._request("/api/generate", payload, cancel, on_first_token, on_token)
+        self._record_load(result, warmup=False)
+        return result
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        options: Optional[Dict] = None,
+        keep_alive: Optional[str] = None,
+        cancel: Optional[CancelToken] = None,
+        on_first_token: Optional[Callable[[float], None]] = None,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """
+        Generar respuesta con /api/chat
+
+        Un mensaje system idéntico entre requests permite que Ollama
+        reutilice el prefijo ya evaluado del KV cache.
+
+        Args:
+            messages: Mensajes [{'role': ..., 'content': ...}]
+            options: Opciones de Ollama (temperature, num_predict, ...)
+            keep_alive: Sobrescribe el keep_alive configurado
+            cancel: Token para abortar la generación en curso
+            on_first_token: Callback con los segundos hasta el primer token
+            on_token: Callback con cada fragmento de texto generado
+
+        Returns:
+            JSON de Ollama con 'response' copiado desde message.content
+
+        Raises:
+            OllamaError: Si Ollama responde con status distinto de 200
+            GenerationCancelled: Si se canceló con el token
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": False,
+            "keep_alive": keep_alive if keep_alive is not None else self.keep_alive,
+            "options": options or {}
+        }
+        result = self._request("/api/chat", payload, cancel, on_first_token, on_token)
+        if 'response' not in result:
+            result['response'] = result.get('message', {}).get('content', '')
+        self._record_load(result, warmup=False)
+        return result
+
+    def _request(
+        self,
+        endpoint: str,
+        payload: Dict,
+        cancel: Optional[CancelToken],
+        on_first_token: Optional[Callable[[float], None]],
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """POST a Ollama: no streaming por defecto, streaming si hay que observar/abortar"""
+        if cancel is None and on_first_token is None and on_token is None:
+            response = self.session.post(
+                f"{self.base_url}{endpoint}",
+                json=payload,
+                timeout=self.timeout
+            )
+            if response.status_code != 200:
+                raise OllamaError(response.status_code)
+            return response.json()
+        return self._stream(endpoint, payload, cancel, on_first_token, on_token)
+
+    def _stream(
+        self,
+        endpoint: str,
+        payload: Dict,
+        cancel: Optional[CancelToken],
+        on_first_token: Optional[Callable[[float], None]],
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """
+        Leer la respuesta en streaming (NDJSON) y armar el mismo JSON que sin streaming
+
+        Al cancelar se corta la conexión, lo que hace que Ollama detenga la
+        generación y libere el slot.
+        """
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+
+        start = time.perf_counter()
+        response = self.session.post(
+            f"{self.base_url}{endpoint}",
+            json={**payload, "stream": True},
+            timeout=self.timeout,
+            stream=True
+        )
+        if response.status_code != 200:
+            response.close()
+            raise OllamaError(response.status_code)
+
+        abort = lambda: _abort_response(response)
+        if cancel is not None:
+            cancel.register(abort)
+
+        parts = []
+        result: Dict = {}
+        ttft = None
+        try:
+            for line in response.iter_lines():
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if 'error' in chunk:
+                    raise OllamaError(500, f"Error de Ollama: {chunk['error']}")
+                text = chunk.get('response') or chunk.get('message', {}).get('content', '')
+                if text and ttft is None:
+                    ttft = time.perf_counter() - start
+                    if on_first_token:
+                        on_first_token(ttft)
+                parts.append(text)
+                if text and on_token:
+                    on_token(text)
+                if chunk.get('done'):
+                    result = chunk
+                    break
+        except (GenerationCancelled, OllamaError):
+            raise
+        except Exception:
+            # Una lectura interrumpida por abort() aparece como error de conexión
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            raise
+        finally:
+            if cancel is not None:
+                cancel.unregister(abort)
+            response.close()
+
+        if not result:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            raise OllamaError(502, "Stream de Ollama incompleto")
+
+        result['response'] = ''.join(parts)
+        result['ttft_s'] = ttft
+        return result
+
+    def warmup(self, num_ctx: Optional[int] = None) -> Optional[float]:
+        """
+        Cargar el modelo en memoria con un prompt vacío
+
+        Args:
+            num_ctx: Ventana de contexto de las consultas (Ollama recarga el
+                modelo si cambia, así que debe coincidir con la que se usará)
+
+        Returns:
+            Segundos que tardó la carga, o None si Ollama no respondió
+        """
+        payload = {
+            "model": self.model,
+            "prompt": "",
+            "stream": False,
+            "keep_alive": self.keep_alive
+        }
+        if num_ctx is not None:
+            payload["options"] = {"num_ctx": num_ctx}
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json=payload,
+                timeout=self.timeout
+            )
+        except requests.RequestException:
+            return None
+
+        if response.status_code != 200:
+            return None
+
+        result = response.json()
+        self._record_load(result, warmup=True)
+        return result['load_duration_s']
+
+    def ping(self, timeout: float = 2.0) -> bool:
+        """Verificar que el servidor Ollama responda (GET /api/tags)"""
+        try:
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=timeout)
+        except requests.RequestException:
+            return False
+        return response.status_code == 200
+
+    def _record_load(self, result: Dict, warmup: bool):
+        """Anotar duración de carga del modelo y contar cargas en frío"""
+        load_seconds = result.get('load_duration', 0) / 1e9
+        cold = load_seconds >= self.cold_load_threshold
+        result['load_duration_s'] = load_seconds
+        result['cold_load'] = cold
+
+        with self._lock:
+            self.stats['warmups' if warmup else 'requests'] += 1
+            if cold:
+                self.stats['cold_loads'] += 1
+                self.stats['total_load_time'] += load_seconds
+                self.stats['last_cold_load'] = datetime.now().isoformat()
+
+    def get_stats(self) -> Dict:
+        """Copia de las métricas acumuladas"""
+        with self._lock:
+            return dict(self.stats)
+
+
+class ModelKeeper:
+    """
+    Hilo en segundo plano que mantiene el modelo residente en Ollama
+    Solo refresca dentro del horario laboral; fuera de él deja que
+    Ollama descargue el modelo cuando venza el keep_alive
+    """
+
+    def __init__(
+        self,
+        client: OllamaClient,
+        interval: int = 240,
+        business_hours: Tuple[int, int] = (7, 19),
+        num_ctx: Optional[Callable[[], Optional[int]]] = None
+    ):
+        """
+        Args:
+            client: Cliente Ollama a usar para el refresco
+            interval: Segundos entre refrescos (menor que keep_alive)
+            business_hours: (hora_inicio, hora_fin) en horario local, fin exclusivo
+            num_ctx: Devuelve el num_ctx vigente de las consultas (None = sin num_ctx)
+        """
+        self.client = client
+        self.interval = interval
+        self.business_hours = business_hours
+        self.num_ctx = num_ctx
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def is_business_hours(self, now: Optional[datetime] = None) -> bool:
+        """Verificar si la hora actual está dentro del horario laboral"""
+        hour = (now or datetime.now()).hour
+        start, end = self.business_hours
+        if start <= end:
+            return start <= hour < end
+        # Horario que cruza la medianoche (ej: 22 a 6)
+        return hour >= start or hour < end
+
+    def start(self):
+        """Iniciar el hilo (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ollama-model-keeper", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Detener el hilo"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.is_business_hours():
+                self.client.warmup(num_ctx=self.num_ctx() if self.num_ctx else None)
+            self._stop.wait(self.interval)
@@ -0,0 +1,531 @@
+"""
+Pool de backends Ollama con balanceo de carga
+Reparte las generaciones entre varios servidores según sus pedidos en curso
+(least-outstanding-requests ponderado por peso), respeta los slots paralelos
+de cada uno y saca de rotación a los que fallan hasta que vuelven a responder.
+Opcionalmente duplica (hedging) los pedidos cuyo primer token se demora
+"""
+
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import math
+import queue
+import threading
+import time
+
+import requests
+
+from utils.cancellation import CancelToken, GenerationCancelled
+from utils.ollama_client import OllamaClient, OllamaError
+
+
+class PoolBackend:
+    """
+    Backend del pool: cliente Ollama más su estado de carga y salud
+    """
+
+    def __init__(self, client: OllamaClient, weight: float = 1.0, max_concurrency: int = 1):
+        """
+        Args:
+            client: Cliente del servidor
+            weight: Peso relativo (capacidad) del servidor
+            max_concurrency: Pedidos simultáneos permitidos (= OLLAMA_NUM_PARALLEL)
+        """
+        self.client = client
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_at: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+
+    @property
+    def url(self) -> str:
+        return self.client.base_url
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_at is not None
+
+    def load(self) -> float:
+        """Carga relativa si se le asigna un pedido más"""
+        return (self.outstanding + 1) / self.weight
+
+
+class OllamaPool:
+    """
+    Pool de clientes Ollama con la misma interfaz que OllamaClient
+    (generate, chat, warmup, ping, get_stats)
+    """
+
+    def __init__(
+        self,
+        backends: List[PoolBackend],
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        queue_timeout: Optional[float] = None,
+        hedge: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_delay: float = 0.5,
+        hedge_initial_delay: float = 3.0,
+        hedge_min_samples: int = 20,
+        on_hedge: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Inicializar pool
+
+        Args:
+            backends: Servidores del pool (al menos uno)
+            eject_after: Fallas consecutivas que sacan un backend de rotación
+            eject_seconds: Tiempo mínimo fuera de rotación antes de volver a sondearlo
+            queue_timeout: Espera máxima por un slot libre (por defecto el timeout del cliente)
+            hedge: Duplicar en otro backend los pedidos sin primer token tras la demora
+            hedge_percentile: Percentil del tiempo al primer token usado como demora
+            hedge_min_delay: Demora mínima antes de duplicar (segundos)
+            hedge_initial_delay: Demora usada hasta juntar hedge_min_samples mediciones
+            hedge_min_samples: Mediciones necesarias para usar el percentil
+            on_hedge: Callback por cada evento contado en hedge_stats (ej: métricas)
+        """
+        if not backends:
+            raise ValueError("El pool necesita al menos un backend")
+
+        self.backends = backends
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.queue_timeout = queue_timeout if queue_timeout is not None else backends[0].client.timeout
+
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_ejection: Optional[str] = None
+
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_initial_delay = hedge_initial_delay
+        self.hedge_min_samples = hedge_min_samples
+        self._ttft_samples: deque = deque(maxlen=500)
+        self.hedge_stats = {'requests': 0, 'hedges_sent': 0, 'hedge_wins': 0}
+        self.on_hedge = on_hedge
+
+    @classmethod
+    def from_config(
+        cls,
+        backends: List[Dict],
+        model: str,
+        timeout: int = 120,
+        keep_alive: str = "30m",
+        cold_load_threshold: float = 1.0,
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        **hedge_options
+    ) -> 'OllamaPool':
+        """
+        Crear pool desde la configuración
+
+        Args:
+            backends: [{'url': ..., 'weight': 1, 'max_concurrency': 1}, ...]
+            hedge_options: hedge, hedge_percentile, hedge_min_delay, on_hedge, ... (ver __init__)
+        """
+        pool_backends = [
+            PoolBackend(
+                OllamaClient(
+                    base_url=backend['url'],
+                    model=model,
+                    timeout=timeout,
+                    keep_alive=keep_alive,
+                    cold_load_threshold=cold_load_threshold
+                ),
+                weight=backend.get('weight', 1.0),
+                max_concurrency=backend.get('max_concurrency', 1)
+            )
+            for backend in backends
+        ]
+        return cls(
+            pool_backends,
+            eject_after=eject_after,
+            eject_seconds=eject_seconds,
+            **hedge_options
+        )
+
+    # Atributos del primer backend, para compatibilidad con OllamaClient
+    @property
+    def base_url(self) -> str:
+        return self.backends[0].url
+
+    @property
+    def model(self) -> str:
+        return self.backends[0].client.model
+
+    @property
+    def timeout(self) -> int:
+        return self.backends[0].client.timeout
+
+    # ==================== ROUTING ====================
+
+    def _acquire(
+        self,
+        exclude: List[PoolBackend],
+        wait: bool = True,
+        cancel: Optional[CancelToken] = None
+    ) -> Optional[PoolBackend]:
+        """
+        Reservar un slot en el backend sano menos cargado
+
+        Args:
+            exclude: Backends a no usar
+            wait: Esperar un slot libre; si es False devuelve None cuando no hay
+            cancel: Token que interrumpe la espera de un slot
+
+        Raises:
+            OllamaError: (503) si no hay backends sanos o no se liberó un slot a tiempo
+            GenerationCancelled: Si se canceló mientras esperaba
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        if cancel is not None and wait:
+            wake = self._notify_all
+            cancel.register(wake)
+        try:
+            return self._acquire_slot(exclude, wait, cancel, deadline)
+        finally:
+            if cancel is not None and wait:
+                cancel.unregister(wake)
+
+    def _notify_all(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _acquire_slot(
+        self,
+        exclude: List[PoolBackend],
+        wait: bool,
+        cancel: Optional[CancelToken],
+        deadline: float
+    ) -> Optional[PoolBackend]:
+        with self._cond:
+            while True:
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                healthy = [b for b in self.backends if not b.ejected and b not in exclude]
+                if not healthy and not wait:
+                    return None
+                if not healthy:
+                    raise OllamaError(503, "No hay backends Ollama disponibles")
+
+                free = [b for b in healthy if b.outstanding < b.max_concurrency]
+                if free:
+                    backend = min(free, key=PoolBackend.load)
+                    backend.outstanding += 1
+                    backend.requests += 1
+                    return backend
+
+                remaining = deadline - time.monotonic()
+                if not wait:
+                    return None
+                if remaining <= 0:
+                    raise OllamaError(503, "Backends Ollama saturados (sin slots libres)")
+                self._cond.wait(remaining)
+
+    def _release(self, backend: PoolBackend, success: Optional[bool]):
+        """Liberar slot y actualizar salud del backend (None = cancelado, no cuenta)"""
+        with self._cond:
+            backend.outstanding -= 1
+            if success:
+                backend.consecutive_failures = 0
+            elif success is False:
+                backend.failures += 1
+                backend.consecutive_failures += 1
+                if not backend.ejected and backend.consecutive_failures >= self.eject_after:
+                    backend.ejected_at = time.monotonic()
+                    backend.ejections += 1
+                    self.last_ejection = datetime.now().isoformat()
+                    print(f"⛔ Backend Ollama fuera de rotación: {backend.url}")
+            self._cond.notify_all()
+
+    def _call(self, method: str, *args, **kwargs) -> Dict:
+        """
+        Ejecutar generate/chat en el backend elegido
+
+        Un error de conexión se reintenta en otro backend (falla rápido);
+        los timeouts y errores HTTP se propagan para no duplicar la espera.
+        """
+        if self.hedge and len(self.backends) > 1:
+            return self._call_hedged(method, *args, **kwargs)
+
+        tried: List[PoolBackend] = []
+        while True:
+            backend = self._acquire(tried, cancel=kwargs.get('cancel'))
+            tried.append(backend)
+            try:
+                result = getattr(backend.client, method)(*args, **kwargs)
+            except GenerationCancelled:
+                self._release(backend, success=None)
+                raise
+            except requests.ConnectionError:
+                self._release(backend, success=False)
+                if len(tried) < len(self.backends):
+                    continue
+                raise
+            except Exception:
+                self._release(backend, success=False)
+                raise
+            self._release(backend, success=True)
+            result['backend'] = backend.url
+            return result
+
+    # ==================== HEDGING ====================
+
+    def hedge_delay(self) -> float:
+        """Demora antes de duplicar: percentil del tiempo al primer token observado"""
+        with self._cond:
+            samples = sorted(self._ttft_samples)
+        if len(samples) < self.hedge_min_samples:
+            return self.hedge_initial_delay
+        index = max(math.ceil(self.hedge_percentile / 100 * len(samples)) - 1, 0)
+        return max(samples[index], self.hedge_min_delay)
+
+    def _count_hedge(self, event: str):
+        """Contar un evento de hedging (requests, hedges_sent, hedge_wins)"""
+        with self._cond:
+            self.hedge_stats[event] += 1
+        if self.on_hedge:
+            self.on_hedge(event)
+
+    def _call_hedged(self, method: str, *args, cancel: Optional[CancelToken] = None,
+                     on_token: Optional[Callable[[str], None]] = None, **kwargs) -> Dict:
+        """
+        Enviar el pedido al backend menos cargado y, si no llega el primer token
+        dentro de hedge_delay(), duplicarlo en otro backend con slot libre.
+        Gana el primer intento que emite un token: los demás se cancelan, así
+        on_token recibe solo el texto de la respuesta que se devuelve.
+        Un error de conexión antes de cualquier token se reintenta en otro
+        backend, igual que en _call.
+        """
+        results: queue.Queue = queue.Queue()
+        attempts: List[Dict] = []
+        state: Dict = {'leader': None}
+        lock = threading.Lock()
+
+        def first_token(attempt: Dict, ttft: float):
+            with lock:
+                attempt['first_token'] = True
+                won = state['leader'] is None
+                if won:
+                    state['leader'] = attempt
+                    losers = [other for other in attempts if other is not attempt]
+            samples = [ttft]
+            if won:
+                # Lo que esperaron los perdedores es una cota inferior de su TTFT;
+                # sin esto los backends lentos nunca entran en el percentil
+                now = time.perf_counter()
+                samples += [now - other['started'] for other in losers if not other['first_token']]
+            with self._cond:
+                self._ttft_samples.extend(samples)
+            attempt['settled'].set()
+            if won:
+                for other in losers:
+                    other['token'].cancel()
+
+        def forward(attempt: Dict, text: str):
+            if state['leader'] is attempt:
+                on_token(text)
+
+        def launch(backend: PoolBackend, hedge: bool = False) -> Optional[Dict]:
+            attempt = {
+                'backend': backend, 'token': CancelToken(), 'settled': threading.Event(),
+                'started': time.perf_counter(), 'first_token': False, 'hedge': hedge
+            }
+            with lock:
+                late = state['leader'] is not None
+                if not late:
+                    attempts.append(attempt)
+            if late:
+                # Otro intento ya está respondiendo: no duplicar
+                self._release(backend, success=None)
+                return None
+            if cancel is not None and cancel.cancelled:
+                attempt['token'].cancel(cancel.reason)
+
+            def run():
+                try:
+                    result = getattr(backend.client, method)(
+                        *args,
+                        cancel=attempt['token'],
+                        on_first_token=lambda ttft: first_token(attempt, ttft),
+                        on_token=(lambda text: forward(attempt, text)) if on_token else None,
+                        **kwargs
+                    )
+                except GenerationCancelled as e:
+                    self._release(backend, success=None)
+                    results.put((attempt, None, e))
+                except Exception as e:
+                    self._release(backend, success=False)
+                    results.put((attempt, None, e))
+                else:
+                    self._release(backend, success=True)
+                    results.put((attempt, result, None))
+                finally:
+                    attempt['settled'].set()
+
+            threading.Thread(target=run, name="ollama-hedge", daemon=True).start()
+            return attempt
+
+        def cancel_all():
+            # Mismo motivo que el token de la consulta (ej: deadline vencido)
+            for attempt in list(attempts):
+                attempt['token'].cancel(cancel.reason)
+
+        self._count_hedge('requests')
+        current = launch(self._acquire([], cancel=cancel))
+        if cancel is not None:
+            cancel.register(cancel_all)
+
+        try:
+            hedged = False
+            received = 0
+            error: Optional[Exception] = None
+            while True:
+                if current is not None and not hedged:
+                    if not current['settled'].wait(self.hedge_delay()):
+                        tried = [attempt['backend'] for attempt in attempts]
+                        secondary = self._acquire(tried, wait=False)
+                        if secondary is not None and launch(secondary, hedge=True) is not None:
+                            hedged = True
+                            self._count_hedge('hedges_sent')
+                current = None
+
+                attempt, result, exc = results.get()
+                received += 1
+                if exc is None and state['leader'] not in (None, attempt):
+                    # Terminó antes de ver la cancelación, pero el texto enviado es el de otro
+                    exc = GenerationCancelled()
+                if exc is None:
+                    for other in attempts:
+                        if other is not attempt:
+                            other['token'].cancel()
+                    if attempt['hedge']:
+                        self._count_hedge('hedge_wins')
+                    result['backend'] = attempt['backend'].url
+                    result['hedged'] = hedged
+                    return result
+                if error is None or isinstance(error, GenerationCancelled):
+                    error = exc
+                if received < len(attempts):
+                    continue
+
+                # Ningún intento en curso: un error de conexión sin tokens emitidos
+                # pasa al siguiente backend (falla rápido, como en _call)
+                tried = [attempt['backend'] for attempt in attempts]
+                if (isinstance(error, requests.ConnectionError) and state['leader'] is None
+                        and len(tried) < len(self.backends)):
+                    current = launch(self._acquire(tried, cancel=cancel))
+                    continue
+                raise error
+        finally:
+            if cancel is not None:
+                cancel.unregister(cancel_all)
+
+    def generate(self, prompt: str, options: Optional[Dict] = None, keep_alive: Optional[str] = None,
+                 cancel: Optional[CancelToken] = None,
+                 on_token: Optional[Callable[[str], None]] = None) -> Dict:
+        """Generar con /api/generate en el backend menos cargado"""
+        return self._call('generate', prompt, options=options, keep_alive=keep_alive,
+                          cancel=cancel, on_token=on_token)
+
+    def chat(self, messages: List[Dict[str, str]], options: Optional[Dict] = None,
+             keep_alive: Optional[str] = None, cancel: Optional[CancelToken] = None,
+             on_token: Optional[Callable[[str], None]] = None) -> Dict:
+        """Generar con /api/chat en el backend menos cargado"""
+        return self._call('chat', messages, options=options, keep_alive=keep_alive,
+                          cancel=cancel, on_token=on_token)
+
+    # ==================== SALUD ====================
+
+    def warmup(self, num_ctx: Optional[int] = None) -> Optional[float]:
+        """Pre-cargar el modelo en todos los backends; devuelve la carga más lenta"""
+        loads = [b.client.warmup(num_ctx=num_ctx) for b in self.backends if not b.ejected]
+        loads = [load for load in loads if load is not None]
+        return max(loads) if loads else None
+
+    def ping(self, timeout: float = 2.0) -> bool:
+        """True si al menos un backend responde"""
+        return any(b.client.ping(timeout) for b in self.backends)
+
+    def check_ejected(self):
+        """Sondear los backends fuera de rotación y re-admitir los que respondan"""
+        now = time.monotonic()
+        with self._cond:
+            due = [
+                b for b in self.backends
+                if b.ejected and now - b.ejected_at >= self.eject_seconds
+            ]
+        for backend in due:
+            if backend.client.ping():
+                with self._cond:
+                    backend.ejected_at = None
+                    backend.consecutive_failures = 0
+                    self._cond.notify_all()
+                print(f"✅ Backend Ollama re-admitido: {backend.url}")
+
+    def start(self, interval: Optional[float] = None):
+        """Iniciar hilo de sondeo de backends fuera de rotación (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        interval = interval or max(self.eject_seconds / 3, 1.0)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="ollama-pool-health", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Detener el hilo de sondeo"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            self.check_ejected()
+
+    # ==================== MÉTRICAS ====================
+
+    def get_stats(self) -> Dict:
+        """Métricas sumadas de todos los backends más el estado de cada uno"""
+        totals = {'requests': 0, 'warmups': 0, 'cold_loads': 0, 'total_load_time': 0.0}
+        backends = []
+        last_cold_loads = []
+        with self._cond:
+            for backend in self.backends:
+                client_stats = backend.client.get_stats()
+                for key in totals:
+                    totals[key] += client_stats[key]
+                if client_stats['last_cold_load']:
+                    last_cold_loads.append(client_stats['last_cold_load'])
+                backends.append({
+                    'url': backend.url,
+                    'weight': backend.weight,
+                    'max_concurrency': backend.max_concurrency,
+                    'outstanding': backend.outstanding,
+                    'healthy': not backend.ejected,
+                    'requests': backend.requests,
+                    'failures': backend.failures,
+                    'ejections': backend.ejections
+                })
+            hedging = dict(self.hedge_stats)
+        hedging['enabled'] = self.hedge
+        hedging['hedge_rate'] = (
+            round(hedging['hedges_sent'] / hedging['requests'], 4) if hedging['requests'] else 0.0
+        )
+        hedging['delay'] = round(self.hedge_delay(), 3)
+        return {
+            **totals,
+            'last_cold_load': max(last_cold_loads) if last_cold_loads else None,
+            'last_ejection': self.last_ejection,
+            'backends': backends,
+            'hedging': hedging
+        }
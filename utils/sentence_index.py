@@ -0,0 +1,142 @@
+"""
+Índice de oraciones con embeddings precalculados
+Se construye al indexar los chunks (src/rag/embeddings.py) y permite
+puntuar oraciones de los chunks recuperados sin volver a codificarlas
+"""
+
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+import json
+import re
+
+import numpy as np
+
+
+SENTENCES_FILE = "sentences.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+
+
+def split_into_sentences(text: str) -> List[str]:
+    """Dividir texto en oraciones (mismo criterio que el chunker)"""
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    return [s.strip() for s in sentences if s.strip()]
+
+
+class SentenceIndex:
+    """
+    Oraciones de todos los chunks con sus embeddings normalizados
+    Las oraciones de cada chunk ocupan filas contiguas de la matriz
+    """
+
+    def __init__(self, sentences: List[str], chunk_ids: List[str], embeddings: np.ndarray):
+        """
+        Args:
+            sentences: Texto de cada oración
+            chunk_ids: chunk_id de cada oración (agrupados por chunk)
+            embeddings: Matriz (n_oraciones, dim) con embeddings normalizados
+        """
+        if not (len(sentences) == len(chunk_ids) == len(embeddings)):
+            raise ValueError("sentences, chunk_ids y embeddings deben tener el mismo largo")
+
+        self.sentences = sentences
+        self.chunk_ids = chunk_ids
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+
+        # chunk_id -> (fila inicial, fila final)
+        self.offsets: Dict[str, Tuple[int, int]] = {}
+        for row, chunk_id in enumerate(chunk_ids):
+            start, _ = self.offsets.get(chunk_id, (row, row))
+            self.offsets[chunk_id] = (start, row + 1)
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self.offsets
+
+    def rows_for(self, chunk_id: str) -> range:
+        """Filas de las oraciones de un chunk (vacío si no está indexado)"""
+        start, end = self.offsets.get(chunk_id, (0, 0))
+        return range(start, end)
+
+    def score(self, chunk_ids: Sequence[str], query_embedding) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Puntuar todas las oraciones de los chunks contra la query en un solo batch
+
+        Args:
+            chunk_ids: Chunks recuperados
+            query_embedding: Embedding de la query (se normaliza acá)
+
+        Returns:
+            (filas de las oraciones, similitud coseno de cada una)
+        """
+        rows = np.fromiter(
+            (row for chunk_id in chunk_ids for row in self.rows_for(chunk_id)),
+            dtype=np.int64
+        )
+        if rows.size == 0:
+            return rows, np.zeros(0, dtype=np.float32)
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        return rows, self.embeddings[rows] @ query
+
+    # ==================== CONSTRUCCIÓN Y PERSISTENCIA ====================
+
+    @classmethod
+    def build(cls, chunks: List[Dict], model, batch_size: int = 64) -> 'SentenceIndex':
+        """
+        Construir índice a partir de los chunks del chunker
+
+        Args:
+            chunks: Chunks con 'chunk_id' y 'text'
+            model: SentenceTransformer usado para codificar
+            batch_size: Tamaño de batch de codificación
+        """
+        sentences = []
+        chunk_ids = []
+        for chunk in chunks:
+            for sentence in split_into_sentences(chunk['text']):
+                sentences.append(sentence)
+                chunk_ids.append(chunk['chunk_id'])
+
+        embeddings = model.encode(
+            sentences,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=True
+        )
+        return cls(sentences, chunk_ids, embeddings)
+
+    def save(self, path: str):
+        """Guardar índice en un directorio (JSON + .npy)"""
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / SENTENCES_FILE, 'w', encoding='utf-8') as f:
+            json.dump(
+                [{'chunk_id': c, 'text': s} for c, s in zip(self.chunk_ids, self.sentences)],
+                f,
+                ensure_ascii=False
+            )
+        np.save(directory / EMBEDDINGS_FILE, self.embeddings)
+
+    @classmethod
+    def load(cls, path: str) -> 'SentenceIndex':
+        """
+        Cargar índice guardado con save()
+
+        Raises:
+            FileNotFoundError: Si el índice no fue construido
+        """
+        directory = Path(path)
+        with open(directory / SENTENCES_FILE, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        embeddings = np.load(directory / EMBEDDINGS_FILE)
+        return cls(
+            [r['text'] for r in records],
+            [r['chunk_id'] for r in records],
+            embeddings
+        )
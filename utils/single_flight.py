@@ -0,0 +1,122 @@
+"""
+Coalescencia de consultas idénticas en curso (single-flight)
+Si llega una consulta igual a otra que todavía se está procesando, espera
+ese mismo cómputo y comparte su resultado en vez de repetir retrieval y
+generación
+"""
+
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import threading
+
+from utils.cancellation import CancelToken, GenerationCancelled
+
+
+class _Call:
+    """Cómputo en curso compartido por el líder y sus seguidores"""
+
+    def __init__(self, cancellable: bool):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.followers = 0
+        self.active = 0
+        self.waiters: List[threading.Event] = []
+        # Token del cómputo: se cancela solo cuando todos los participantes se fueron
+        self.token: Optional[CancelToken] = CancelToken() if cancellable else None
+
+
+class SingleFlight:
+    """
+    Deduplicación de llamadas concurrentes por clave
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.stats = {'executions': 0, 'coalesced': 0, 'abandoned': 0}
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[Optional[CancelToken]], Any],
+        cancel: Optional[CancelToken] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Ejecutar fn una sola vez por clave entre las llamadas concurrentes
+
+        Args:
+            key: Clave de la consulta
+            fn: Cómputo a ejecutar; recibe el token compartido (None si el líder no es cancelable)
+            cancel: Token de este llamador; al cancelarse deja de esperar y, si era
+                el último participante, cancela el cómputo compartido
+
+        Returns:
+            (resultado, True si se compartió el resultado de otra llamada)
+
+        Raises:
+            La excepción de fn, tanto al líder como a los seguidores
+            GenerationCancelled: Si un seguidor se canceló antes del resultado
+        """
+        wake = threading.Event()
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None or (call.token is not None and call.token.cancelled)
+            if leader:
+                call = _Call(cancellable=cancel is not None)
+                self._calls[key] = call
+                self.stats['executions'] += 1
+            else:
+                call.followers += 1
+                self.stats['coalesced'] += 1
+            call.active += 1
+            call.waiters.append(wake)
+
+        def leave():
+            with self._lock:
+                call.active -= 1
+                abandoned = call.active == 0 and not call.done.is_set()
+                if abandoned and call.token is not None:
+                    self.stats['abandoned'] += 1
+            if abandoned and call.token is not None:
+                call.token.cancel(cancel.reason)
+            wake.set()
+
+        if cancel is not None:
+            cancel.register(leave)
+        try:
+            if leader:
+                self._execute(key, call, fn)
+            else:
+                wake.wait()
+            if not call.done.is_set():
+                raise GenerationCancelled(cancel.reason if cancel else None)
+            if call.error is not None:
+                raise call.error
+            return call.result, not leader
+        finally:
+            if cancel is not None:
+                cancel.unregister(leave)
+
+    def _execute(self, key: Hashable, call: _Call, fn: Callable[[Optional[CancelToken]], Any]):
+        """Correr el cómputo del líder y despertar a los seguidores"""
+        try:
+            call.result = fn(call.token)
+        except Exception as e:
+            call.error = e
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.done.set()
+                waiters = list(call.waiters)
+            for waiter in waiters:
+                waiter.set()
+
+    def in_flight(self) -> int:
+        """Cantidad de cómputos en curso"""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, 'in_flight': len(self._calls)}
@@ -0,0 +1,65 @@
+"""
+Validación incremental sobre el stream de Ollama
+Revisa el texto a medida que se genera y, si aparecen instrucciones del
+prompt, bloques de código o frases de alucinación, cancela la generación
+en lugar de esperar la respuesta completa para descartarla
+"""
+
+from typing import Dict, Optional
+
+from utils.cancellation import CancelToken, INVALID_OUTPUT
+from utils.validators import HALLUCINATION_PHRASES, INSTRUCTION_INDICATORS, PhraseMatcher
+
+
+# Chequeo de ResponseValidator -> frases que lo hacen fallar
+STREAM_CHECKS = {
+    'no_instructions_leaked': INSTRUCTION_INDICATORS,
+    'no_code_blocks': ('```',),
+    'not_hallucinating': HALLUCINATION_PHRASES,
+}
+
+
+class StreamingValidator:
+    """
+    Patrón compilado una vez y compartido por todas las generaciones
+    """
+
+    def __init__(self, max_chars: int = 600):
+        """
+        Args:
+            max_chars: Caracteres iniciales de cada respuesta que se revisan
+                (más adelante abortar ahorra poco; el resto lo ve ResponseValidator)
+        """
+        self.max_chars = max_chars
+        self.matcher = PhraseMatcher(STREAM_CHECKS)
+        # Una frase puede quedar partida entre dos fragmentos del stream
+        self.overlap = max(len(phrase) for phrases in STREAM_CHECKS.values() for phrase in phrases) - 1
+
+    def watch(self, cancel: CancelToken) -> 'StreamWatch':
+        """Estado de una generación: cancela cancel al detectar una violación"""
+        return StreamWatch(self, cancel)
+
+
+class StreamWatch:
+    """
+    Texto acumulado de una generación; feed() se pasa como on_token al cliente
+    """
+
+    def __init__(self, validator: StreamingValidator, cancel: CancelToken):
+        self.validator = validator
+        self.cancel = cancel
+        self.text_lower = ""
+        self.violation: Optional[Dict] = None
+
+    def feed(self, text: str):
+        """Agregar un fragmento y buscar frases solo en la parte nueva"""
+        if self.violation is not None or len(self.text_lower) >= self.validator.max_chars:
+            return
+        start = max(len(self.text_lower) - self.validator.overlap, 0)
+        self.text_lower += text.lower()
+        found = self.validator.matcher.find(self.text_lower[start:])
+        if found:
+            # Orden fijo de STREAM_CHECKS para que el motivo sea estable
+            check = next(name for name in STREAM_CHECKS if name in found)
+            self.violation = {'check': check, 'chars': len(self.text_lower)}
+            self.cancel.cancel(INVALID_OUTPUT)
@@ -0,0 +1,96 @@
+"""
+Conteo de tokens y throughput de Ollama
+Deriva tokens/segundo de prefill (prompt) y decode (generación) a partir de
+los campos que devuelve Ollama y los acumula por estrategia para /stats
+"""
+
+from typing import Dict, Optional
+import threading
+
+
+def _rate(tokens: int, seconds: float) -> Optional[float]:
+    return round(tokens / seconds, 2) if seconds > 0 else None
+
+
+def token_usage(result: Dict) -> Dict:
+    """
+    Tokens y throughput de una respuesta de Ollama
+
+    Args:
+        result: Respuesta de /api/generate o /api/chat (duraciones en ns)
+
+    Returns:
+        Dict con conteos, duraciones en segundos y tokens/segundo
+    """
+    prompt_tokens = int(result.get('prompt_eval_count') or 0)
+    generated_tokens = int(result.get('eval_count') or 0)
+    prompt_seconds = (result.get('prompt_eval_duration') or 0) / 1e9
+    generated_seconds = (result.get('eval_duration') or 0) / 1e9
+    return {
+        'prompt_eval_count': prompt_tokens,
+        'prompt_eval_seconds': round(prompt_seconds, 4),
+        'eval_count': generated_tokens,
+        'eval_seconds': round(generated_seconds, 4),
+        'prompt_tokens_per_sec': _rate(prompt_tokens, prompt_seconds),
+        'generated_tokens_per_sec': _rate(generated_tokens, generated_seconds)
+    }
+
+
+class TokenUsageStats:
+    """
+    Acumulado de tokens por estrategia (seguro entre hilos)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, float]] = {}
+
+    def record(self, strategy: str, usage: Dict):
+        """Sumar el uso de una generación"""
+        with self._lock:
+            totals = self._totals.setdefault(strategy, {
+                'generations': 0,
+                'prompt_tokens': 0,
+                'generated_tokens': 0,
+                'prompt_seconds': 0.0,
+                'generated_seconds': 0.0
+            })
+            totals['generations'] += 1
+            totals['prompt_tokens'] += usage['prompt_eval_count']
+            totals['generated_tokens'] += usage['eval_count']
+            totals['prompt_seconds'] += usage['prompt_eval_seconds']
+            totals['generated_seconds'] += usage['eval_seconds']
+
+    @staticmethod
+    def _summary(totals: Dict[str, float]) -> Dict:
+        generations = totals['generations']
+        return {
+            'generations': generations,
+            'prompt_tokens': totals['prompt_tokens'],
+            'generated_tokens': totals['generated_tokens'],
+            'avg_prompt_tokens': round(totals['prompt_tokens'] / generations, 1) if generations else 0,
+            'avg_generated_tokens': round(totals['generated_tokens'] / generations, 1) if generations else 0,
+            'prompt_tokens_per_sec': _rate(totals['prompt_tokens'], totals['prompt_seconds']),
+            'generated_tokens_per_sec': _rate(totals['generated_tokens'], totals['generated_seconds'])
+        }
+
+    def get_stats(self) -> Dict:
+        """Totales generales y por estrategia"""
+        with self._lock:
+            by_strategy = {name: dict(totals) for name, totals in self._totals.items()}
+
+        overall = {
+            'generations': 0,
+            'prompt_tokens': 0,
+            'generated_tokens': 0,
+            'prompt_seconds': 0.0,
+            'generated_seconds': 0.0
+        }
+        for totals in by_strategy.values():
+            for field in overall:
+                overall[field] += totals[field]
+
+        return {
+            **self._summary(overall),
+            'by_strategy': {name: self._summary(totals) for name, totals in sorted(by_strategy.items())}
+        }
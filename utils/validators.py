@@ -3,10 +3,159 @@ Validadores de calidad de respuestas RAG
 Detectan problemas comunes: alucinaciones, respuestas incompletas, etc.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set
 import re
 
 
+# ==================== LISTAS DE FRASES ====================
+
+# Frases que sugieren que el modelo está inventando información
+HALLUCINATION_PHRASES = (
+    'según mi conocimiento',
+    'basándome en mi experiencia',
+    'generalmente se recomienda',
+    'es común que',
+    'típicamente',
+    'en mi opinión',
+    'creo que',
+    'probablemente',
+    'suele ser',
+    'normalmente se hace'
+)
+
+# Mensajes de "no tengo la información"
+FALLBACK_INDICATORS = (
+    'no encuentro',
+    'no tengo',
+    'no hay información',
+    'no está en los manuales',
+    'no puedo encontrar'
+)
+
+# Fallbacks que eximen del chequeo de relevancia contextual
+CONTEXT_FALLBACK_PHRASES = (
+    'no encuentro',
+    'no tengo',
+    'no hay información'
+)
+
+# Lenguaje vago (modo estricto)
+VAGUE_PHRASES = (
+    'puede ser',
+    'tal vez',
+    'quizás',
+    'posiblemente',
+    'eventualmente',
+    'aproximadamente'  # OK si está con números
+)
+
+# Instrucciones del prompt que no deberían aparecer en la respuesta
+INSTRUCTION_INDICATORS = (
+    'ANÁLISIS PREVIO',
+    'FORMATO DE RESPUESTA',
+    'REGLAS ESTRICTAS',
+    'INSTRUCCIONES:',
+    'SI LA INFO NO ESTÁ',
+    'ESTRUCTURA IDEAL',
+    'respondé solo',
+    'máximo 300 palabras',
+    'comenzá directo',
+    'usá viñetas'
+)
+
+# Palabras frecuentes del español (se buscan aparte: aparecen en casi
+# cualquier respuesta y cortan la búsqueda en el primer acierto)
+SPANISH_WORDS = ('el', 'la', 'los', 'las', 'que', 'para', 'con', 'en')
+
+# Palabras de la pregunta que no cuentan como palabras clave
+QUERY_STOP_WORDS = frozenset({
+    'el', 'la', 'los', 'las', 'un', 'una', 'de', 'en', 'y', 'a', 'para',
+    'con', 'por', 'que', 'del', 'al', 'es', 'como', 'se', '¿', '?'
+})
+
+# Palabras significativas (5 letras o más) para la relevancia contextual
+SIGNIFICANT_WORD = re.compile(r'\b\w{5,}\b')
+NUMBER = re.compile(r'\d+')
+
+
+def _is_word_char(char: str) -> bool:
+    """Mismo criterio que \\w de re"""
+    return char.isalnum() or char == '_'
+
+
+def contains_word(text: str, word: str) -> bool:
+    """
+    Si word aparece en text como palabra completa (igual que \\bword\\b)
+
+    str.find recorre el texto en C; solo se verifican los bordes de cada
+    aparición en lugar de tokenizar todo el texto.
+    """
+    length = len(word)
+    start = text.find(word)
+    while start != -1:
+        end = start + length
+        if (start == 0 or not _is_word_char(text[start - 1])) and \
+                (end == len(text) or not _is_word_char(text[end])):
+            return True
+        start = text.find(word, start + 1)
+    return False
+
+
+class PhraseMatcher:
+    """
+    Varias listas de frases compiladas en un único patrón
+
+    Un solo recorrido del texto (en minúsculas) devuelve las categorías
+    que aparecen. Las alternativas van de la más larga a la más corta y
+    cada frase hereda las categorías de las frases que son prefijo suyo,
+    así dos frases que empiezan en la misma posición se detectan juntas.
+    """
+
+    def __init__(self, categories: Dict[str, Sequence[str]]):
+        """
+        Args:
+            categories: Nombre de categoría -> frases (sin distinguir mayúsculas)
+        """
+        owners: Dict[str, Set[str]] = {}
+        for category, phrases in categories.items():
+            for phrase in phrases:
+                owners.setdefault(phrase.lower(), set()).add(category)
+
+        self._categories: Dict[str, FrozenSet[str]] = {
+            phrase: frozenset().union(*(cats for other, cats in owners.items() if phrase.startswith(other)))
+            for phrase in owners
+        }
+        alternatives = sorted(owners, key=len, reverse=True)
+        self._pattern = re.compile('|'.join(re.escape(phrase) for phrase in alternatives))
+
+    def find(self, text_lower: str) -> Set[str]:
+        """Categorías con al menos una frase en el texto (ya en minúsculas)"""
+        found: Set[str] = set()
+        search = self._pattern.search
+        match = search(text_lower)
+        while match:
+            found |= self._categories[match.group()]
+            # Seguir desde el carácter siguiente: las frases pueden superponerse
+            match = search(text_lower, match.start() + 1)
+        return found
+
+
+class ResponseAnalysis:
+    """
+    Análisis de una respuesta compartido por todas las validaciones:
+    se pasa a minúsculas, se tokeniza y se buscan las frases una sola vez
+    """
+
+    def __init__(self, response: str, matcher: PhraseMatcher):
+        self.text = response
+        self.lower = response.lower()
+        self.stripped_length = len(response.strip())
+        self.tokens = self.lower.split()
+        self.token_set = set(self.tokens)
+        self.significant_words = set(SIGNIFICANT_WORD.findall(self.lower))
+        self.phrases = matcher.find(self.lower)
+
+
 class ResponseValidator:
     """
     Validador de respuestas generadas por el sistema RAG
@@ -30,12 +179,26 @@ class ResponseValidator:
         self.min_length = min_length
         self.max_length = max_length
         self.strict_mode = strict_mode
+        
+        # Todas las listas de frases en un solo patrón (se compila una vez)
+        self.matcher = PhraseMatcher({
+            'hallucination': HALLUCINATION_PHRASES,
+            'fallback': FALLBACK_INDICATORS,
+            'context_fallback': CONTEXT_FALLBACK_PHRASES,
+            'vague': VAGUE_PHRASES,
+            'instructions': INSTRUCTION_INDICATORS
+        })
+    
+    def analyze(self, response: str) -> ResponseAnalysis:
+        """Minúsculas, tokens y frases de la respuesta (una sola pasada)"""
+        return ResponseAnalysis(response, self.matcher)
     
     def validate_response(
         self,
         response: str,
         context: str,
-        query: str
+        query: str,
+        context_words: Optional[Set[str]] = None
     ) -> Dict:
         """
         Validar respuesta completa
@@ -44,27 +207,30 @@ class ResponseValidator:
             response: Respuesta generada por el LLM
             context: Contexto usado (documentos recuperados)
             query: Pregunta original del usuario
+            context_words: Palabras significativas del contexto precalculadas
+                (VocabularyIndex); si es None se recorre el texto del contexto
             
         Returns:
             Dict con resultados de validación y score
         """
+        analysis = self.analyze(response)
         validations = {
-            'length_ok': self._check_length(response),
-            'has_content': self._check_has_content(response),
-            'has_structure': self._check_structure(response),
-            'not_hallucinating': self._check_no_hallucination(response),
-            'has_fallback': self._check_fallback_message(response),
-            'no_code_blocks': self._check_no_code_blocks(response),
-            'proper_spanish': self._check_spanish(response),
-            'answers_question': self._check_relevance(response, query),
-            'no_instructions_leaked': self._check_no_instructions_leaked(response),
-            'contextual_relevance': self._check_contextual_relevance(response, query, context)
+            'length_ok': self._check_length(analysis),
+            'has_content': self._check_has_content(analysis),
+            'has_structure': self._check_structure(analysis),
+            'not_hallucinating': self._check_no_hallucination(analysis),
+            'has_fallback': self._check_fallback_message(analysis),
+            'no_code_blocks': self._check_no_code_blocks(analysis),
+            'proper_spanish': self._check_spanish(analysis),
+            'answers_question': self._check_relevance(analysis, query),
+            'no_instructions_leaked': self._check_no_instructions_leaked(analysis),
+            'contextual_relevance': self._check_contextual_relevance(analysis, context, context_words)
         }
         
         # En modo estricto, agregar validaciones adicionales
         if self.strict_mode:
-            validations['no_vague_language'] = self._check_no_vague_language(response)
-            validations['has_specifics'] = self._check_has_specifics(response)
+            validations['no_vague_language'] = self._check_no_vague_language(analysis)
+            validations['has_specifics'] = self._check_has_specifics(analysis)
         
         # Calcular score
         score = sum(validations.values()) / len(validations)
@@ -85,18 +251,18 @@ class ResponseValidator:
     
     # ==================== VALIDACIONES INDIVIDUALES ====================
     
-    def _check_length(self, response: str) -> bool:
+    def _check_length(self, analysis: ResponseAnalysis) -> bool:
         """Verificar que la longitud esté en el rango aceptable"""
-        length = len(response.strip())
-        return self.min_length <= length <= self.max_length
+        return self.min_length <= analysis.stripped_length <= self.max_length
     
-    def _check_has_content(self, response: str) -> bool:
+    def _check_has_content(self, analysis: ResponseAnalysis) -> bool:
         """Verificar que tiene contenido sustancial"""
         # Más de solo espacios en blanco
-        return len(response.strip()) > 0 and len(response.split()) >= 10
+        return analysis.stripped_length > 0 and len(analysis.tokens) >= 10
     
-    def _check_structure(self, response: str) -> bool:
+    def _check_structure(self, analysis: ResponseAnalysis) -> bool:
         """Verificar que tiene estructura (viñetas, párrafos, etc.)"""
+        response = analysis.text
         indicators = [
             '•' in response,  # viñetas
             '\n-' in response or '\n*' in response,  # listas con guiones
@@ -105,163 +271,99 @@ class ResponseValidator:
         ]
         return any(indicators)
     
-    def _check_no_hallucination(self, response: str) -> bool:
+    def _check_no_hallucination(self, analysis: ResponseAnalysis) -> bool:
         """
         Detectar frases que sugieren que el modelo está inventando información
         """
-        hallucination_phrases = [
-            'según mi conocimiento',
-            'basándome en mi experiencia',
-            'generalmente se recomienda',
-            'es común que',
-            'típicamente',
-            'en mi opinión',
-            'creo que',
-            'probablemente',
-            'suele ser',
-            'normalmente se hace'
-        ]
-        
-        response_lower = response.lower()
-        return not any(phrase in response_lower for phrase in hallucination_phrases)
+        return 'hallucination' not in analysis.phrases
     
-    def _check_fallback_message(self, response: str) -> bool:
+    def _check_fallback_message(self, analysis: ResponseAnalysis) -> bool:
         """
         Verificar que si no tiene info, lo dice claramente
         O que si tiene info, no usa mensajes de fallback
         """
-        fallback_indicators = [
-            'no encuentro',
-            'no tengo',
-            'no hay información',
-            'no está en los manuales',
-            'no puedo encontrar'
-        ]
-        
-        response_lower = response.lower()
-        has_fallback = any(indicator in response_lower for indicator in fallback_indicators)
-        
         # Si tiene fallback, la respuesta debe ser corta
-        if has_fallback:
-            return len(response) < 300
+        if 'fallback' in analysis.phrases:
+            return len(analysis.text) < 300
         
         # Si no tiene fallback, debería tener contenido sustancial
-        return len(response) > self.min_length
+        return len(analysis.text) > self.min_length
     
-    def _check_no_code_blocks(self, response: str) -> bool:
+    def _check_no_code_blocks(self, analysis: ResponseAnalysis) -> bool:
         """Verificar que no tiene bloques de código markdown mal formateados"""
-        return '```' not in response
+        return '```' not in analysis.text
     
-    def _check_spanish(self, response: str) -> bool:
+    def _check_spanish(self, analysis: ResponseAnalysis) -> bool:
         """Verificar que está en español (usando voseo argentino idealmente)"""
-        # Indicadores de español argentino
-        voseo_indicators = ['sos', 'tenés', 'podés', 'debés', 'hacés', 'querés']
-        spanish_words = ['el', 'la', 'los', 'las', 'que', 'para', 'con', 'en']
-        
-        response_lower = response.lower()
-        
-        # Al menos debe tener palabras en español
-        has_spanish = any(word in response_lower for word in spanish_words)
-        
-        # Bonus si usa voseo
-        has_voseo = any(word in response_lower for word in voseo_indicators)
-        
-        return has_spanish
+        # Al menos debe tener palabras en español (el voseo sería un bonus,
+        # pero no cambia el resultado)
+        return any(word in analysis.lower for word in SPANISH_WORDS)
     
-    def _check_relevance(self, response: str, query: str) -> bool:
+    def _check_relevance(self, analysis: ResponseAnalysis, query: str) -> bool:
         """
         Verificar que la respuesta está relacionada con la pregunta
         """
         # Extraer palabras clave de la pregunta
-        query_words = set(query.lower().split())
-        response_words = set(response.lower().split())
-        
-        # Palabras comunes a ignorar
-        stop_words = {'el', 'la', 'los', 'las', 'un', 'una', 'de', 'en', 'y', 'a', 'para', 
-                     'con', 'por', 'que', 'del', 'al', 'es', 'como', 'se', '¿', '?'}
-        
-        query_keywords = query_words - stop_words
+        query_keywords = set(query.lower().split()) - QUERY_STOP_WORDS
         
         # Al menos 30% de las palabras clave deberían aparecer en la respuesta
         if not query_keywords:
             return True
         
-        overlap = len(query_keywords & response_words)
+        overlap = len(query_keywords & analysis.token_set)
         relevance_ratio = overlap / len(query_keywords)
         
         return relevance_ratio >= 0.3
     
-    def _check_no_vague_language(self, response: str) -> bool:
+    def _check_no_vague_language(self, analysis: ResponseAnalysis) -> bool:
         """Verificar que no usa lenguaje vago (modo estricto)"""
-        vague_phrases = [
-            'puede ser',
-            'tal vez',
-            'quizás',
-            'posiblemente',
-            'eventualmente',
-            'aproximadamente' # OK si está con números
-        ]
-        
-        response_lower = response.lower()
-        return not any(phrase in response_lower for phrase in vague_phrases)
+        return 'vague' not in analysis.phrases
     
-    def _check_has_specifics(self, response: str) -> bool:
+    def _check_has_specifics(self, analysis: ResponseAnalysis) -> bool:
         """Verificar que tiene datos específicos: números, medidas, etc."""
-        # Buscar números, porcentajes, medidas
-        has_numbers = bool(re.search(r'\d+', response))
-        has_units = bool(re.search(r'\d+\s*(°|m|cm|kg|%|grados|metros|centímetros)', response))
-        
-        return has_numbers or has_units
+        # Buscar números, porcentajes, medidas (una medida siempre incluye un número)
+        return bool(NUMBER.search(analysis.text))
     
-    def _check_no_instructions_leaked(self, response: str) -> bool:
+    def _check_no_instructions_leaked(self, analysis: ResponseAnalysis) -> bool:
         """
         Detectar si la respuesta incluye las instrucciones del prompt
         CRÍTICO: Indica que el LLM no entendió su tarea
         """
-        instruction_indicators = [
-            'ANÁLISIS PREVIO',
-            'FORMATO DE RESPUESTA',
-            'REGLAS ESTRICTAS',
-            'INSTRUCCIONES:',
-            'SI LA INFO NO ESTÁ',
-            'ESTRUCTURA IDEAL',
-            'respondé solo',
-            'máximo 300 palabras',
-            'comenzá directo',
-            'usá viñetas'
-        ]
-        
-        response_upper = response.upper()
-        leaked = [ind for ind in instruction_indicators if ind.upper() in response_upper]
-        
-        if leaked:
-            return False
-        
-        return True
+        return 'instructions' not in analysis.phrases
     
-    def _check_contextual_relevance(self, response: str, query: str, context: str) -> bool:
+    def _check_contextual_relevance(
+        self,
+        analysis: ResponseAnalysis,
+        context: str,
+        context_words: Optional[Set[str]] = None
+    ) -> bool:
         """
         Verificar que la respuesta use palabras del contexto proporcionado
         Si responde sobre temas no mencionados en el contexto = problema
         """
-        # Extraer palabras significativas de la respuesta (>4 letras)
-        response_words = set(word.lower() for word in re.findall(r'\b\w{5,}\b', response))
-        
-        # Extraer palabras del contexto
-        context_words = set(word.lower() for word in re.findall(r'\b\w{5,}\b', context))
-        
         # Si es mensaje de fallback, es OK
-        if any(phrase in response.lower() for phrase in ['no encuentro', 'no tengo', 'no hay información']):
+        if 'context_fallback' in analysis.phrases:
             return True
         
         # Al menos 30% de las palabras significativas deben estar en el contexto
+        response_words = analysis.significant_words
         if not response_words:
             return False
         
-        overlap = len(response_words & context_words)
-        relevance_ratio = overlap / len(response_words)
-        
-        return relevance_ratio >= 0.3
+        # Con el vocabulario precalculado de los chunks basta una intersección
+        if context_words is not None:
+            return len(response_words & context_words) / len(response_words) >= 0.3
+        
+        # Se buscan solo las palabras de la respuesta (no se tokeniza el
+        # contexto) y se corta apenas se alcanza el umbral
+        context_lower = context.lower()
+        overlap = 0
+        for word in response_words:
+            if contains_word(context_lower, word):
+                overlap += 1
+                if overlap / len(response_words) >= 0.3:
+                    return True
+        return False
     
     # ==================== GENERACIÓN DE RECOMENDACIONES ====================
     
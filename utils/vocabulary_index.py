@@ -0,0 +1,117 @@
+"""
+Vocabulario de cada chunk precalculado al indexar
+Se construye junto con los embeddings (src/rag/embeddings.py) y guarda las
+palabras significativas de cada chunk (mismo criterio que la validación de
+relevancia contextual) con su frecuencia, para que la validación una
+conjuntos en lugar de recorrer el texto del contexto en cada consulta
+"""
+
+from collections import Counter
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+import json
+
+from utils.context_builder import format_context_doc
+from utils.validators import SIGNIFICANT_WORD
+
+
+VOCABULARY_FILE = "vocabulary.json"
+
+
+def word_frequencies(text: str) -> Dict[str, int]:
+    """Frecuencia de las palabras significativas de un texto (en minúsculas)"""
+    return dict(Counter(SIGNIFICANT_WORD.findall(text.lower())))
+
+
+class VocabularyIndex:
+    """
+    Palabras significativas de cada chunk indexadas por chunk_id
+    """
+
+    def __init__(self, frequencies: Dict[str, Dict[str, int]]):
+        """
+        Args:
+            frequencies: chunk_id -> {palabra: frecuencia}
+        """
+        self.frequencies = frequencies
+        self.words: Dict[str, FrozenSet[str]] = {
+            chunk_id: frozenset(counts) for chunk_id, counts in frequencies.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self.words
+
+    def words_for(self, chunk_ids: Iterable[str]) -> Optional[Set[str]]:
+        """
+        Unión de las palabras de los chunks
+
+        Returns:
+            Conjunto de palabras, o None si algún chunk no está indexado
+            (el llamador debe recorrer el texto del contexto)
+        """
+        words = set()
+        for chunk_id in chunk_ids:
+            chunk_words = self.words.get(chunk_id)
+            if chunk_words is None:
+                return None
+            words |= chunk_words
+        return words
+
+    def context_words(self, docs: List[Dict]) -> Optional[Set[str]]:
+        """
+        Palabras significativas del contexto que arma join_context con docs
+
+        Los pasajes fusionados por ContextBuilder aportan todos sus chunks
+        ('merged_chunk_ids') y los encabezados de cada fragmento también
+        forman parte del contexto. Los pasajes truncados por el presupuesto
+        se tokenizan directamente. El texto del resto de los docs debe ser
+        el de los chunks (sin compresión a nivel de oración).
+
+        Returns:
+            Conjunto de palabras, o None si algún chunk no está indexado
+        """
+        chunk_ids = []
+        words = set()
+        for doc in docs:
+            if doc.get('truncated'):
+                words.update(word_frequencies(format_context_doc(doc)))
+                continue
+            chunk_ids.extend(doc.get('merged_chunk_ids') or [doc.get('chunk_id')])
+            words.update(word_frequencies(format_context_doc({**doc, 'text': ''})))
+        chunk_words = self.words_for(chunk_ids)
+        if chunk_words is None:
+            return None
+        return words | chunk_words
+
+    # ==================== CONSTRUCCIÓN Y PERSISTENCIA ====================
+
+    @classmethod
+    def build(cls, chunks: List[Dict]) -> 'VocabularyIndex':
+        """
+        Construir índice a partir de los chunks del chunker
+
+        Args:
+            chunks: Chunks con 'chunk_id' y 'text'
+        """
+        return cls({chunk['chunk_id']: word_frequencies(chunk['text']) for chunk in chunks})
+
+    def save(self, path: str):
+        """Guardar índice en un directorio (JSON)"""
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / VOCABULARY_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self.frequencies, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> 'VocabularyIndex':
+        """
+        Cargar índice guardado con save()
+
+        Raises:
+            FileNotFoundError: Si el índice no fue construido
+        """
+        with open(Path(path) / VOCABULARY_FILE, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))